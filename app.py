@@ -1,11 +1,15 @@
 # app.py This is the main Flask application for the news aggregation platform.
+import atexit
+import hmac
 import json
 import os
-import subprocess
 import time
+from urllib.parse import quote
 
 from flask import (
     Flask,
+    Response,
+    g,
     jsonify,
     request,
     render_template,
@@ -15,8 +19,20 @@ from flask import (
 )
 from werkzeug.utils import secure_filename
 
+import categorize_worker
+import ingest
+import metrics
+import scrape_worker
+from events import EventBus, format_sse
+from jobs import JobRunner
+from likes import LikeBuffer
+from persist import read_json
+from progress import get_reporter, read_status
+from ranking import decode_cursor
+from responses import json_response
+from storage import get_storage
+
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-NEWSDB_PATH = os.path.join(BASE_DIR, "newsdb.json")
 USERS_PATH = os.path.join(BASE_DIR, "users.json")
 
 UPLOAD_FOLDER = os.path.join(BASE_DIR, "static", "uploads")
@@ -28,6 +44,61 @@ app = Flask(__name__, static_folder="static", template_folder="templates")
 app.secret_key = "CHANGE_THIS_TO_A_RANDOM_SECRET"
 app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
 
+SSE_HEARTBEAT = 15.0  # Sekunden zwischen Keepalive-Kommentaren
+
+POSTS_PAGE_SIZE = 50
+POSTS_PAGE_MAX = 200
+
+# /metrics: eingeloggt oder mit "Authorization: Bearer <token>" (für Prometheus)
+METRICS_TOKEN = os.environ.get("AGGREPAGE_METRICS_TOKEN", "")
+
+# Ingest-Daemon im App-Prozess starten (sonst separat: python ingest.py)
+INGEST_IN_APP = os.environ.get("AGGREPAGE_INGEST", "0") == "1"
+
+event_bus = EventBus()
+reload_jobs = JobRunner(on_finish=lambda job: event_bus.publish("reload", job))
+get_reporter().add_listener(lambda status: event_bus.publish("status", status))
+
+like_buffer = LikeBuffer()
+atexit.register(like_buffer.flush)
+
+ingest_daemon = None
+
+
+def start_ingest() -> None:
+    """
+    Startet den Ingest-Daemon in diesem Prozess. Nur im Prozess aufrufen,
+    der die Requests bedient – nicht beim Import, den auch der Reloader
+    von werkzeug und die Worker-Prozesse von categorize ausführen.
+    """
+    global ingest_daemon
+    if ingest_daemon is not None:
+        return
+    ingest_daemon = ingest.IngestDaemon(busy=reload_jobs.is_running, start_job=reload_jobs.start,
+                                        on_change=lambda summary: event_bus.publish("ingest", summary["counts"]))
+    ingest_daemon.start()
+    atexit.register(ingest_daemon.stop, 5.0)
+
+
+# ----------------- Metriken -----------------
+
+
+@app.before_request
+def start_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_latency(response):
+    started = g.pop("request_started", None)
+    if started is not None:
+        # Route als Muster (/api/reload/<job_id>), nicht die URL – sonst wächst die Zahl der Zeitreihen
+        route = request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+        metrics.HTTP_SECONDS.observe(
+            time.perf_counter() - started, method=request.method, route=route, status=response.status_code,
+        )
+    return response
+
 
 # ----------------- Helpers -----------------
 
@@ -37,29 +108,7 @@ def allowed_file(filename):
 
 
 def load_db():
-    if not os.path.exists(NEWSDB_PATH):
-        return {
-            "posts": [],
-            "comments": [],
-            "lists": {"fundgrube": []},
-            "chat": [],
-        }
-    with open(NEWSDB_PATH, "r", encoding="utf-8") as f:
-        db = json.load(f)
-    db.setdefault("posts", [])
-    db.setdefault("comments", [])
-    db.setdefault("lists", {"fundgrube": []})
-    db.setdefault("chat", [])
-    return db
-
-
-def save_db(db):
-    db.setdefault("posts", [])
-    db.setdefault("comments", [])
-    db.setdefault("lists", {"fundgrube": []})
-    db.setdefault("chat", [])
-    with open(NEWSDB_PATH, "w", encoding="utf-8") as f:
-        json.dump(db, f, ensure_ascii=False, indent=2)
+    return get_storage().load()
 
 
 def load_users():
@@ -125,29 +174,51 @@ def index():
 def api_status():
     if not require_login():
         return jsonify({}), 401
-    db = load_db()
-    return jsonify({
-        "posts_count": len(db.get("posts", [])),
-        "fundgrube_count": len(db.get("lists", {}).get("fundgrube", [])),
-    })
+    return jsonify(get_storage().stats())
+
+
+def job_payload(job):
+    # Job-Zustand plus der aktuelle Stand aus reload_status.json
+    return {"ok": True, "job": job, "status": read_status()}
 
 
 @app.post("/api/reload")
 def api_reload():
     if not require_login():
         return jsonify({"ok": False, "error": "auth required"}), 401
-    try:
-        subprocess.run(
-            ["python", os.path.join(BASE_DIR, "scrape_worker.py")],
-            check=True,
-        )
-        subprocess.run(
-            ["python", os.path.join(BASE_DIR, "categorize_worker.py")],
-            check=True,
-        )
-    except subprocess.CalledProcessError as e:
-        return jsonify({"ok": False, "error": str(e)}), 500
-    return jsonify({"ok": True})
+
+    job, started = reload_jobs.start("reload", [
+        ("scrape", scrape_worker.main),
+        ("categorize", categorize_worker.main),
+    ])
+    if not started:
+        return jsonify({"ok": False, "error": "reload already running", "job_id": job["id"]}), 409
+    return jsonify({"ok": True, "job_id": job["id"]}), 202
+
+
+@app.get("/api/reload/status")
+def api_reload_latest():
+    if not require_login():
+        return jsonify({"ok": False, "error": "auth required"}), 401
+    return jsonify(job_payload(reload_jobs.latest()))
+
+
+@app.get("/api/reload/<job_id>")
+def api_reload_job(job_id):
+    if not require_login():
+        return jsonify({"ok": False, "error": "auth required"}), 401
+    job = reload_jobs.get(job_id)
+    if not job:
+        return jsonify({"ok": False, "error": "job not found"}), 404
+    return jsonify(job_payload(job))
+
+
+@app.get("/api/ingest")
+def api_ingest():
+    if not require_login():
+        return jsonify({"ok": False, "error": "auth required"}), 401
+    # Abfragepläne aus ingest_state.json – gleich, ob der Daemon hier oder separat läuft
+    return jsonify({"ok": True, "in_app": ingest_daemon is not None, **read_json(ingest.INGEST_STATE_PATH, {})})
 
 
 # ----------------- API: Posts & Likes -----------------
@@ -158,27 +229,33 @@ def api_posts():
     if not require_login():
         return jsonify([]), 401
 
-    db = load_db()
-    posts = db.get("posts", [])
-    comments = db.get("comments", [])
+    store = get_storage()
+    category = request.args.get("category")
+    cursor = request.args.get("cursor") or None
+    limit = min(max(request.args.get("limit", POSTS_PAGE_SIZE, type=int), 1), POSTS_PAGE_MAX)
+    # Optionale Vielfalts-Obergrenze: ?per_source=1 -> höchstens ein Artikel pro Quelle
+    per_source = request.args.get("per_source", type=int)
+    if per_source is not None:
+        per_source = max(per_source, 1)
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except ValueError:
+            return jsonify({"ok": False, "error": "invalid cursor"}), 400
 
-    # Kommentar-Anzahlen pro Post
-    comment_counts = {}
-    for c in comments:
-        pid = c.get("post_id")
-        if not pid:
-            continue
-        comment_counts[pid] = comment_counts.get(pid, 0) + 1
+    def build():
+        posts, next_cursor = store.page_posts(category, limit, cursor, per_source)
 
-    category = request.args.get("category")
-    if category:
-        posts = [p for p in posts if p.get("auto_category") == category]
+        # Kommentar-Anzahlen pro Post
+        comment_counts = store.comment_counts([p.get("id") for p in posts])
+        posts = [dict(p, comment_count=comment_counts.get(p.get("id"), 0)) for p in posts]
 
-    for p in posts:
-        p["comment_count"] = comment_counts.get(p.get("id"), 0)
+        # Nächste Seite: ?cursor=<X-Next-Cursor> (bereits URL-kodiert)
+        headers = {"X-Next-Cursor": quote(next_cursor, safe="")} if next_cursor else {}
+        return posts, headers
 
-    posts = sorted(posts, key=lambda p: p.get("auto_score", 0), reverse=True)
-    return jsonify(posts[:50])
+    # Unveränderte Posts und Kommentare: 304 ohne Lesen und Serialisieren
+    return json_response(build, store.revision("posts", "comments"))
 
 
 @app.post("/api/posts/<path:post_id>/like")
@@ -186,35 +263,11 @@ def api_like(post_id):
     if not require_login():
         return jsonify({"ok": False, "error": "auth required"}), 401
 
-    db = load_db()
-    posts = db.get("posts", [])
-    updated_post = None
-
-    from categorize_worker import compute_points
-
-    for p in posts:
-        if p.get("id") == post_id:
-            likes = int(p.get("likes") or 0) + 1
-            p["likes"] = likes
-
-            title = p.get("title", "") or ""
-            desc = p.get("description", "") or ""
-            url = p.get("url", "") or ""
-            category = p.get("auto_category") or "international"
-            created_at = int(p.get("created_at") or 0)
-
-            score = compute_points(title, desc, url, likes, category, created_at)
-            p["auto_score"] = int(score)
-
-            updated_post = p
-            break
-
-    if not updated_post:
+    # Likes werden gesammelt und gebündelt gespeichert (siehe likes.py)
+    p = like_buffer.like(post_id)
+    if not p:
         return jsonify({"ok": False, "error": "post not found"}), 404
-
-    db["posts"] = posts
-    save_db(db)
-    return jsonify({"ok": True, "post": updated_post})
+    return jsonify({"ok": True, "post": p})
 
 
 # ----------------- API: Kommentare pro Eintrag -----------------
@@ -229,10 +282,8 @@ def api_get_comments():
     if not post_id:
         return jsonify([])
 
-    db = load_db()
-    comments = [c for c in db["comments"] if c.get("post_id") == post_id]
-    comments.sort(key=lambda c: c.get("created_at", 0))
-    return jsonify(comments)
+    store = get_storage()
+    return json_response(lambda: store.comments_for(post_id), store.revision("comments"))
 
 
 @app.post("/api/comments")
@@ -246,14 +297,14 @@ def api_add_comment():
     if not post_id or not text:
         return jsonify({"ok": False, "error": "post_id and text required"}), 400
 
-    db = load_db()
-    db["comments"].append({
+    comment = {
         "post_id": post_id,
         "author": session.get("user"),
         "text": text,
         "created_at": int(time.time()),
-    })
-    save_db(db)
+    }
+    get_storage().add_comment(comment)
+    event_bus.publish("comment", comment)
     return jsonify({"ok": True})
 
 
@@ -265,8 +316,8 @@ def api_lists():
     if not require_login():
         return jsonify({}), 401
 
-    db = load_db()
-    return jsonify(db.get("lists", {"fundgrube": []}))
+    store = get_storage()
+    return json_response(store.get_lists, store.revision("lists"))
 
 
 @app.post("/api/fundgrube/add")
@@ -288,18 +339,13 @@ def api_fundgrube_add():
     if not url_val:
         return jsonify({"ok": False, "error": "url required"}), 400
 
-    db = load_db()
-    lists = db.setdefault("lists", {})
-    fund = lists.setdefault("fundgrube", [])
-    fund.append({
-        "id": f"user_{len(fund) + 1}",
+    get_storage().add_list_item("fundgrube", {
         "title": title_val,
         "url": url_val,
         "image": image_url,
         "created_at": int(time.time()),
         "author": session.get("user"),
     })
-    save_db(db)
     return jsonify({"ok": True})
 
 
@@ -311,10 +357,8 @@ def api_chat_get():
     if not require_login():
         return jsonify([]), 401
 
-    db = load_db()
-    msgs = db.get("chat", [])
-    msgs = sorted(msgs, key=lambda m: m.get("created_at", 0), reverse=True)[:50]
-    return jsonify(list(reversed(msgs)))
+    store = get_storage()
+    return json_response(lambda: store.recent_chat(50), store.revision("chat"))
 
 
 @app.post("/api/chat")
@@ -327,26 +371,70 @@ def api_chat_post():
     if not text:
         return jsonify({"ok": False, "error": "text required"}), 400
 
-    db = load_db()
-    chat = db.setdefault("chat", [])
-    chat.append({
+    msg = {
         "author": session.get("user"),
         "text": text,
         "created_at": int(time.time()),
-    })
-    save_db(db)
+    }
+    get_storage().add_chat(msg)
+    event_bus.publish("chat", msg)
     return jsonify({"ok": True})
 
 
+# ----------------- API: Live-Updates (SSE) -----------------
+
+
+@app.get("/api/stream")
+def api_stream():
+    if not require_login():
+        return jsonify({}), 401
+
+    last = request.headers.get("Last-Event-ID") or request.args.get("last_id") or ""
+    after = int(last) if last.isdigit() else event_bus.last_id()
+
+    def generate(after):
+        yield "retry: 3000\n\n"
+        while True:
+            events = event_bus.wait(after, timeout=SSE_HEARTBEAT)
+            if events is None:
+                # Lücke (Puffer übergelaufen oder Server neu gestartet): Client lädt neu
+                after = event_bus.last_id()
+                yield format_sse({"id": after, "type": "resync", "data": {}})
+            elif not events:
+                yield ": ping\n\n"
+            for ev in events or []:
+                after = ev["id"]
+                yield format_sse(ev)
+
+    return Response(
+        generate(after),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 # ----------------- Debug -----------------
 
 
+@app.get("/metrics")
+def metrics_endpoint():
+    token = request.headers.get("Authorization", "")
+    token_ok = bool(METRICS_TOKEN) and hmac.compare_digest(token, f"Bearer {METRICS_TOKEN}")
+    if not token_ok and not require_login():
+        return Response("auth required\n", status=401, mimetype="text/plain")
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+
 @app.get("/api/newsdb")
 def api_newsdb():
     if not require_login():
         return jsonify({}), 401
-    return jsonify(load_db())
+    # Ganze DB: blockweise kodiert und komprimiert statt als ein großer String
+    return json_response(load_db, get_storage().revision(), stream=True)
 
 
 if __name__ == "__main__":
+    # mit debug=True startet werkzeug die App ein zweites Mal; bedient wird nur im Kindprozess
+    if INGEST_IN_APP and os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        start_ingest()
     app.run(host='0.0.0.0', port=5000, debug=True)
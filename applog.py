@@ -0,0 +1,344 @@
+# applog.py Append-only JSONL segment logs for chat messages and comments, with tail reads and a per-key offset index.
+import json
+import os
+import re
+import threading
+from collections import deque
+
+from persist import FileLock, replace_file
+
+SEGMENT_BYTES = 1024 * 1024  # ab dieser Größe beginnt ein neues Segment
+COMPACT_SEGMENTS = 8         # so viele abgeschlossene Segmente werden zu einem zusammengefasst
+TAIL_SIZE = 200              # so viele letzte Einträge hält der Speicher-Tail
+READ_BLOCK = 64 * 1024
+
+_SEGMENT_RE = re.compile(r"^(\d{6})-(\d{6})\.jsonl$")
+
+
+def _segment_name(first: int, last: int) -> str:
+    return f"{first:06d}-{last:06d}.jsonl"
+
+
+def _live_segments(directory: str) -> list[tuple[int, int, str]]:
+    """
+    Segmente (first, last, name) in Reihenfolge. Ein kompaktiertes Segment
+    deckt den Bereich first..last ab; alte Segmente in diesem Bereich, die
+    während einer Kompaktierung noch herumliegen, werden ignoriert.
+    """
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    segs = []
+    for name in names:
+        m = _SEGMENT_RE.match(name)
+        if m:
+            segs.append((int(m.group(1)), int(m.group(2)), name))
+    segs.sort(key=lambda s: (s[0], -s[1]))
+    live = []
+    for seg in segs:
+        if live and seg[1] <= live[-1][1]:
+            continue
+        live.append(seg)
+    return live
+
+
+def _parse(line: bytes):
+    try:
+        return json.loads(line)
+    except ValueError:  # abgebrochene Zeile nach einem Absturz
+        return None
+
+
+class AppendLog:
+    """
+    Append-only Log aus JSONL-Segmenten in einem Verzeichnis. append()
+    schreibt eine Zeile ans aktive Segment (unter einer Lock-Datei, also
+    auch zwischen Prozessen sicher). Im Speicher liegen nur die letzten
+    tail_size Einträge und – mit index_key – pro Schlüssel die Positionen
+    (Segment, Offset) der Einträge. Neue Zeilen anderer Prozesse werden
+    beim nächsten Zugriff ab der zuletzt gelesenen Position nachgelesen.
+    Ohne index_key wird beim Start nichts gescannt, tail() liest vom
+    Dateiende rückwärts.
+    """
+
+    def __init__(self, directory: str, index_key: str | None = None,
+                 segment_bytes: int = SEGMENT_BYTES, tail_size: int = TAIL_SIZE):
+        self.directory = directory
+        self.index_key = index_key
+        self.segment_bytes = segment_bytes
+        self.tail_size = tail_size
+        self._lock = threading.RLock()
+        self._file_lock = FileLock(os.path.join(directory, ".lock"))
+        self._segments: list[tuple[int, int, str]] | None = None
+        self._pos = 0  # gelesene Bytes im letzten Segment
+        self._tail: deque | None = None
+        self._index: dict = {}
+
+    def exists(self) -> bool:
+        return os.path.isdir(self.directory)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    # ---- Lesen / Nachführen ----
+
+    def _scan(self, name: str, start: int = 0):
+        """(offset, record) aller vollständigen Zeilen ab start; dazu die Position nach der letzten."""
+        out = []
+        with open(self._path(name), "rb") as f:
+            f.seek(start)
+            data = f.read()
+        pos = 0
+        while True:
+            nl = data.find(b"\n", pos)
+            if nl < 0:
+                break
+            rec = _parse(data[pos:nl])
+            if rec is not None:
+                out.append((start + pos, rec))
+            pos = nl + 1
+        return out, start + pos
+
+    def _take(self, name: str, entries) -> None:
+        if self._tail is not None:
+            self._tail.extend(rec for _, rec in entries)
+        if self.index_key:
+            key = self.index_key
+            for off, rec in entries:
+                self._index.setdefault(rec.get(key), []).append((name, off))
+
+    def _rebuild(self, segments) -> None:
+        self._segments = segments
+        self._index = {}
+        self._pos = 0
+        self._tail = None
+        if not segments:
+            self._tail = deque(maxlen=self.tail_size)
+            return
+        if self.index_key:
+            self._tail = deque(maxlen=self.tail_size)
+            for _, _, name in segments:
+                entries, self._pos = self._scan(name)
+                self._take(name, entries)
+        else:
+            # Tail wird erst bei Bedarf rückwärts gelesen
+            self._pos = self._complete_size(segments[-1][2])
+
+    def _complete_size(self, name: str) -> int:
+        """Größe bis einschließlich der letzten vollständigen Zeile."""
+        size = os.path.getsize(self._path(name))
+        with open(self._path(name), "rb") as f:
+            end = size
+            while end > 0:
+                start = max(0, end - READ_BLOCK)
+                f.seek(start)
+                block = f.read(end - start)
+                nl = block.rfind(b"\n")
+                if nl >= 0:
+                    return start + nl + 1
+                end = start
+        return 0
+
+    def _refresh(self) -> None:
+        segments = _live_segments(self.directory)
+        known = self._segments
+        if known is None or segments[:len(known)] != known:
+            # erster Zugriff oder kompaktiert/ersetzt
+            self._rebuild(segments)
+            return
+        # Bekannte Segmente unverändert: Rest des letzten und neue Segmente nachlesen
+        for i in range(max(0, len(known) - 1), len(segments)):
+            name = segments[i][2]
+            start = self._pos if i == len(known) - 1 else 0
+            entries, self._pos = self._scan(name, start)
+            self._take(name, entries)
+        self._segments = segments
+
+    def _reading(self, read):
+        """read() unter der Sperre; verschwindet ein Segment (Kompaktierung), einmal neu aufbauen."""
+        with self._lock:
+            try:
+                self._refresh()
+                return read()
+            except FileNotFoundError:
+                self._rebuild(_live_segments(self.directory))
+                return read()
+
+    def _read_tail(self, n: int) -> list[dict]:
+        """Die letzten n Einträge, rückwärts vom Ende der Segmente gelesen."""
+        out: list[dict] = []
+        for i in range(len(self._segments) - 1, -1, -1):
+            name = self._segments[i][2]
+            end = self._pos if i == len(self._segments) - 1 else os.path.getsize(self._path(name))
+            with open(self._path(name), "rb") as f:
+                rest = b""
+                while end > 0 and len(out) < n:
+                    start = max(0, end - READ_BLOCK)
+                    f.seek(start)
+                    block = f.read(end - start) + rest
+                    lines = block.split(b"\n")
+                    rest = lines[0] if start > 0 else b""
+                    for line in reversed(lines[1:] if start > 0 else lines):
+                        if line:
+                            rec = _parse(line)
+                            if rec is not None:
+                                out.append(rec)
+                                if len(out) >= n:
+                                    break
+                    end = start
+            if len(out) >= n:
+                break
+        out.reverse()
+        return out
+
+    def tail(self, n: int) -> list[dict]:
+        """Die letzten n Einträge in Schreibreihenfolge."""
+        def read():
+            if n > self.tail_size:
+                return self._read_tail(n)
+            if self._tail is None:
+                self._tail = deque(self._read_tail(self.tail_size), maxlen=self.tail_size)
+            return [dict(r) for r in list(self._tail)[-n:]] if n > 0 else []
+        return self._reading(read)
+
+    def records(self) -> list[dict]:
+        """Alle Einträge in Schreibreihenfolge."""
+        def read():
+            out = []
+            for i, (_, _, name) in enumerate(self._segments):
+                with open(self._path(name), "rb") as f:
+                    data = f.read(self._pos) if i == len(self._segments) - 1 else f.read()
+                out.extend(rec for rec in map(_parse, data.splitlines()) if rec is not None)
+            return out
+        return self._reading(read)
+
+    def lookup(self, key) -> list[dict]:
+        """Alle Einträge mit index_key == key, in Schreibreihenfolge, über den Offset-Index."""
+        def read():
+            out = []
+            f = current = None
+            try:
+                for name, off in self._index.get(key, []):
+                    if name != current:
+                        if f is not None:
+                            f.close()
+                        f = open(self._path(name), "rb")
+                        current = name
+                    f.seek(off)
+                    rec = _parse(f.readline())
+                    if rec is not None:
+                        out.append(rec)
+            finally:
+                if f is not None:
+                    f.close()
+            return out
+        return self._reading(read)
+
+    def counts(self) -> dict:
+        """Anzahl Einträge pro index_key."""
+        return self._reading(lambda: {k: len(v) for k, v in self._index.items()})
+
+    def position(self) -> str:
+        """
+        Kennung des Stands: aktives Segment und Byte-Position darin. Ändert
+        sich mit jedem append; compact()/replace() schreiben unter neuem Namen.
+        """
+        def read():
+            if not self._segments:
+                return "0"
+            return f"{self._segments[-1][2][:-len('.jsonl')]}.{self._pos}"
+        return self._reading(read)
+
+    # ---- Schreiben ----
+
+    def append(self, record: dict) -> None:
+        self.extend([record])
+
+    def extend(self, records: list[dict]) -> None:
+        if not records:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock, self._file_lock:
+            self._refresh()
+            segments = self._segments
+            if not segments:
+                first = 1
+            else:
+                first, last, name = segments[-1]
+                if os.path.getsize(self._path(name)) >= self.segment_bytes:
+                    first = last + 1
+                else:
+                    first = None
+            if first is not None:
+                name = _segment_name(first, first)
+                segments = segments + [(first, first, name)]
+            name = segments[-1][2]
+
+            with open(self._path(name), "ab") as f:
+                f.seek(0, os.SEEK_END)
+                pos = f.tell()
+                if first is None and pos > self._pos:  # abgebrochene Zeile nach einem Absturz abschließen
+                    f.write(b"\n")
+                    pos += 1
+                entries = []
+                for rec in records:
+                    line = json.dumps(rec, ensure_ascii=False).encode("utf-8") + b"\n"
+                    f.write(line)
+                    entries.append((pos, dict(rec)))
+                    pos += len(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+            if first is not None:
+                self._segments = segments
+            self._pos = pos
+            self._take(name, entries)
+
+            if len(self._segments) > COMPACT_SEGMENTS:
+                self.compact()
+
+    def compact(self, include_active: bool = False) -> dict:
+        """
+        Fasst die abgeschlossenen Segmente (mit include_active alle) zu einem
+        zusammen. Die neue Datei deckt den Nummernbereich der alten ab,
+        Leser in anderen Prozessen bauen ihren Index beim nächsten Zugriff neu.
+        """
+        with self._lock, self._file_lock:
+            self._refresh()
+            segments = self._segments if include_active else self._segments[:-1]
+            if len(segments) < 2 and not (include_active and segments):
+                return {"segments": len(self._segments), "merged": 0, "records": None}
+            return self._rewrite(segments, None)
+
+    def replace(self, records: list[dict]) -> None:
+        """Ersetzt den ganzen Inhalt des Logs durch records."""
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock, self._file_lock:
+            self._refresh()
+            self._rewrite(self._segments, records)
+
+    def _rewrite(self, segments, records) -> dict:
+        first = segments[0][0] if segments else 1
+        last = segments[-1][1] if segments else 1
+        if len(segments) == 1 and segments[0] == self._segments[-1]:
+            # nur das aktive Segment: unter neuem Namen schreiben, damit andere Prozesse neu aufbauen
+            last += 1
+        if records is None:
+            records = []
+            for _, _, name in segments:
+                entries, _ = self._scan(name)
+                records.extend(rec for _, rec in entries)
+        tmp = self._path(f".compact-{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            for rec in records:
+                f.write(json.dumps(rec, ensure_ascii=False).encode("utf-8") + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+        target = _segment_name(first, last)
+        replace_file(tmp, self._path(target))
+        for _, _, name in segments:
+            if name != target:
+                os.unlink(self._path(name))
+        self._rebuild(_live_segments(self.directory))
+        return {"segments": len(self._segments), "merged": len(segments), "records": len(records)}
@@ -0,0 +1,63 @@
+# bench_dedupe.py Benchmark: MinHash/LSH near-duplicate clustering on growing synthetic corpora.
+#
+# Jeder fünfte Post ist eine leicht umformulierte Kopie eines früheren
+# (ein Titelwort ersetzt, gleiche Beschreibung, andere Quelle). Gemessen
+# werden Laufzeit pro Post – sie soll mit der Korpusgröße nicht wachsen –
+# und wie viele der eingebauten Duplikate gefunden werden.
+#
+#   python benchmarks/bench_dedupe.py --n 40000
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dedupe  # noqa: E402
+
+VOCABULARY = 20_000
+
+
+def synthetic_posts(n: int, seed: int = 1) -> tuple[list[dict], int]:
+    rng = random.Random(seed)
+    words = [f"wort{i}" for i in range(VOCABULARY)]
+    posts, copies = [], 0
+    for i in range(n):
+        if i % 5 == 4:
+            base = posts[rng.randrange(len(posts))]
+            title = base["title"].split()
+            title[rng.randrange(len(title))] = "aktualisiert"
+            posts.append({"id": f"p{i}", "source": f"Quelle {i % 7}", "title": " ".join(title),
+                          "description": base["description"]})
+            copies += 1
+        else:
+            posts.append({
+                "id": f"p{i}",
+                "source": f"Quelle {i % 7}",
+                "title": " ".join(rng.choice(words) for _ in range(9)),
+                "description": " ".join(rng.choice(words) for _ in range(rng.randint(20, 60))),
+            })
+    return posts, copies
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=40_000, help="größter Korpus (Posts)")
+    args = ap.parse_args()
+
+    print(f"numpy: {'ja' if dedupe.np is not None else 'nein'}")
+    n = max(1000, args.n // 8)
+    while n <= args.n:
+        posts, copies = synthetic_posts(n)
+        t0 = time.perf_counter()
+        groups = dedupe.cluster(posts)
+        dt = time.perf_counter() - t0
+        found = sum(len(g) - 1 for g in groups)
+        print(f"{n:7d} Posts: {dt:6.2f}s  ({dt / n * 1e6:5.0f} µs/Post)  "
+              f"{found}/{copies} Duplikate gefunden")
+        n *= 2
+
+
+if __name__ == "__main__":
+    main()
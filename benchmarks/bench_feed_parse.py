@@ -0,0 +1,86 @@
+# bench_feed_parse.py Benchmark: feedparser vs. the incremental feed_stream parser, with and without the entry cap.
+#
+# Misst CPU-Zeit und Speicherspitze (tracemalloc) für das Parsen eines
+# synthetischen RSS-Feeds mit --n Einträgen bis zum Limit --cap, so wie
+# fetch_feed es braucht. Bricht ab, wenn die erzeugten Posts abweichen.
+#
+#   python benchmarks/bench_feed_parse.py --n 1000 --cap 50
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import feedparser  # noqa: E402
+
+import corpus  # noqa: E402
+import scrape_worker as sw  # noqa: E402
+
+
+def old_parse(content: bytes, cap: int) -> list[dict]:
+    """So hat fetch_feed bis jetzt geparst."""
+    feed = feedparser.parse(content)
+    posts = []
+    for entry in feed.entries[:cap]:
+        link = getattr(entry, "link", None)
+        if not link:
+            continue
+        posts.append(sw.make_post("austria", "Benchmark", getattr(entry, "title", "") or "",
+                                  sw.strip_tags(getattr(entry, "summary", "") or ""), link,
+                                  sw.ts_from_entry(entry)))
+    return posts
+
+
+def new_parse(content: bytes, cap: int) -> list[dict]:
+    return [
+        sw.make_post("austria", "Benchmark", e.title, sw.strip_tags(e.summary), e.link, e.published or 0)
+        for e in sw.feed_entries(content, cap) if e.link
+    ]
+
+
+def timed(fn, repeat: int = 3) -> tuple[float, object]:
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.process_time()
+        result = fn()
+        best = min(best, time.process_time() - t0)
+    return best, result
+
+
+def peak_memory(fn) -> int:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=1000, help="Einträge im Feed")
+    ap.add_argument("--cap", type=int, default=sw.DEFAULT_MAX_PER_FEED, help="Limit pro Quelle")
+    args = ap.parse_args()
+
+    content = corpus.rss_feed(args.n)
+    print(f"Feed: {args.n} Einträge, {len(content) / 1024:.0f} KB")
+    for cap in (args.cap, args.n):
+        t_old, expected = timed(lambda: old_parse(content, cap))
+        t_new, got = timed(lambda: new_parse(content, cap))
+        same = [(p["id"], p["title"], p["description"], p["created_at"]) for p in expected] == \
+               [(p["id"], p["title"], p["description"], p["created_at"]) for p in got]
+        m_old = peak_memory(lambda: old_parse(content, cap))
+        m_new = peak_memory(lambda: new_parse(content, cap))
+        print(f"Limit {cap}:")
+        print(f"  feedparser   {t_old * 1000:8.1f} ms CPU  {m_old / 1024:8.0f} KB Spitze")
+        print(f"  feed_stream  {t_new * 1000:8.1f} ms CPU  {m_new / 1024:8.0f} KB Spitze  ({t_old / t_new:5.1f}x)")
+        print(f"  identische Posts: {same}")
+        if not same:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
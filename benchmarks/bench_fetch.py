@@ -0,0 +1,163 @@
+# bench_fetch.py Benchmark: sequentielles vs. nebenläufiges Laden der Feeds gegen lokale Stub-Server.
+#
+# Startet mehrere lokale HTTP-Server (jeder Port = ein "Host") mit künstlicher Latenz,
+# spiegelt CATEGORIES/REDDIT_SUBS darauf und vergleicht Laufzeit und Ergebnis.
+#
+#   python benchmarks/bench_fetch.py --latency 0.3 --slow-latency 3
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import scrape_worker  # noqa: E402
+from feed_cache import FeedCache  # noqa: E402
+
+ITEMS_PER_FEED = 60
+BASE_TS = 1767225600  # 2026-01-01
+
+
+def rss_body(feed_id: str, items: int) -> bytes:
+    parts = [
+        '<?xml version="1.0" encoding="utf-8"?>',
+        '<rss version="2.0"><channel>',
+        f"<title>Stub {feed_id}</title><link>http://stub/{feed_id}</link>",
+    ]
+    for i in range(items):
+        parts.append(
+            "<item>"
+            f"<title>{feed_id} Artikel {i}</title>"
+            f"<link>http://stub/{feed_id}/{i}</link>"
+            f"<description>&lt;p&gt;Beschreibung {i} zu {feed_id}&lt;/p&gt;</description>"
+            f"<pubDate>{formatdate(BASE_TS + i * 60, usegmt=True)}</pubDate>"
+            "</item>"
+        )
+    parts.append("</channel></rss>")
+    return "".join(parts).encode("utf-8")
+
+
+def reddit_body(sub: str) -> bytes:
+    children = []
+    for i in range(20):
+        children.append({"data": {
+            "title": f"{sub} post {i}",
+            "selftext": f"Text {i}",
+            "ups": 100 - i,
+            "permalink": f"/r/{sub}/comments/{i}/",
+            "created_utc": BASE_TS + i,
+            "subreddit": sub,
+        }})
+    return json.dumps({"data": {"children": children}}).encode("utf-8")
+
+
+def make_handler(latency: float):
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            parts = urlsplit(self.path)
+            time.sleep(latency)
+            etag = f'"{parts.path}?{parts.query}"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            if parts.path.startswith("/r/"):
+                body = reddit_body(parts.path.split("/")[2])
+                ctype = "application/json"
+            else:
+                feed_id = parse_qs(parts.query).get("id", ["feed"])[0]
+                body = rss_body(feed_id, ITEMS_PER_FEED)
+                ctype = "application/rss+xml; charset=utf-8"
+            self.send_response(200)
+            self.send_header("Content-Type", ctype)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return StubHandler
+
+
+def start_server(latency: float) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(latency))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def point_feeds_at(servers: list[ThreadingHTTPServer], slow: ThreadingHTTPServer) -> None:
+    """Ersetzt die Feed-URLs durch Stub-URLs; der erste Feed jeder Kategorie landet am langsamen Host."""
+    n = 0
+    for cat, feeds in scrape_worker.CATEGORIES.items():
+        for i, src in enumerate(feeds):
+            server = slow if i == 0 else servers[n % len(servers)]
+            n += 1
+            src["url"] = f"http://127.0.0.1:{server.server_port}/feed?id={cat}-{i}"
+    reddit = servers[0]
+    scrape_worker.REDDIT_URL = f"http://127.0.0.1:{reddit.server_port}/r/{{sub}}/top.json"
+
+
+def run(max_workers: int, max_per_host: int, timeout: float,
+        cache: FeedCache | None = None) -> tuple[float, list[dict]]:
+    start = time.perf_counter()
+    with scrape_worker.FetchPool(max_workers=max_workers, max_per_host=max_per_host, timeout=timeout) as pool:
+        posts = scrape_worker.fetch_all(pool, cache)
+    return time.perf_counter() - start, posts
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--hosts", type=int, default=8, help="Anzahl simulierter Hosts")
+    ap.add_argument("--latency", type=float, default=0.2, help="Latenz normaler Hosts in s")
+    ap.add_argument("--slow-latency", type=float, default=2.0, help="Latenz des langsamen Hosts in s")
+    ap.add_argument("--workers", type=int, default=scrape_worker.FETCH_MAX_WORKERS)
+    ap.add_argument("--per-host", type=int, default=scrape_worker.FETCH_MAX_PER_HOST)
+    ap.add_argument("--timeout", type=float, default=scrape_worker.FETCH_TIMEOUT)
+    args = ap.parse_args()
+
+    servers = [start_server(args.latency) for _ in range(args.hosts)]
+    slow = start_server(args.slow_latency)
+    point_feeds_at(servers, slow)
+
+    devnull = open(os.devnull, "w")
+    real_stdout = sys.stdout
+    try:
+        sys.stdout = devnull
+        t_seq, seq_posts = run(1, 1, args.timeout)
+        t_par, par_posts = run(args.workers, args.per_host, args.timeout)
+        cache = FeedCache(os.devnull)
+        run(args.workers, args.per_host, args.timeout, cache)
+        cold = cache.stats()
+        t_warm, warm_posts = run(args.workers, args.per_host, args.timeout, cache)
+        warm = cache.stats()
+    finally:
+        sys.stdout = real_stdout
+        devnull.close()
+
+    n_feeds = sum(len(f) for f in scrape_worker.CATEGORIES.values()) + len(scrape_worker.REDDIT_SUBS)
+    print(f"Feeds: {n_feeds}, Hosts: {args.hosts} + 1 langsamer")
+    print(f"sequentiell:   {t_seq:7.2f}s  ({len(seq_posts)} Artikel)")
+    print(f"nebenläufig:   {t_par:7.2f}s  ({len(par_posts)} Artikel, "
+          f"workers={args.workers}, per_host={args.per_host})")
+    print(f"Speedup:       {t_seq / max(t_par, 1e-9):7.1f}x")
+    print(f"mit Cache (304): {t_warm:5.2f}s  ({warm['hits'] - cold['hits']} Treffer, "
+          f"{(warm['bytes_saved'] - cold['bytes_saved']) / 1024:.0f} KB gespart)")
+    print(f"identische Ausgabe: {seq_posts == par_posts == warm_posts}")
+
+    for s in servers + [slow]:
+        s.shutdown()
+    if not seq_posts == par_posts == warm_posts:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
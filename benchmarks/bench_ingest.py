@@ -0,0 +1,155 @@
+# bench_ingest.py Simulation: fixed-interval reloads vs. the adaptive IngestDaemon (upstream requests and publication lag).
+#
+# Erzeugt für --feeds Feeds je einen Veröffentlichungsstrom (Poisson, Raten
+# log-gleichverteilt zwischen --min-rate und --max-rate Einträgen pro Tag,
+# wie zwischen Datum und ORF.at) und lässt den IngestDaemon mit simulierter
+# Uhr gegen eine temporäre JsonStorage laufen. Verglichen wird mit einem
+# Reload aller Feeds alle --reload-minutes: Anzahl Abrufe und Zeit von der
+# Veröffentlichung bis zum Speichern (Median, p90). Der erste Tag dient dem
+# Daemon zum Einschätzen der Raten und zählt nicht mit. Aufbewahrt wird nur
+# --keep-hours (im Betrieb hält categorize den Bestand ebenso klein).
+#
+#   python benchmarks/bench_ingest.py --feeds 67 --days 2
+import argparse
+import contextlib
+import io
+import math
+import os
+import random
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import ingest  # noqa: E402
+import scrape_worker  # noqa: E402
+from feed_cache import FeedCache  # noqa: E402
+from storage import JsonStorage  # noqa: E402
+
+START = 1_800_000_000
+WARMUP = 86400
+TICK = 30.0  # so grob wacht die Schleife höchstens auf (IDLE_WAIT)
+
+
+class SimFeed:
+    def __init__(self, idx: int, per_day: float, duration: float, rng: random.Random, cap: int = 50):
+        self.name = f"Feed {idx}"
+        self.per_day = per_day
+        self.cap = cap
+        self.items: list[float] = []
+        self.titles: list[str] = []
+        t = START - 86400  # etwas Vorlauf, damit der erste Abruf ein volles Fenster sieht
+        while t < START + duration:
+            t += rng.expovariate(per_day / 86400)
+            self.items.append(t)
+            # Titel ohne gemeinsame Wörter: dedupe soll hier nichts zusammenfassen
+            self.titles.append(" ".join(f"wort{rng.randrange(10 ** 6)}" for _ in range(8)))
+        self.first_seen: dict[int, float] = {}
+
+    def window(self, now: float) -> list[int]:
+        n = sum(1 for t in self.items if t <= now)
+        return list(range(max(0, n - self.cap), n))
+
+
+class SimSchedule(ingest.FeedSchedule):
+    def __init__(self, feed: SimFeed, clock: list, fail_rate: float, rng: random.Random):
+        super().__init__(feed.name, feed.name, "austria", None)
+        self.feed = feed
+        self.clock = clock
+        self.fail_rate = fail_rate
+        self.sim_rng = rng
+        self.requests = 0
+
+    def poll(self, pool, cache):
+        self.requests += 1
+        now = self.clock[0]
+        if self.sim_rng.random() < self.fail_rate:
+            return "error", []
+        posts = []
+        for i in self.feed.window(now):
+            self.feed.first_seen.setdefault(i, now)
+            url = f"https://example.org/{self.feed.name.replace(' ', '')}/{i}"
+            posts.append(scrape_worker.make_post("austria", self.feed.name, self.feed.titles[i],
+                                                 f"Beschreibung {i}", url, int(self.feed.items[i])))
+        return 200, posts
+
+
+def percentile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else float("nan")
+
+
+def lags_adaptive(feeds: list[SimFeed], end: float) -> list[float]:
+    return [seen - f.items[i] for f in feeds for i, seen in f.first_seen.items()
+            if START + WARMUP <= f.items[i] <= end]
+
+
+def fixed_reload(feeds: list[SimFeed], every: float, end: float) -> tuple[int, list[float]]:
+    """Alle Feeds bei jedem Reload; ein Eintrag erscheint beim nächsten Reload nach seiner Veröffentlichung."""
+    requests = len(feeds) * math.ceil((end - START - WARMUP) / every)
+    lags = []
+    for f in feeds:
+        for t in f.items:
+            if START + WARMUP <= t <= end:
+                tick = START + math.ceil((t - START) / every) * every
+                lags.append(tick - t)
+    return requests, lags
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--feeds", type=int, default=67, help="Anzahl Feeds")
+    ap.add_argument("--days", type=float, default=2.0, help="simulierte Tage nach dem Einlaufen")
+    ap.add_argument("--min-rate", type=float, default=0.3, help="Einträge pro Tag, langsamster Feed")
+    ap.add_argument("--max-rate", type=float, default=150.0, help="Einträge pro Tag, schnellster Feed")
+    ap.add_argument("--fail-rate", type=float, default=0.03, help="Anteil fehlgeschlagener Abrufe")
+    ap.add_argument("--keep-hours", type=float, default=6.0, help="Aufbewahrung in der Simulation")
+    ap.add_argument("--reload-minutes", type=float, default=30.0, help="Intervall des Vergleichs-Reloads")
+    ap.add_argument("--target", type=float, default=ingest.TARGET_NEW_PER_POLL,
+                    help="angestrebte neue Einträge pro Abruf (ingest.TARGET_NEW_PER_POLL)")
+    ap.add_argument("--max-interval", type=float, default=ingest.MAX_INTERVAL / 60,
+                    help="längstes Intervall in Minuten (ingest.MAX_INTERVAL)")
+    args = ap.parse_args()
+    ingest.TARGET_NEW_PER_POLL = args.target
+    ingest.MAX_INTERVAL = args.max_interval * 60
+
+    rng = random.Random(7)
+    duration = WARMUP + args.days * 86400
+    end = START + duration
+    lo, hi = math.log(args.min_rate), math.log(args.max_rate)
+    feeds = [SimFeed(i, math.exp(rng.uniform(lo, hi)), duration, rng) for i in range(args.feeds)]
+
+    clock = [float(START)]
+    schedules = [SimSchedule(f, clock, args.fail_rate, random.Random(100 + i)) for i, f in enumerate(feeds)]
+    with tempfile.TemporaryDirectory() as tmp:
+        daemon = ingest.IngestDaemon(
+            store=JsonStorage(os.path.join(tmp, "newsdb.json")), schedules=schedules,
+            cache=FeedCache(os.path.join(tmp, "feed_cache.json")), state_path=None,
+            categorize_interval=0, seed=1, runs_log=None, max_age_days=args.keep_hours / 24,
+        )
+        counted = 0
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                while clock[0] < end:
+                    daemon.poll_once(clock[0])
+                    if clock[0] < START + WARMUP:
+                        counted = sum(s.requests for s in schedules)
+                    clock[0] = max(clock[0] + TICK, math.ceil(daemon.next_due() / TICK) * TICK)
+        finally:
+            daemon.close()
+        stored = daemon.store.count_posts()
+
+    adaptive_requests = sum(s.requests for s in schedules) - counted
+    adaptive = lags_adaptive(feeds, end)
+    fixed_requests, fixed = fixed_reload(feeds, args.reload_minutes * 60, end)
+    print(f"{args.feeds} Feeds, {args.days:g} Tage, {len(fixed)} Einträge, {stored} gespeichert")
+    print(f"  {'':24s} {'Abrufe':>8s} {'Median':>9s} {'p90':>9s}")
+    print(f"  Reload alle {args.reload_minutes:g} min    {fixed_requests:8d} "
+          f"{percentile(fixed, 0.5) / 60:7.1f} m {percentile(fixed, 0.9) / 60:7.1f} m")
+    print(f"  IngestDaemon             {adaptive_requests:8d} "
+          f"{percentile(adaptive, 0.5) / 60:7.1f} m {percentile(adaptive, 0.9) / 60:7.1f} m")
+    print(f"  Abrufe: {adaptive_requests / fixed_requests:.2f}x, "
+          f"Median-Verzögerung: {percentile(adaptive, 0.5) / percentile(fixed, 0.5):.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# bench_keywords.py Benchmark: Keyword-Schleife vs. Aho-Corasick-Matcher auf den echten Keyword-Dateien.
+#
+# Vergleicht die ursprüngliche Schleife (`word in text` pro Keyword) mit
+# categorize_worker.keyword_score_from_json auf den Posts aus newsdb.json
+# und einem synthetischen Korpus; bricht ab, wenn ein Score abweicht.
+# Dazu der Klassifikator: alle Kategorien in einem Durchlauf (keyword_scores)
+# gegen einen Durchlauf pro Kategorie und gegen das heutige Scoring einer Kategorie.
+#
+#   python benchmarks/bench_keywords.py --n 100000
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import categorize_worker as cw  # noqa: E402
+from storage import JsonStorage  # noqa: E402
+
+FILLER = (
+    "der die das und oder aber heute gestern regierung bericht laut experten zahlen woche jahr "
+    "stadt land menschen neue studie zeigt über unter nach vor mehr weniger the a of to in for "
+    "on with report says government people new study week year city country after before"
+).split()
+
+
+def loop_score(title: str, desc: str, category: str) -> int:
+    """Die ursprüngliche Implementierung als Referenz."""
+    text = f"{title} {desc}".lower()
+    mapping = cw.keyword_model().mappings.get(category, {})
+    score = 0.0
+    for word, weight in mapping.items():
+        if word in text:
+            score += weight * 100.0
+    return int(score)
+
+
+def synthetic_articles(n: int, seed: int = 42) -> list[tuple[str, str, str]]:
+    rng = random.Random(seed)
+    cats = list(cw.keyword_model().mappings)
+    keywords = {cat: list(m) for cat, m in cw.keyword_model().mappings.items()}
+    out = []
+    for i in range(n):
+        cat = cats[i % len(cats)]
+        kws = keywords[cat] or FILLER
+        title = " ".join(rng.choice(FILLER) for _ in range(6)) + " " + rng.choice(kws)
+        words = [rng.choice(FILLER) for _ in range(rng.randint(40, 90))]
+        for _ in range(rng.randint(0, 4)):
+            words.insert(rng.randrange(len(words) + 1), rng.choice(kws))
+        out.append((title.title(), " ".join(words), cat))
+    return out
+
+
+def real_articles() -> list[tuple[str, str, str]]:
+    posts = JsonStorage().list_posts()
+    return [(p.get("title") or "", p.get("description") or "", p.get("auto_category") or "international")
+            for p in posts]
+
+
+def bench(name: str, articles: list[tuple[str, str, str]]) -> bool:
+    t0 = time.perf_counter()
+    ref = [loop_score(t, d, c) for t, d, c in articles]
+    t1 = time.perf_counter()
+    new = [cw.keyword_score_from_json(t, d, c) for t, d, c in articles]
+    t2 = time.perf_counter()
+    n = max(1, len(articles))
+    print(f"{name}: {len(articles)} Artikel")
+    print(f"  Schleife:     {t1 - t0:8.2f}s  ({(t1 - t0) / n * 1e6:7.1f} µs/Artikel)")
+    print(f"  Aho-Corasick: {t2 - t1:8.2f}s  ({(t2 - t1) / n * 1e6:7.1f} µs/Artikel)")
+    print(f"  Speedup:      {(t1 - t0) / max(t2 - t1, 1e-9):8.1f}x")
+    same = ref == new
+    print(f"  identische Scores: {same}")
+    return same
+
+
+def bench_classify(name: str, articles: list[tuple[str, str, str]]) -> bool:
+    cats = list(cw.keyword_model().mappings)
+    t0 = time.perf_counter()
+    for t, d, c in articles:
+        cw.keyword_score_from_json(t, d, c)
+    t1 = time.perf_counter()
+    ref = [{c: cw.keyword_score_from_json(t, d, c) for c in cats} for t, d, _ in articles]
+    t2 = time.perf_counter()
+    new = [cw.keyword_scores(t, d) for t, d, _ in articles]
+    t3 = time.perf_counter()
+    n = max(1, len(articles))
+    print(f"{name}: Klassifikation über {len(cats)} Kategorien")
+    print(f"  eine Kategorie (heute):  {(t1 - t0) / n * 1e6:7.1f} µs/Artikel")
+    print(f"  je Kategorie ein Scan:   {(t2 - t1) / n * 1e6:7.1f} µs/Artikel")
+    print(f"  ein kombinierter Scan:   {(t3 - t2) / n * 1e6:7.1f} µs/Artikel")
+    same = ref == new
+    print(f"  identische Scores: {same}")
+    return same
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=100_000, help="Anzahl synthetischer Artikel")
+    args = ap.parse_args()
+
+    print("Keywords: " + ", ".join(f"{c}={len(m)}" for c, m in cw.keyword_model().mappings.items()))
+    ok = bench("newsdb.json", real_articles())
+    synthetic = synthetic_articles(args.n)
+    ok = bench("synthetisch", synthetic) and ok
+    ok = bench_classify("newsdb.json", real_articles()) and ok
+    ok = bench_classify("synthetisch", synthetic) and ok
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
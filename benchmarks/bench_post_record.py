@@ -0,0 +1,124 @@
+# bench_post_record.py Benchmark: posts as plain dicts vs. compact Post records (memory and throughput).
+#
+# Erzeugt einen synthetischen Korpus im Format von scrape_worker.make_post,
+# serialisiert ihn wie newsdb.json und misst für beide Darstellungen den
+# Speicher (tracemalloc) und die Zeit für Laden, Serialisieren, Kopieren
+# und den Aufbau des Rankings; bricht ab, wenn das JSON abweicht.
+#
+#   python benchmarks/bench_post_record.py --n 100000
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from post_record import Post, json_default  # noqa: E402
+from ranking import RankingIndex  # noqa: E402
+from scrape_worker import make_post  # noqa: E402
+
+CATEGORIES = ["wien", "oesterreich", "international", "wirtschaft", "sport", "kultur", "tech", "wissenschaft"]
+SOURCES = [f"Quelle {i}" for i in range(40)]
+WORDS = (
+    "der die das und oder aber heute gestern regierung bericht laut experten zahlen woche jahr "
+    "stadt land menschen neue studie zeigt über unter nach vor mehr weniger"
+).split()
+
+
+def synthetic_json(n: int, seed: int = 42) -> str:
+    rng = random.Random(seed)
+    posts = []
+    for i in range(n):
+        url = f"https://example.org/{rng.choice(CATEGORIES)}/artikel-{i}"
+        p = make_post(
+            rng.choice(CATEGORIES),
+            rng.choice(SOURCES),
+            " ".join(rng.choice(WORDS) for _ in range(8)).title(),
+            " ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 50))),
+            url,
+            1_700_000_000 + rng.randrange(14 * 86400),
+        )
+        p["auto_score"] = rng.randint(-500, 5000)
+        p["likes"] = rng.randint(0, 30)
+        if i % 3 == 0:
+            p["thumb"] = f"https://example.org/img/{i}.jpg"
+        posts.append(p)
+    return json.dumps({"posts": posts}, ensure_ascii=False)
+
+
+def load_dicts(text: str) -> list:
+    return json.loads(text)["posts"]
+
+
+def load_records(text: str) -> list:
+    return [Post.from_dict(p) for p in json.loads(text)["posts"]]
+
+
+def measure_memory(load, text: str) -> int:
+    """Speicher, den die geladenen Posts nach dem Laden noch belegen."""
+    gc.collect()
+    tracemalloc.start()
+    posts = load(text)
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del posts
+    return size
+
+
+def timed(fn, repeat: int = 3) -> tuple[float, object]:
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=100_000, help="Anzahl synthetischer Posts")
+    args = ap.parse_args()
+
+    text = synthetic_json(args.n)
+    print(f"Korpus: {args.n} Posts, {len(text) / 1e6:.1f} MB JSON")
+
+    mem_d = measure_memory(load_dicts, text)
+    mem_r = measure_memory(load_records, text)
+    print("Speicher nach dem Laden:")
+    print(f"  dict: {mem_d / 1e6:8.1f} MB  ({mem_d / args.n:6.0f} B/Post)")
+    print(f"  Post: {mem_r / 1e6:8.1f} MB  ({mem_r / args.n:6.0f} B/Post)")
+    print(f"  Ersparnis: {(1 - mem_r / mem_d) * 100:5.1f}%")
+
+    t_ld, dicts = timed(lambda: load_dicts(text))
+    t_lr, records = timed(lambda: load_records(text))
+    t_sd, out_d = timed(lambda: json.dumps({"posts": dicts}, ensure_ascii=False))
+    t_sr, out_r = timed(lambda: json.dumps({"posts": records}, ensure_ascii=False, default=json_default))
+    t_cd, _ = timed(lambda: [dict(p) for p in dicts])
+    t_cr, _ = timed(lambda: [p.to_dict() for p in records])
+    t_rd, rank_d = timed(lambda: RankingIndex(dicts))
+    t_rr, rank_r = timed(lambda: RankingIndex(records))
+
+    print("Zeit (bestes von 3):            dict       Post")
+    for name, td, tr in (
+        ("Laden (json + Umwandlung)", t_ld, t_lr),
+        ("Serialisieren", t_sd, t_sr),
+        ("Kopie nach außen", t_cd, t_cr),
+        ("Ranking aufbauen", t_rd, t_rr),
+    ):
+        print(f"  {name:26s} {td * 1000:8.1f}ms {tr * 1000:8.1f}ms")
+
+    top_d = [p["id"] for p in rank_d.top(None, 50)[0]]
+    top_r = [p["id"] for p in rank_r.top(None, 50)[0]]
+    same = out_d == out_r == text and top_d == top_r
+    print(f"  identisches JSON und Ranking: {same}")
+    if not same:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
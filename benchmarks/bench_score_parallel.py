@@ -0,0 +1,77 @@
+# bench_score_parallel.py Benchmark: categorize_worker.score_posts serial vs. process pool on a large synthetic corpus.
+#
+# Bewertet denselben Korpus mit 1, 2, 4 … Worker-Prozessen (bis --workers,
+# Standard: verfügbare Kerne), im normalen und im Klassifikator-Modus, und
+# bricht ab, wenn Scores oder Kategorien vom seriellen Lauf abweichen.
+# Der Speedup kann höchstens so groß sein wie die Zahl freier Kerne.
+#
+#   python benchmarks/bench_score_parallel.py --n 100000
+import argparse
+import copy
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import categorize_worker as cw  # noqa: E402
+
+CATEGORIES = ["austria", "international", "good_news", "investigativ", "reddit_politics"]
+FILLER = (
+    "der die das und oder aber heute gestern bericht laut zahlen woche jahr stadt land "
+    "menschen neue studie zeigt über unter nach vor mehr weniger"
+).split()
+
+
+def synthetic_posts(n: int, seed: int = 7) -> list[dict]:
+    rng = random.Random(seed)
+    keywords = [w for m in cw.keyword_model().mappings.values() for w in m]
+    words = FILLER * 4 + keywords
+
+    def text(k: int) -> str:
+        return " ".join(rng.choice(words) for _ in range(k))
+
+    now = int(time.time())
+    return [{
+        "id": f"p{i}",
+        "title": text(9).capitalize(),
+        "description": text(rng.randint(15, 45)),
+        "auto_category": rng.choice(CATEGORIES),
+        "likes": rng.randint(0, 20),
+        "created_at": now - rng.randrange(3 * 86400),
+    } for i in range(n)]
+
+
+def run(posts: list[dict], workers: int, reclassify: bool) -> tuple[float, list[dict]]:
+    posts = copy.deepcopy(posts)
+    t0 = time.perf_counter()
+    cw.score_posts(posts, now=1_800_000_000, reclassify=reclassify, workers=workers)
+    return time.perf_counter() - t0, posts
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=100_000, help="Anzahl synthetischer Posts")
+    ap.add_argument("--workers", type=int, default=cw.SCORE_WORKERS, help="höchste Worker-Zahl")
+    args = ap.parse_args()
+
+    posts = synthetic_posts(args.n)
+    print(f"Korpus: {args.n} Posts, {cw.SCORE_WORKERS} Kern(e) verfügbar")
+    fields = ("auto_score", "auto_category", "feed_category", "category_confidence")
+    for reclassify in (False, True):
+        print("Klassifikator-Modus:" if reclassify else "Nur Scores:")
+        t_serial, expected = run(posts, 1, reclassify)
+        print(f"  1 Prozess    {t_serial:6.2f}s  ({t_serial / args.n * 1e6:5.1f} µs/Post)")
+        workers = 2
+        while workers <= max(2, args.workers):
+            dt, got = run(posts, workers, reclassify)
+            same = all(a.get(f) == b.get(f) for a, b in zip(expected, got) for f in fields)
+            print(f"  {workers} Prozesse  {dt:6.2f}s  Speedup {t_serial / dt:4.2f}x  identisch: {same}")
+            if not same:
+                sys.exit(1)
+            workers *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# bench_selection.py Benchmark: old sort + pick_per_source pipeline vs. the single-pass DiversitySelector.
+#
+# Vergleicht auf einem synthetischen Korpus die frühere Auswahl in
+# categorize_worker.main (alles sortieren, pro Kategorie gruppieren, pro
+# Quelle sortieren, Auswahl sortieren) mit DiversitySelector und misst
+# eine /api/posts-Seite mit per_source über den RankingIndex. Bricht ab,
+# wenn die Auswahl abweicht.
+#
+#   python benchmarks/bench_selection.py --n 200000
+import argparse
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ranking import RankingIndex  # noqa: E402
+from selection import DiversitySelector  # noqa: E402
+
+CATEGORIES = ["austria", "international", "good_news", "investigativ", "reddit_politics"]
+
+
+def synthetic_posts(n: int, sources: int, seed: int = 5) -> list[dict]:
+    rng = random.Random(seed)
+    return [{
+        "id": f"p{i}",
+        "source": f"Quelle {rng.randrange(sources)}",
+        "auto_category": rng.choice(CATEGORIES),
+        "auto_score": rng.randint(-200, 3000),
+    } for i in range(n)]
+
+
+def old_selection(posts: list[dict], max_per_source: int = 3) -> list[dict]:
+    """So hat main() bis jetzt ausgewählt."""
+    posts = sorted(posts, key=lambda p: p.get("auto_score", 0), reverse=True)
+    by_cat = defaultdict(list)
+    for p in posts:
+        by_cat[p.get("auto_category") or "international"].append(p)
+    out = []
+    for plist in by_cat.values():
+        by_source = defaultdict(list)
+        for p in plist:
+            by_source[p.get("source") or "unknown"].append(p)
+        selected = []
+        for lst in by_source.values():
+            selected.extend(sorted(lst, key=lambda x: x.get("auto_score", 0), reverse=True)[:max_per_source])
+        selected.sort(key=lambda p: p.get("auto_score", 0), reverse=True)
+        out.extend(selected)
+    return out
+
+
+def timed(fn, repeat: int = 3) -> tuple[float, object]:
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=200_000, help="Anzahl synthetischer Posts")
+    ap.add_argument("--sources", type=int, default=400, help="Anzahl Quellen")
+    args = ap.parse_args()
+
+    posts = synthetic_posts(args.n, args.sources)
+    t_old, expected = timed(lambda: old_selection(posts))
+    t_new, got = timed(lambda: DiversitySelector(per_source=3).extend(posts).grouped())
+    same = [p["id"] for p in expected] == [p["id"] for p in got]
+    print(f"Korpus: {args.n} Posts, {args.sources} Quellen -> {len(got)} ausgewählt")
+    print(f"  sort + pick_per_source  {t_old * 1000:8.1f} ms")
+    print(f"  DiversitySelector       {t_new * 1000:8.1f} ms  ({t_old / t_new:4.2f}x)")
+    print(f"  identische Auswahl: {same}")
+    if not same:
+        sys.exit(1)
+
+    index = RankingIndex(posts)
+    t_page, _ = timed(lambda: index.top("austria", 50))
+    t_div, (page, cursor) = timed(lambda: index.top("austria", 50, per_source=1))
+    t_div2, _ = timed(lambda: index.top("austria", 50, cursor, per_source=1))
+    print("/api/posts-Seite (50 Posts, Kategorie austria):")
+    print(f"  ohne Obergrenze            {t_page * 1e6:8.0f} µs")
+    print(f"  per_source=1, Seite 1      {t_div * 1e6:8.0f} µs")
+    print(f"  per_source=1, Seite 2      {t_div2 * 1e6:8.0f} µs")
+
+
+if __name__ == "__main__":
+    main()
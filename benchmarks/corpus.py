@@ -0,0 +1,144 @@
+# corpus.py Synthetic newsdb corpora (posts, comments, chat, lists) and RSS feeds for the benchmark suite.
+#
+# Die Posts haben das Schema von scrape_worker.make_post plus die Felder,
+# die App und Worker später setzen (likes, auto_score, thumb, sources, ...).
+# Titel und Beschreibungen mischen Füllwörter mit echten Keywords aus den
+# Keyword-Dateien, damit das Scoring realistisch viele Treffer hat. Gleicher
+# seed, gleiche Größe -> byte-gleicher Korpus.
+#
+#   python benchmarks/corpus.py --n 10000 --out /tmp/bench_db
+import argparse
+import json
+import os
+import random
+import sys
+from email.utils import formatdate
+from html import escape
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from keyword_model import KEYWORD_FILES, merge_sources  # noqa: E402
+from scrape_worker import make_post  # noqa: E402
+from storage import JsonStorage  # noqa: E402
+
+SIZES = (1_000, 10_000, 100_000)
+SEED = 20240501
+NOW = 1_800_000_000  # fester Zeitpunkt, damit Frische-Boni reproduzierbar sind
+
+CATEGORIES = [*KEYWORD_FILES, "reddit_politics"]
+FILLER = (
+    "der die das und oder aber heute gestern regierung bericht laut experten zahlen woche jahr "
+    "stadt land menschen neue studie zeigt über unter nach vor mehr weniger the a of new report"
+).split()
+USERS = ["anna", "ben", "clara", "david", "eva"]
+
+COMMENTS_PER_POST = 0.3  # im Schnitt
+CHAT_PER_POST = 0.05
+FUNDGRUBE_ITEMS = 50
+
+
+def _vocabulary() -> list[str]:
+    mappings, _ = merge_sources()
+    keywords = sorted({w for m in mappings.values() for w in m})
+    return FILLER * 6 + keywords
+
+
+def make_posts(n: int, seed: int = SEED, sources: int = 120) -> list[dict]:
+    rng = random.Random(seed)
+    words = _vocabulary()
+
+    def text(k: int) -> str:
+        return " ".join(rng.choice(words) for _ in range(k))
+
+    posts = []
+    for i in range(n):
+        category = rng.choice(CATEGORIES)
+        source = f"Quelle {rng.randrange(sources)}"
+        p = make_post(
+            category, source, text(rng.randint(6, 12)).capitalize(), text(rng.randint(15, 60)),
+            f"https://example.org/{category}/{i}", NOW - rng.randrange(14 * 86400),
+        )
+        p["likes"] = rng.choice((0, 0, 0, 1, 2, 5, 12))
+        p["auto_score"] = rng.randint(-200, 3000)
+        if i % 3 == 0:
+            p["thumb"] = f"https://example.org/img/{i}.jpg"
+        if i % 25 == 0:
+            p["sources"] = [source, f"Quelle {rng.randrange(sources)}"]
+        posts.append(p)
+    return posts
+
+
+def make_db(n: int, seed: int = SEED) -> dict:
+    """Ganzes newsdb-Dokument mit n Posts, Kommentaren, Chat und Fundgrube."""
+    rng = random.Random(seed + 1)
+    posts = make_posts(n, seed)
+    comments = [{
+        "post_id": rng.choice(posts)["id"],
+        "author": rng.choice(USERS),
+        "text": " ".join(rng.choice(FILLER) for _ in range(rng.randint(3, 25))),
+        "created_at": NOW - rng.randrange(14 * 86400),
+    } for _ in range(int(n * COMMENTS_PER_POST))]
+    comments.sort(key=lambda c: c["created_at"])
+    chat = [{
+        "author": rng.choice(USERS),
+        "text": " ".join(rng.choice(FILLER) for _ in range(rng.randint(2, 15))),
+        "created_at": NOW - rng.randrange(14 * 86400),
+    } for _ in range(int(n * CHAT_PER_POST))]
+    chat.sort(key=lambda m: m["created_at"])
+    fundgrube = [{
+        "title": f"Fundstück {i}",
+        "url": f"https://example.org/fund/{i}",
+        "image": None,
+        "created_at": NOW - i * 3600,
+        "author": rng.choice(USERS),
+    } for i in range(FUNDGRUBE_ITEMS)]
+    return {"posts": posts, "comments": comments, "lists": {"fundgrube": fundgrube}, "chat": chat}
+
+
+def write_db(db: dict, directory: str) -> str:
+    """Legt den Korpus wie im Betrieb an (newsdb.json + newsdb_log/) und gibt den Pfad zu newsdb.json zurück."""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, "newsdb.json")
+    JsonStorage(path).save(db)
+    return path
+
+
+def rss_feed(entries: int = 50, seed: int = SEED) -> bytes:
+    """RSS 2.0 mit HTML in den Beschreibungen, wie ihn die Feeds in scrape_worker liefern."""
+    rng = random.Random(seed + 2)
+    words = _vocabulary()
+    items = []
+    for i in range(entries):
+        title = " ".join(rng.choice(words) for _ in range(rng.randint(6, 12))).capitalize()
+        body = " ".join(rng.choice(words) for _ in range(rng.randint(20, 60)))
+        desc = f'<p><img src="https://example.org/img/{i}.jpg" /> {body} <a href="#">mehr</a></p>'
+        if i % 10 == 0:  # eingebettete Tracker, wie sie manche Feeds mitschicken
+            desc += '<script type="text/javascript">track("feed");</script><style>p { margin: 0 }</style>'
+        items.append(
+            f"<item><title>{escape(title)}</title>"
+            f"<link>https://example.org/feed/{i}</link>"
+            f"<description>{escape(desc)}</description>"
+            f"<pubDate>{formatdate(NOW - i * 600)}</pubDate></item>"
+        )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+        "<title>Benchmark-Feed</title><link>https://example.org/</link>"
+        f"{''.join(items)}</channel></rss>"
+    ).encode("utf-8")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=10_000, help="Anzahl Posts")
+    ap.add_argument("--out", required=True, help="Zielverzeichnis (newsdb.json + newsdb_log/)")
+    ap.add_argument("--seed", type=int, default=SEED)
+    args = ap.parse_args()
+
+    db = make_db(args.n, args.seed)
+    path = write_db(db, args.out)
+    print(json.dumps({"path": path, "posts": len(db["posts"]), "comments": len(db["comments"]),
+                      "chat": len(db["chat"]), "bytes": os.path.getsize(path)}))
+
+
+if __name__ == "__main__":
+    main()
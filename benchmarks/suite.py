@@ -0,0 +1,384 @@
+# suite.py Reproducible benchmark suite: scraping, scoring, selection, storage and API endpoints, with JSON baselines.
+#
+# Läuft auf synthetischen Korpora (corpus.py) mit 1k, 10k und 100k Posts in
+# einem temporären Verzeichnis – newsdb.json im Projekt bleibt unberührt.
+# Pro Benchmark zählt der schnellste Lauf; schnelle Benchmarks laufen
+# wiederholt, bis etwa BUDGET_SECONDS verbraucht sind.
+#
+#   python benchmarks/suite.py run --out /tmp/now.json     # messen (und speichern)
+#   python benchmarks/suite.py run --save                  # als neue Baseline speichern
+#   python benchmarks/suite.py compare baseline.json /tmp/now.json
+#   python benchmarks/suite.py check                       # messen + mit Baseline vergleichen
+#
+# compare/check enden mit Exit-Code 1, wenn ein Benchmark um mehr als
+# --threshold (Standard 25 %) langsamer ist als in der Baseline. Baselines
+# sind maschinenabhängig: nach einem Rechnerwechsel neu speichern. Die
+# Suite startet sich mit festem PYTHONHASHSEED neu, damit Läufe vergleichbar sind.
+import argparse
+import copy
+import gc
+import json
+import os
+import platform
+import re
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from urllib.parse import quote
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import corpus  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+REPEAT = 3        # mindestens so viele Läufe, außer ein Lauf dauert länger als das Budget
+MAX_RUNS = 200
+BUDGET_SECONDS = 1.0
+THRESHOLD = 0.25
+# Fester Hash-Seed: mit zufälligem schwanken dict/set-lastige Benchmarks von Lauf zu Lauf um bis zu 50 %
+HASH_SEED = "0"
+NOISE_FLOOR_MS = 0.05  # kleinere Unterschiede sind Messrauschen, auch wenn sie prozentual groß sind
+
+FRESH_POSTS = 500  # Posts pro simuliertem Scrape-Lauf, die Hälfte davon schon bekannt
+SAMPLE_POSTS = 1000  # Stichprobe für die Pro-Post-Funktionen
+
+
+# ----------------------------
+# Messen
+# ----------------------------
+
+def measure(fn, setup=None, repeat: int = REPEAT, budget: float = BUDGET_SECONDS) -> dict:
+    """
+    Führt fn(setup()) (bzw. fn()) wiederholt aus: mindestens repeat-mal und
+    weiter, solange budget Sekunden nicht verbraucht sind (schnelle
+    Benchmarks laufen so oft genug für ein stabiles Minimum); ist schon
+    ein Lauf länger als budget, bleibt es bei einem. setup läuft außerhalb
+    der Messung (frische Kopien für Funktionen, die ihre Eingabe ändern).
+    """
+    times = []
+    started = time.perf_counter()
+    while len(times) < MAX_RUNS:
+        arg = setup() if setup is not None else None
+        # wie timeit: ohne Garbage Collector, sonst hängt die Zeit davon ab, was vorher lief
+        gc.collect()
+        gc.disable()
+        try:
+            t0 = time.perf_counter()
+            fn(arg) if setup is not None else fn()
+            times.append(time.perf_counter() - t0)
+        finally:
+            gc.enable()
+        spent = time.perf_counter() - started
+        if spent > budget and (len(times) >= repeat or times[0] > budget):
+            break
+    return {
+        "best_ms": round(min(times) * 1000, 4),
+        "median_ms": round(statistics.median(times) * 1000, 4),
+        "runs": len(times),
+    }
+
+
+# ----------------------------
+# Benchmarks
+# ----------------------------
+
+def fixed_benchmarks() -> dict:
+    """Benchmarks mit fester Eingabegröße – laufen einmal pro Suite, nicht pro Korpus."""
+    import categorize_worker as cw
+    import scrape_worker as sw
+
+    rss = corpus.rss_feed(50)
+    big_rss = corpus.rss_feed(1000)
+    sample = corpus.make_posts(SAMPLE_POSTS, seed=corpus.SEED + 3)
+    descriptions = [f"<p>{p['description']} <b>mehr</b></p>" for p in sample]
+    cw.keyword_model()  # Modell laden/kompilieren, bevor gemessen wird
+
+    def parse_feed(content, cap):
+        return [
+            sw.make_post("austria", "Benchmark", e.title, sw.strip_tags(e.summary), e.link, e.published or 0)
+            for e in sw.feed_entries(content, cap)
+        ]
+
+    def keyword_scores():
+        for p in sample:
+            cw.keyword_score_from_json(p["title"], p["description"], p["auto_category"])
+
+    def classify():
+        for p in sample:
+            cw.classify(p["title"], p["description"], p["auto_category"])
+
+    return {
+        "scrape/parse_feed_50": (lambda: parse_feed(rss, 50), None),
+        "scrape/parse_feed_1000_cap50": (lambda: parse_feed(big_rss, sw.DEFAULT_MAX_PER_FEED), None),
+        "scrape/strip_tags_1k": (lambda: [sw.strip_tags(d) for d in descriptions], None),
+        "score/keyword_score_1k": (keyword_scores, None),
+        "score/classify_1k": (classify, None),
+    }
+
+
+def corpus_benchmarks(db: dict, path: str) -> dict:
+    """Benchmarks über den ganzen Korpus; Name -> (fn, setup)."""
+    import categorize_worker as cw
+    import dedupe
+    import scrape_worker as sw
+    from selection import DiversitySelector
+    from storage import JsonStorage
+
+    posts = db["posts"]
+    store = JsonStorage(path)
+    store.load()
+    known = posts[:FRESH_POSTS // 2]
+    fresh = [dict(p, title=p["title"] + " (aktualisiert)") for p in known] + [
+        dict(p, id=p["id"] + "/neu", url=p["url"] + "/neu") for p in posts[-(FRESH_POSTS // 2):]
+    ]
+    by_score = sorted(posts, key=lambda p: p.get("auto_score", 0), reverse=True)
+
+    def merge_setup():
+        return copy.deepcopy(posts), copy.deepcopy(fresh)
+
+    # wie im laufenden Prozess: der Index kennt den Bestand schon vom letzten Lauf
+    index = dedupe.DedupeIndex()
+    index.sync(posts)
+
+    return {
+        "scrape/merge_posts": (lambda a: sw.merge_posts(a[0], a[1], now=corpus.NOW), merge_setup),
+        "scrape/merge_posts_indexed": (lambda a: sw.merge_posts(a[0], a[1], now=corpus.NOW, index=index),
+                                       merge_setup),
+        "scrape/dedupe_collapse": (lambda a: dedupe.collapse(a), lambda: [dict(p) for p in posts]),
+        "score/score_posts": (lambda a: cw.score_posts(a, now=corpus.NOW, workers=1),
+                              lambda: [dict(p) for p in posts]),
+        "select/diversity_selector": (lambda: DiversitySelector(per_source=cw.MAX_PER_SOURCE).extend(posts).grouped(),
+                                      None),
+        "select/pick_per_source": (lambda: cw.pick_per_source(by_score), None),
+        "storage/load_db_cold": (lambda: JsonStorage(path).load(), None),
+        "storage/load_db": (store.load, None),
+        "storage/save_db": (store.save, lambda: store.load()),
+        "storage/page_posts": (lambda: store.page_posts(None, 50), None),
+    }
+
+
+def api_benchmarks(path: str) -> dict:
+    """Flask-Test-Client gegen den Korpus; Name -> (fn, setup)."""
+    import app as app_module
+    import storage
+    from storage import JsonStorage
+
+    storage._storage = JsonStorage(path)
+    client = app_module.app.test_client()
+    with client.session_transaction() as session:
+        session["user"] = "benchmark"
+
+    def get(url, headers=None, status=200):
+        res = client.get(url, headers=headers or {})
+        body = res.get_data()  # auch gestreamte Antworten vollständig lesen
+        if res.status_code != status:
+            raise RuntimeError(f"GET {url}: {res.status_code}")
+        return res, body
+
+    def post(url, data):
+        res = client.post(url, json=data)
+        if res.status_code != 200:
+            raise RuntimeError(f"POST {url}: {res.status_code}")
+
+    first, _ = get("/api/posts")
+    post_id = first.get_json()[0]["id"]
+    etag = first.headers["ETag"]
+
+    def pages(n: int = 5):
+        cursor = ""
+        for _ in range(n):
+            res, _ = get(f"/api/posts?limit=50{cursor}")
+            cursor = f"&cursor={res.headers.get('X-Next-Cursor', '')}"
+
+    return {
+        "api/posts": (lambda: get("/api/posts"), None),
+        "api/posts_gzip": (lambda: get("/api/posts", {"Accept-Encoding": "gzip"}), None),
+        "api/posts_304": (lambda: get("/api/posts", {"If-None-Match": etag}, status=304), None),
+        "api/posts_category": (lambda: get("/api/posts?category=austria"), None),
+        "api/posts_per_source": (lambda: get("/api/posts?per_source=1"), None),
+        "api/posts_5_pages": (pages, None),
+        "api/comments": (lambda: get(f"/api/comments?post_id={quote(post_id, safe='')}"), None),
+        "api/chat": (lambda: get("/api/chat"), None),
+        "api/lists": (lambda: get("/api/lists"), None),
+        "api/newsdb": (lambda: get("/api/newsdb", {"Accept-Encoding": "gzip"}), None),
+        "api/like": (lambda: post(f"/api/posts/{post_id}/like", {}), None),
+        "api/comment_add": (lambda: post("/api/comments", {"post_id": post_id, "text": "Benchmark"}), None),
+        "api/chat_add": (lambda: post("/api/chat", {"text": "Benchmark"}), None),
+    }
+
+
+def _close_api() -> None:
+    import app as app_module
+    import storage
+
+    app_module.like_buffer.flush()
+    storage._storage = None
+
+
+def run_suite(sizes, only: str | None = None, repeat: int = REPEAT) -> dict:
+    pattern = re.compile(only) if only else None
+    results: dict[str, dict] = {}
+
+    def run(name: str, fn, setup) -> None:
+        if pattern is not None and not pattern.search(name):
+            return
+        results[name] = r = measure(fn, setup, repeat)
+        print(f"  {name:40s} {r['best_ms']:10.3f} ms  (Median {r['median_ms']:.3f}, {r['runs']}x)", flush=True)
+
+    print("Feste Eingaben:")
+    for name, (fn, setup) in fixed_benchmarks().items():
+        run(name, fn, setup)
+
+    for size in sizes:
+        db = corpus.make_db(size)
+        with tempfile.TemporaryDirectory(prefix="aggrepage_bench_") as tmp:
+            path = corpus.write_db(db, tmp)
+            print(f"Korpus {size} Posts ({os.path.getsize(path) / 1e6:.1f} MB, "
+                  f"{len(db['comments'])} Kommentare, {len(db['chat'])} Chat):")
+            for name, (fn, setup) in corpus_benchmarks(db, path).items():
+                run(f"{name}@{size}", fn, setup)
+            try:
+                for name, (fn, setup) in api_benchmarks(path).items():
+                    run(f"{name}@{size}", fn, setup)
+            finally:
+                _close_api()
+    return results
+
+
+def meta(sizes) -> dict:
+    """Womit gemessen wurde – Baselines sind nur auf derselben Maschine vergleichbar."""
+    try:
+        import numpy
+        numpy_version = numpy.__version__
+    except ImportError:
+        numpy_version = None
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+        "numpy": numpy_version,
+        "hash_seed": os.environ.get("PYTHONHASHSEED"),
+        "sizes": list(sizes),
+    }
+
+
+# ----------------------------
+# Vergleichen
+# ----------------------------
+
+def _slower(old: float, new: float, threshold: float) -> bool:
+    return new > old * (1 + threshold) and new - old > NOISE_FLOOR_MS
+
+
+def regressions(baseline: dict, current: dict, threshold: float = THRESHOLD) -> list[str]:
+    base, cur = baseline["results"], current["results"]
+    return sorted(name for name in base.keys() & cur.keys()
+                  if _slower(base[name]["best_ms"], cur[name]["best_ms"], threshold))
+
+
+def compare(baseline: dict, current: dict, threshold: float = THRESHOLD) -> list[str]:
+    """Druckt den Vergleich und gibt die Namen der Regressionen zurück."""
+    base, cur = baseline["results"], current["results"]
+    for key in ("python", "numpy", "cpus", "processor", "platform"):
+        if baseline["meta"].get(key) != current["meta"].get(key):
+            print(f"Achtung: {key} unterscheidet sich ({baseline['meta'].get(key)} -> {current['meta'].get(key)})")
+
+    slower = []
+    print(f"{'Benchmark':40s} {'Baseline':>11s} {'jetzt':>11s} {'Änderung':>9s}")
+    for name in sorted(base.keys() & cur.keys()):
+        old, new = base[name]["best_ms"], cur[name]["best_ms"]
+        change = new / old - 1 if old else 0.0
+        flag = ""
+        if _slower(old, new, threshold):
+            slower.append(name)
+            flag = "  <-- langsamer"
+        elif _slower(new, old, threshold):
+            flag = "  schneller"
+        print(f"{name:40s} {old:9.3f}ms {new:9.3f}ms {change * 100:+8.1f}%{flag}")
+    for name in sorted(base.keys() - cur.keys()):
+        print(f"{name:40s} fehlt in der aktuellen Messung")
+    for name in sorted(cur.keys() - base.keys()):
+        print(f"{name:40s} neu (keine Baseline)")
+    if slower:
+        print(f"{len(slower)} Regression(en) über {threshold * 100:.0f} %: {', '.join(slower)}")
+    else:
+        print(f"Keine Regression über {threshold * 100:.0f} %.")
+    return slower
+
+
+def _load(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save(path: str, data: dict) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write("\n")
+    print(f"Gespeichert: {path}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark-Suite für Scraping, Scoring, Auswahl, Storage und API")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    def add_run_args(p):
+        p.add_argument("--sizes", default=",".join(map(str, corpus.SIZES)),
+                       help="Korpusgrößen, kommagetrennt")
+        p.add_argument("--only", help="nur Benchmarks, deren Name auf diesen regulären Ausdruck passt")
+        p.add_argument("--repeat", type=int, default=REPEAT, help="mindestens so viele Wiederholungen")
+
+    run_p = sub.add_parser("run", help="messen")
+    add_run_args(run_p)
+    run_p.add_argument("--out", help="Ergebnis als JSON speichern")
+    run_p.add_argument("--save", action="store_true", help=f"als Baseline speichern ({BASELINE_PATH})")
+
+    cmp_p = sub.add_parser("compare", help="zwei gespeicherte Ergebnisse vergleichen")
+    cmp_p.add_argument("baseline")
+    cmp_p.add_argument("current")
+    cmp_p.add_argument("--threshold", type=float, default=THRESHOLD, help="erlaubte Verlangsamung (0.25 = 25 %%)")
+
+    check_p = sub.add_parser("check", help="messen und mit der Baseline vergleichen")
+    add_run_args(check_p)
+    check_p.add_argument("--baseline", default=BASELINE_PATH)
+    check_p.add_argument("--threshold", type=float, default=THRESHOLD, help="erlaubte Verlangsamung (0.25 = 25 %%)")
+    check_p.set_defaults(sizes=None)
+
+    args = ap.parse_args()
+    if args.cmd != "compare" and os.environ.get("PYTHONHASHSEED") != HASH_SEED:
+        # Der Seed wirkt nur beim Start des Interpreters: mit gesetztem Seed neu starten
+        os.environ["PYTHONHASHSEED"] = HASH_SEED
+        os.execv(sys.executable, [sys.executable, *sys.argv])
+    if args.cmd == "compare":
+        sys.exit(1 if compare(_load(args.baseline), _load(args.current), args.threshold) else 0)
+
+    baseline = _load(args.baseline) if args.cmd == "check" else None
+    if args.sizes:
+        sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    else:  # check ohne --sizes: dieselben Größen wie die Baseline
+        sizes = baseline["meta"]["sizes"]
+    data = {"meta": meta(sizes), "results": run_suite(sizes, args.only, args.repeat)}
+
+    if args.cmd == "check":
+        suspects = regressions(baseline, data, args.threshold)
+        if suspects:
+            # Ausreißer (anderer Prozess, Takt) von echten Regressionen trennen: einmal nachmessen
+            print(f"Messe {len(suspects)} auffällige(n) Benchmark(s) nach …")
+            only = "^(" + "|".join(re.escape(name) for name in suspects) + ")$"
+            sizes = sorted({int(name.rsplit("@", 1)[1]) for name in suspects if "@" in name})
+            for name, r in run_suite(sizes, only, args.repeat).items():
+                if r["best_ms"] < data["results"][name]["best_ms"]:
+                    data["results"][name] = r
+        sys.exit(1 if compare(baseline, data, args.threshold) else 0)
+    if args.out:
+        _save(args.out, data)
+    if args.save:
+        _save(BASELINE_PATH, data)
+
+
+if __name__ == "__main__":
+    main()
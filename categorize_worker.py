@@ -1,85 +1,64 @@
 # categorize_worker.py This programm scores and categorizes articles based on keywords.
-import json
+import multiprocessing
 import os
-import time
+import threading
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from collections import defaultdict
+from itertools import repeat
+
+try:
+    import numpy as np
+except ImportError:  # Batch-Scoring fällt dann auf reines Python zurück
+    np = None
+
+import metrics
+from keyword_model import KEYWORD_FILES, CompiledKeywords, KeywordModel
+from persist import VersionConflict
+from progress import get_reporter
+from selection import DiversitySelector
+from storage import get_storage
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-NEWSDB_PATH = os.path.join(BASE_DIR, "newsdb.json")
-STATUS_PATH = os.path.join(BASE_DIR, "reload_status.json")
-
-MAX_PER_RUN = 5000
-
-
-def load_newsdb() -> dict:
-    if not os.path.exists(NEWSDB_PATH):
-        data = {
-            "posts": [],
-            "comments": [],
-            "lists": {"fundgrube": []},
-        }
-        with open(NEWSDB_PATH, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-        return data
-    with open(NEWSDB_PATH, "r", encoding="utf-8") as f:
-        content = f.read().strip()
-    if not content:
-        return {
-            "posts": [],
-            "comments": [],
-            "lists": {"fundgrube": []},
-        }
+
+
+def _available_cpus() -> int:
     try:
-        return json.loads(content)
-    except json.JSONDecodeError:
-        return {
-            "posts": [],
-            "comments": [],
-            "lists": {"fundgrube": []},
-        }
-
-
-def save_newsdb(data: dict) -> None:
-    if "lists" not in data:
-        data["lists"] = {"fundgrube": []}
-    if "comments" not in data:
-        data["comments"] = []
-    with open(NEWSDB_PATH, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False)
-
-
-def save_status(step, percent, error=None, current_title=None):
-    data = {
-        "step": step,
-        "percent": percent,
-        "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "error": error,
-        "current_title": current_title,
-    }
-    with open(STATUS_PATH, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False)
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # nicht unter Windows/macOS
+        return os.cpu_count() or 1
+
+
+# Keyword-Scoring auf mehrere Prozesse verteilen; 1 = alles im eigenen Prozess
+SCORE_WORKERS = int(os.environ.get("AGGREPAGE_SCORE_WORKERS", "0")) or _available_cpus()
+PARALLEL_MIN_POSTS = 5000  # darunter lohnt der Start der Prozesse nicht
+PARALLEL_CHUNK = 2000      # Posts pro Auftrag an einen Worker-Prozess
+
+# Klassifikator-Modus: auto_category aus dem Text statt aus der Feed-Liste
+# (AGGREPAGE_CLASSIFY=1 oder python categorize_worker.py --classify)
+CLASSIFY = os.environ.get("AGGREPAGE_CLASSIFY", "0") == "1"
+CLASSIFY_CATEGORIES = tuple(KEYWORD_FILES)  # die Kategorien der Feed-Listen
+CLASSIFY_MIN_CONFIDENCE = 0.5  # darunter bleibt die Feed-Kategorie
+
+MAX_PER_SOURCE = 3  # harte Obergrenze: Artikel pro Quelle und Kategorie
 
 
 # ----------------------------
-# Keyword-JSON laden
+# Keyword-Modell
 # ----------------------------
 
-def load_keyword_file(filename: str) -> dict[str, float]:
-    path = os.path.join(BASE_DIR, filename)
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            return {str(k).lower(): float(v) for k, v in data.items()}
-    except Exception:
-        print(f"Warnung: Konnte Keyword-Datei {filename} nicht laden oder parsen.")
-        return {}
+# Keyword-Dateien + word_ratings.json, kompiliert nach keywords.model (siehe
+# keyword_model.py); ändern sich die Dateien, gilt das neue Modell ohne Neustart
+KEYWORD_MODEL = KeywordModel(BASE_DIR)
+
 
+def keyword_model() -> CompiledKeywords:
+    return KEYWORD_MODEL.current()
 
-KEYWORDS_AT = load_keyword_file("keywords_austria.json")
-KEYWORDS_INT = load_keyword_file("keywords_international.json")
-KEYWORDS_GOOD = load_keyword_file("keywords_good_news.json")
-KEYWORDS_INV = load_keyword_file("keywords_investigativ.json")
+
+def _keyword_text(title: str, desc: str) -> str:
+    return unicodedata.normalize("NFC", f"{title} {desc}").lower()
 
 
 def keyword_score_from_json(title: str, desc: str, category: str) -> int:
@@ -87,128 +66,349 @@ def keyword_score_from_json(title: str, desc: str, category: str) -> int:
     Nutzt deine JSON-Keywords pro Kategorie.
     Score = Summe(weight * 100) für jedes Keyword, das im Text vorkommt.
     """
-    text = f"{title} {desc}".lower()
+    matcher = keyword_model().matchers.get(category)
+    if matcher is None:
+        return 0
+    return matcher.score(_keyword_text(title, desc))
 
-    if category == "austria":
-        mapping = KEYWORDS_AT
-    elif category == "international":
-        mapping = KEYWORDS_INT
-    elif category == "good_news":
-        mapping = KEYWORDS_GOOD
-    elif category == "investigativ":
-        mapping = KEYWORDS_INV
-    else:
-        mapping = {}
 
-    score = 0.0
-    for word, weight in mapping.items():
-        if word in text:
-            score += weight * 100.0
-    return int(score)
+def keyword_scores(title: str, desc: str) -> dict[str, int]:
+    """keyword_score_from_json für alle Kategorien auf einmal, mit einem Durchlauf über den Text."""
+    return keyword_model().scores(_keyword_text(title, desc))
+
+
+def classify(title: str, desc: str, fallback: str | None = None) -> tuple[str | None, float, dict[str, int]]:
+    """
+    Wählt unter CLASSIFY_CATEGORIES die Kategorie mit dem höchsten
+    Keyword-Score. confidence ist ihr Anteil an der Summe der positiven
+    Scores (1.0 = nur diese Kategorie trifft). Bei Gleichstand gewinnt
+    fallback, sonst die erste in CLASSIFY_CATEGORIES. Ohne Treffer:
+    (fallback, 0.0, scores). Gibt (Kategorie, confidence, scores) zurück.
+    """
+    scores = keyword_scores(title, desc)
+    total = sum(scores[c] for c in CLASSIFY_CATEGORIES if scores.get(c, 0) > 0)
+    if total <= 0:
+        return fallback, 0.0, scores
+    best = max(CLASSIFY_CATEGORIES, key=lambda c: scores.get(c, 0))
+    if fallback in CLASSIFY_CATEGORIES and scores.get(fallback, 0) == scores[best]:
+        best = fallback
+    return best, scores[best] / total, scores
 
 
-def compute_points(title: str, desc: str, url: str, likes: int, category: str, created_at: int) -> int:
+def classify_post(post: dict) -> int:
+    """
+    Klassifikator-Modus für einen Post: setzt auto_category auf die
+    erkannte Kategorie, wenn confidence >= CLASSIFY_MIN_CONFIDENCE, sonst
+    auf die Kategorie der Feed-Liste (in feed_category festgehalten).
+    Schreibt category_confidence und gibt den Keyword-Score der gewählten
+    Kategorie zurück. Posts aus Feed-Listen ohne Keywords (reddit_politics)
+    behalten ihre Kategorie.
+    """
+    feed_category = post.get("feed_category") or post.get("auto_category") or "international"
+    if feed_category not in CLASSIFY_CATEGORIES:
+        return keyword_score_from_json(post.get("title", "") or "", post.get("description", "") or "", feed_category)
+    best, confidence, scores = classify(
+        post.get("title", "") or "", post.get("description", "") or "", feed_category,
+    )
+    category = best if confidence >= CLASSIFY_MIN_CONFIDENCE else feed_category
+    if category != best:
+        positive = sum(scores[c] for c in CLASSIFY_CATEGORIES if scores.get(c, 0) > 0)
+        confidence = max(0, scores.get(category, 0)) / positive if positive else 0.0
+    post["feed_category"] = feed_category
+    post["auto_category"] = category
+    post["category_confidence"] = round(confidence, 3)
+    return scores.get(category, 0)
+
+
+def likes_and_freshness(likes: int, created_at: int, now: float | None = None) -> int:
+    """Der Teil von compute_points, der sich mit Likes und Alter ändert – ohne Keywords."""
     # Basis: Likes (inkl. Reddit-Ups + User-Likes)
     score = max(0, int(likes)) * 100
 
-    # Themen-Boost über JSON-Keywords
-    score += keyword_score_from_json(title, desc, category)
-
     # Frische-Bonus
     if created_at:
-        age_hours = max(0, (datetime.now().timestamp() - created_at) / 3600.0)
+        if now is None:
+            now = datetime.now().timestamp()
+        age_hours = max(0, (now - created_at) / 3600.0)
         freshness = max(0, 200 - int(age_hours * 10))  # nach ~20h ist der Bonus weg
         score += freshness
 
     return score
 
 
+def compute_points(title: str, desc: str, url: str, likes: int, category: str, created_at: int,
+                   now: float | None = None) -> int:
+    # Likes + Frische, dazu der Themen-Boost über JSON-Keywords
+    return likes_and_freshness(likes, created_at, now) + keyword_score_from_json(title, desc, category)
+
+
+# ----------------------------
+# Batch-Scoring
+# ----------------------------
+
+SCORE_CHUNK = 500  # Fortschritt wird pro Block gemeldet, nicht pro Artikel
+
+_CLASSIFY_FIELDS = ("auto_category", "feed_category", "category_confidence")
+
+
+def _keyword_item(post: dict) -> tuple:
+    """Was das Keyword-Scoring von einem Post braucht – klein genug für den Versand an Worker."""
+    return (
+        post.get("title", "") or "",
+        post.get("description", "") or "",
+        post.get("auto_category") or "international",
+        post.get("feed_category"),
+    )
+
+
+def _score_items(items: list[tuple], reclassify: bool) -> list:
+    """
+    Keyword-Anteil für eine Liste von _keyword_item-Tupeln: pro Post der
+    Score, mit reclassify (Score, {Klassifikator-Felder}). Läuft im
+    eigenen Prozess wie in den Worker-Prozessen.
+    """
+    out = []
+    for title, desc, category, feed_category in items:
+        if not reclassify:
+            out.append(keyword_score_from_json(title, desc, category))
+            continue
+        post = {"title": title, "description": desc, "auto_category": category}
+        if feed_category:
+            post["feed_category"] = feed_category
+        kw = classify_post(post)
+        out.append((kw, {k: post[k] for k in _CLASSIFY_FIELDS if k in post}))
+    return out
+
+
+def _init_worker() -> None:
+    # fork: Modell ist schon da (copy-on-write vom Elternprozess); sonst aus keywords.model laden
+    keyword_model()
+
+
+def _pool_context():
+    """
+    fork nur, solange dieser Prozess keine weiteren Threads hat (python
+    categorize_worker.py). In der App laufen JobRunner, Request-Threads und
+    Like-Flusher mit – ein fork dort kann Locks im Kind gesperrt erben,
+    also forkserver bzw. spawn.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    if "fork" in methods and threading.active_count() == 1:
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def _keyword_scores_parallel(items: list[tuple], reclassify: bool, workers: int, progress=None,
+                             titles=None) -> list:
+    """
+    _score_items über einen Prozess-Pool, in Blöcken von PARALLEL_CHUNK.
+    Die Worker bekommen nur die Text-Tupel; die kompilierten Keyword-
+    Tabellen erben sie per fork copy-on-write (unter forkserver/spawn lädt
+    jeder Worker keywords.model, ein paar ms). Ergebnisse kommen in
+    Eingabereihenfolge zurück.
+    """
+    keyword_model()  # vor dem fork laden, damit die Worker es erben
+    chunks = [items[i:i + PARALLEL_CHUNK] for i in range(0, len(items), PARALLEL_CHUNK)]
+    out: list = []
+    with ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context(),
+                             initializer=_init_worker) as pool:
+        for result in pool.map(_score_items, chunks, repeat(reclassify)):
+            out.extend(result)
+            if progress is not None:
+                progress(len(out), len(items), titles(len(out) - 1) if titles else "")
+    return out
+
+
+def score_posts(posts: list[dict], now: float | None = None, progress=None,
+                reclassify: bool = False, workers: int | None = None) -> list[int]:
+    """
+    Batch-Variante von compute_points für eine ganze Post-Liste.
+    Ein Zeitstempel für alle Posts; Likes- und Frische-Anteil werden als
+    NumPy-Arrays berechnet, nur der Keyword-Anteil läuft pro Post durch den
+    Matcher – ab PARALLEL_MIN_POSTS verteilt auf workers Prozesse
+    (Standard SCORE_WORKERS), mit denselben Ergebnissen.
+    Schreibt auto_score in die Posts zurück und gibt die Scores zurück.
+    Mit reclassify wird jeder Post zugleich klassifiziert (classify_post) –
+    derselbe eine Durchlauf über den Text liefert Kategorie und Score.
+    progress(done, total, title) wird nach jedem Block aufgerufen.
+    """
+    if now is None:
+        now = datetime.now().timestamp()
+    total = len(posts)
+    workers = SCORE_WORKERS if workers is None else workers
+    items = [_keyword_item(p) for p in posts]
+
+    if workers > 1 and total >= PARALLEL_MIN_POSTS:
+        results = _keyword_scores_parallel(
+            items, reclassify, workers, progress,
+            titles=lambda i: (posts[i].get("title", "") or "")[:80],
+        )
+    else:
+        results = []
+        for start in range(0, total, SCORE_CHUNK):
+            results.extend(_score_items(items[start:start + SCORE_CHUNK], reclassify))
+            if progress is not None:
+                progress(len(results), total, (posts[len(results) - 1].get("title", "") or "")[:80])
+
+    if reclassify:
+        kw_scores = []
+        for post, (kw, fields) in zip(posts, results):
+            post.update(fields)
+            kw_scores.append(kw)
+    else:
+        kw_scores = results
+
+    likes = [int(p.get("likes") or 0) for p in posts]
+    created = [int(p.get("created_at") or 0) for p in posts]
+
+    if np is not None:
+        likes_a = np.maximum(0, np.array(likes, dtype=np.int64)) * 100
+        created_a = np.array(created, dtype=np.int64)
+        age_hours = np.maximum(0, (now - created_a) / 3600.0)
+        freshness = np.maximum(0, 200 - np.trunc(age_hours * 10).astype(np.int64))
+        freshness[created_a == 0] = 0
+        scores = (likes_a + np.array(kw_scores, dtype=np.int64) + freshness).tolist()
+    else:
+        scores = []
+        for lk, kw, ts in zip(likes, kw_scores, created):
+            score = max(0, lk) * 100 + kw
+            if ts:
+                age_hours = max(0, (now - ts) / 3600.0)
+                score += max(0, 200 - int(age_hours * 10))
+            scores.append(score)
+
+    for post, score in zip(posts, scores):
+        post["auto_score"] = int(score)
+    return scores
+
+
 # ----------------------------
 # Harte Obergrenze: max. 3 Artikel pro Quelle
 # ----------------------------
 
-def pick_per_source(posts: list[dict], max_per_source: int = 3) -> list[dict]:
+def pick_per_source(posts: list[dict], max_per_source: int = MAX_PER_SOURCE) -> list[dict]:
     """
     Harte Obergrenze: max_per_source Artikel pro Quelle und Kategorie.
     Wenn eine Quelle weniger Artikel hat, werden alle genommen.
+    Ergebnis nach Score sortiert, bei gleichem Score Quellen in der
+    Reihenfolge ihres ersten Auftretens in posts, innerhalb einer Quelle
+    in Eingabereihenfolge – wie bisher, auch für unsortierte Eingaben.
     """
-    by_source = defaultdict(list)
-    for p in posts:
-        src = p.get("source") or "unknown"
-        by_source[src].append(p)
+    selected = DiversitySelector(per_source=max_per_source, by_category=False).extend(posts).ranked()
+    first_seen: dict[str, int] = {}
+    position: dict[int, int] = {}
+    for i, p in enumerate(posts):
+        first_seen.setdefault(p.get("source") or "unknown", i)
+        position[id(p)] = i
+    selected.sort(key=lambda p: (-(p.get("auto_score", 0) or 0), first_seen[p.get("source") or "unknown"],
+                                 position[id(p)]))
+    return selected
 
-    selected = []
-    for src, lst in by_source.items():
-        lst_sorted = sorted(lst, key=lambda x: x.get("auto_score", 0), reverse=True)
-        chosen = lst_sorted[:max_per_source]  # HIER harte Obergrenze
-        selected.extend(chosen)
 
-    selected.sort(key=lambda p: p.get("auto_score", 0), reverse=True)
-    return selected
+def merge_concurrent(final_posts: list[dict], base_likes: dict[str, int], current: list[dict]) -> list[dict]:
+    """
+    Gleicht das Ergebnis der Bewertung mit dem an, was währenddessen
+    gespeichert wurde: neue Likes werden samt Score übernommen, inzwischen
+    gelöschte Posts fallen weg, neu hinzugekommene Posts bleiben (unbewertet)
+    erhalten. base_likes sind die Likes zum Zeitpunkt des Lesens.
+    """
+    by_id = {}
+    for p in current:
+        by_id.setdefault(p.get("id"), p)
+
+    merged = []
+    for p in final_posts:
+        cur = by_id.get(p.get("id"))
+        if cur is None:
+            continue
+        old = int(p.get("likes") or 0)
+        new = old + int(cur.get("likes") or 0) - base_likes.get(p.get("id"), 0)
+        if new != old:
+            p = dict(p, likes=new)
+            p["auto_score"] = int(p.get("auto_score") or 0) + (max(0, new) - max(0, old)) * 100
+        merged.append(p)
+    merged.extend(p for p in current if p.get("id") not in base_likes)
+    return merged
 
 
 # ----------------------------
 # main
 # ----------------------------
 
-def main():
-    db = load_newsdb()
-    posts = db.get("posts", [])
+def main(reclassify: bool = CLASSIFY):
+    with metrics.worker_run("categorize") as run:
+        _categorize(run, reclassify)
+
+
+def _categorize(run: metrics.WorkerRun, reclassify: bool) -> None:
+    store = get_storage()
+    reporter = get_reporter()
+    with run.phase("load"):
+        version = store.version()
+        posts = store.list_posts()
+    base_likes = {p.get("id"): int(p.get("likes") or 0) for p in reversed(posts)}
 
     if not posts:
-        print("Keine Artikel in newsdb.json.")
-        save_status("Keine Artikel gefunden", 100, None, None)
+        print("Keine Artikel in der Datenbank.")
+        reporter.done("Keine Artikel gefunden")
         return
 
     total = len(posts)
     print(f"Bewerte {total} Artikel …")
-    save_status("Bewertung gestartet …", 60, None, None)
+    reporter.update("Bewertung gestartet …", 60)
 
-    for i, post in enumerate(posts[:MAX_PER_RUN]):
-        title = post.get("title", "") or ""
-        desc = post.get("description", "") or ""
-        url = post.get("url", "") or ""
-        likes = int(post.get("likes") or 0)
-        category = post.get("auto_category") or "international"
-        created_at = int(post.get("created_at") or 0)
-
-        score = compute_points(title, desc, url, likes, category, created_at)
-        post["auto_score"] = int(score)
-
-        short_title = title[:80]
-        progress = 60 + int(((i + 1) / max(1, min(total, MAX_PER_RUN))) * 40)
-        if progress >= 100 and i + 1 < total:
+    def report(done, n, short_title):
+        progress = 60 + int((done / max(1, n)) * 40)
+        if progress >= 100 and done < total:
             progress = 99
-        save_status("Bewertung läuft …", progress, None, short_title)
-        time.sleep(0.002)
-
-    # Nach Punkten sortieren (absteigend)
-    posts.sort(key=lambda p: p.get("auto_score", 0), reverse=True)
-
-    # Pro Kategorie harte Obergrenze 3 Artikel pro Quelle
-    by_cat = defaultdict(list)
-    for p in posts:
-        by_cat[p.get("auto_category") or "international"].append(p)
-
-    final_posts = []
-    for cat, plist in by_cat.items():
-        picked = pick_per_source(plist, max_per_source=3)
-
-        # Debug: Kontrolle, dass keine Quelle >3 hat
-        src_counts = defaultdict(int)
-        for p in picked:
-            src_counts[p.get("source") or "unknown"] += 1
-        print(f"Kategorie {cat}: {len(picked)} Artikel nach pick_per_source (max 3 pro Quelle)")
+        reporter.update("Bewertung läuft …", progress, None, short_title)
+
+    with run.phase("score"):
+        score_posts(posts, progress=report, reclassify=reclassify)
+    run.counts["scored"] = total
+    if reclassify:
+        moved = sum(1 for p in posts
+                    if p.get("feed_category") and p.get("auto_category") != p.get("feed_category"))
+        run.counts["moved"] = moved
+        print(f"Klassifikator: {moved} Artikel in eine andere Kategorie als ihre Feed-Liste eingeordnet.")
+
+    # Pro Kategorie harte Obergrenze MAX_PER_SOURCE Artikel pro Quelle – ein Durchlauf, ohne alles zu sortieren
+    with run.phase("select"):
+        final_posts = DiversitySelector(per_source=MAX_PER_SOURCE).extend(posts).grouped()
+        kept = {id(p) for p in final_posts}
+        pruned = [p for p in posts if id(p) not in kept]
+    run.counts["kept"] = len(final_posts)
+    run.counts["pruned"] = len(pruned)
+
+    # Debug: Kontrolle, dass keine Quelle mehr als MAX_PER_SOURCE hat
+    counts = defaultdict(lambda: defaultdict(int))
+    for p in final_posts:
+        counts[p.get("auto_category") or "international"][p.get("source") or "unknown"] += 1
+    for cat, src_counts in counts.items():
+        print(f"Kategorie {cat}: {sum(src_counts.values())} Artikel (max {MAX_PER_SOURCE} pro Quelle)")
         for src, cnt in sorted(src_counts.items()):
             print(f"  {src}: {cnt}")
 
-        final_posts.extend(picked)
-
-    db["posts"] = final_posts
-    save_newsdb(db)
-    save_status("Bewertung abgeschlossen", 100, None, None)
+    with run.phase("save"):
+        try:
+            # aussortierte Posts als pruned merken: sonst übernimmt der nächste Reload sie wieder als neu
+            store.replace_posts(final_posts, expected_version=version, pruned=pruned)
+        except VersionConflict:
+            # Während der Bewertung wurde geschrieben (Likes, Reload, ...): zusammenführen statt überschreiben
+            with store.transaction():
+                final_posts = merge_concurrent(final_posts, base_likes, store.list_posts())
+                store.replace_posts(final_posts, pruned=pruned)
+            run.counts["merged_concurrent"] = True
+            print("Datenbank wurde während der Bewertung geändert – Änderungen übernommen.")
+    reporter.done("Bewertung abgeschlossen")
     print("Fertig, Punkte neu gesetzt, JSON-Keywords genutzt und harte Obergrenze 3 Artikel pro Quelle.")
 
 
 if __name__ == "__main__":
-    main()
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Artikel bewerten (und optional neu kategorisieren)")
+    ap.add_argument("--classify", action="store_true", default=CLASSIFY,
+                    help="Kategorie aus dem Text bestimmen statt aus der Feed-Liste")
+    args = ap.parse_args()
+    main(reclassify=args.classify)
@@ -0,0 +1,409 @@
+# dedupe.py Near-duplicate clustering of posts (same story, different URL) with MinHash signatures and LSH banding.
+import re
+import threading
+import unicodedata
+import zlib
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # Signaturen dann in reinem Python (gleiche Werte, langsamer)
+    np = None
+
+NUM_PERM = 64        # Hashfunktionen pro Signatur
+BANDS = 16           # LSH: 16 Bänder à 4 Zeilen -> Kandidat ab ~50 % Ähnlichkeit
+TITLE_SIMILARITY = 0.6  # geschätzte Jaccard-Ähnlichkeit der Titel-Wörter
+TEXT_SIMILARITY = 0.5   # ... bzw. von Titel + Beschreibung
+# Gleiche Quelle: Serien ("Good News This Week: ...") und Standard-Teaser sehen
+# sich ähnlich, sind aber verschiedene Artikel – hier zählt nur ein fast gleicher Titel
+SAME_SOURCE_TITLE_SIMILARITY = 0.8
+TEXT_MAX_WORDS = 60     # längere Beschreibungen verwässern die Ähnlichkeit nur
+# Vertreter pro LSH-Bucket: ohne Grenze wachsen die Buckets für Serien-Titel
+# einer Quelle ("Good News This Week: ...") mit jedem Post, und jeder neue
+# Post wird mit allen verglichen
+BUCKET_MAX = 32
+SEED = 0x5EED
+
+_ROWS = NUM_PERM // BANDS
+_MASK64 = (1 << 64) - 1
+_WORD_RE = re.compile(r"\w+")
+
+STOPWORDS = frozenset("""
+aber als am an auch auf aus bei bis das dass dem den der des die dies diese ein eine einem einen einer
+es für hat haben ist im in ins mit nach nicht noch nun oder sich sie sind so über um und uns vom von
+vor war wie wird wurde zu zum zur
+a an and are as at be by for from has have in is it its of on or that the this to was were will with
+""".split())
+
+
+def _multipliers():
+    """NUM_PERM Paare (a, b) für Multiply-Shift-Hashing, a ungerade; fest geseedet, also reproduzierbar."""
+    state = SEED
+    out = []
+    for _ in range(NUM_PERM):
+        pair = []
+        for _ in range(2):
+            # splitmix64
+            state = (state + 0x9E3779B97F4A7C15) & _MASK64
+            z = state
+            z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+            z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK64
+            pair.append(z ^ (z >> 31))
+        out.append((pair[0] | 1, pair[1]))
+    return out
+
+
+_PERMS = _multipliers()
+if np is not None:
+    _A = np.array([a for a, _ in _PERMS], dtype=np.uint64)[:, None]
+    _B = np.array([b for _, b in _PERMS], dtype=np.uint64)[:, None]
+
+
+# ----------------------------
+# Text -> Wortmenge -> Signatur
+# ----------------------------
+
+def tokens(text: str) -> list[str]:
+    """Unicode-normalisierte, kleingeschriebene Wörter ohne Stoppwörter und Einzelzeichen."""
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    return [w for w in _WORD_RE.findall(text) if len(w) > 1 and w not in STOPWORDS]
+
+
+def _word_hash(word: str) -> int:
+    return zlib.crc32(word.encode("utf-8"))
+
+
+def signatures(hash_sets: list) -> list[tuple[int, ...] | None]:
+    """
+    MinHash-Signaturen (NUM_PERM Werte à 32 Bit) für Mengen von Wort-Hashes;
+    None für eine leere Menge. Mit numpy in Blöcken über alle Mengen auf einmal.
+    """
+    out: list = [None] * len(hash_sets)
+    todo = [i for i, hs in enumerate(hash_sets) if hs]
+    if np is None:
+        for i in todo:
+            hs = hash_sets[i]
+            out[i] = tuple(min(((a * x + b) & _MASK64) >> 32 for x in hs) for a, b in _PERMS)
+        return out
+    block = 4096
+    for start in range(0, len(todo), block):
+        ids = todo[start:start + block]
+        flat = [x for i in ids for x in hash_sets[i]]
+        offsets = np.cumsum([0] + [len(hash_sets[i]) for i in ids[:-1]])
+        x = np.array(flat, dtype=np.uint64)[None, :]
+        with np.errstate(over="ignore"):
+            h = (_A * x + _B) >> np.uint64(32)
+        mins = np.minimum.reduceat(h, offsets, axis=1).T.tolist()
+        for i, sig in zip(ids, mins):
+            out[i] = tuple(sig)
+    return out
+
+
+def signature(words) -> tuple[int, ...] | None:
+    """MinHash-Signatur einer Wortmenge; None für eine leere Menge."""
+    return signatures([{_word_hash(w) for w in words}])[0]
+
+
+def similarity(sig_a, sig_b) -> float:
+    """Geschätzte Jaccard-Ähnlichkeit: Anteil gleicher Signaturwerte."""
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / NUM_PERM
+
+
+def post_signatures(posts: list[dict]) -> list[tuple]:
+    """(Titel-Signatur, Text-Signatur) pro Post; Text = Titel + Anfang der Beschreibung."""
+    cache: dict[str, int] = {}
+
+    def hashes(words) -> set[int]:
+        out = set()
+        for w in words:
+            h = cache.get(w)
+            if h is None:
+                h = cache[w] = _word_hash(w)
+            out.add(h)
+        return out
+
+    titles, texts = [], []
+    for p in posts:
+        title = hashes(tokens(p.get("title") or ""))
+        titles.append(title)
+        texts.append(title | hashes(tokens(p.get("description") or "")[:TEXT_MAX_WORDS]))
+    return list(zip(signatures(titles), signatures(texts)))
+
+
+# ----------------------------
+# Clustering
+# ----------------------------
+
+def cluster(posts: list[dict]) -> list[list[int]]:
+    """
+    Gruppiert Beinahe-Duplikate, ohne alle Paare zu vergleichen: jede
+    Signatur wird in BANDS Bänder zerlegt, nur Posts mit einem gleichen
+    Band werden verglichen (geschätzte Ähnlichkeit von Titel ODER Titel +
+    Beschreibung über der Schwelle, bei gleicher Quelle nur der Titel mit
+    SAME_SOURCE_TITLE_SIMILARITY). Ein Bucket merkt sich nur einen
+    Vertreter pro Cluster und höchstens BUCKET_MAX, der Aufwand bleibt
+    also linear in der Anzahl Posts. Gibt die Cluster mit mehr als einem
+    Post als Listen von Indizes in Eingabereihenfolge zurück.
+    """
+    parent = list(range(len(posts)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    sigs = post_signatures(posts)
+    sources = [p.get("source") for p in posts]
+    thresholds = (TITLE_SIMILARITY, TEXT_SIMILARITY)
+    buckets: dict[tuple, list[int]] = {}
+
+    def similar(i, j) -> bool:
+        if sources[i] == sources[j]:
+            a, b = sigs[i][0], sigs[j][0]
+            return a is not None and b is not None and similarity(a, b) >= SAME_SOURCE_TITLE_SIMILARITY
+        for k, limit in enumerate(thresholds):
+            a, b = sigs[i][k], sigs[j][k]
+            if a is not None and b is not None and similarity(a, b) >= limit:
+                return True
+        return False
+
+    for i in range(len(posts)):
+        for k in range(len(thresholds)):
+            sig = sigs[i][k]
+            if sig is None:
+                continue
+            for band in range(BANDS):
+                key = (k, band, sig[band * _ROWS:(band + 1) * _ROWS])
+                members = buckets.get(key)
+                if members is None:
+                    buckets[key] = [i]
+                    continue
+                linked = False
+                for j in members:
+                    if find(j) == find(i):
+                        linked = True
+                    elif similar(i, j):
+                        # der frühere Post bleibt die Wurzel
+                        ri, rj = find(i), find(j)
+                        parent[max(ri, rj)] = min(ri, rj)
+                        linked = True
+                if not linked and len(members) < BUCKET_MAX:
+                    members.append(i)
+
+    groups: dict[int, list[int]] = {}
+    for i in range(len(posts)):
+        groups.setdefault(find(i), []).append(i)
+    return [g for g in groups.values() if len(g) > 1]
+
+
+def collapse(posts: list[dict], keep=None) -> tuple[list[dict], list[dict]]:
+    """
+    Behält pro Cluster einen kanonischen Post – den ersten in der Eingabe –
+    und verwirft die übrigen. Ihre Quellen landen im kanonischen Post
+    unter "sources" (eigene Quelle zuerst), als bestätigende Quellen.
+    Posts, für die keep(post) wahr ist (etwa schon gespeicherte), werden
+    nie verworfen. Gibt (behaltene Posts, geänderte kanonische Posts) zurück.
+    """
+    drop: set[int] = set()
+    changed: list[dict] = []
+    for group in cluster(posts):
+        canonical = posts[group[0]]
+        before = canonical.get("sources")
+        sources = list(before or [canonical.get("source")])
+        for i in group[1:]:
+            src = posts[i].get("source")
+            if src and src not in sources:
+                sources.append(src)
+            if keep is None or not keep(posts[i]):
+                drop.add(i)
+        if sources != before:
+            canonical["sources"] = sources
+            changed.append(canonical)
+    return [p for i, p in enumerate(posts) if i not in drop], changed
+
+
+# ----------------------------
+# Inkrementell: Index über den Bestand
+# ----------------------------
+
+class _Entry:
+    __slots__ = ("id", "text", "sigs", "source", "root", "seq")
+
+    def __init__(self, post_id, text: int, sigs, source, root, seq):
+        self.id = post_id
+        self.text = text  # hash von Titel + Beschreibung: geändert -> neu hashen
+        # array statt tuple: 64 Werte in 256 Bytes statt ~2 KB als int-Objekte
+        self.sigs = tuple(array("I", s) if s is not None else None for s in sigs)
+        self.source = source
+        self.root = root
+        self.seq = seq
+
+
+def _text_key(post: dict) -> int:
+    return hash((post.get("title") or "", post.get("description") or ""))
+
+
+def _similar(sigs, source, entry: _Entry) -> bool:
+    """Dieselbe Regel wie in cluster(): gleiche Quelle nur über den Titel."""
+    if source == entry.source:
+        a, b = sigs[0], entry.sigs[0]
+        return a is not None and b is not None and similarity(a, b) >= SAME_SOURCE_TITLE_SIMILARITY
+    for k, limit in enumerate((TITLE_SIMILARITY, TEXT_SIMILARITY)):
+        a, b = sigs[k], entry.sigs[k]
+        if a is not None and b is not None and similarity(a, b) >= limit:
+            return True
+    return False
+
+
+def _band_keys(sigs) -> list[int]:
+    keys = []
+    for k, sig in enumerate(sigs):
+        if sig is not None:
+            for band in range(BANDS):
+                keys.append(hash((k, band, tuple(sig[band * _ROWS:(band + 1) * _ROWS]))))
+    return keys
+
+
+class DedupeIndex:
+    """
+    LSH-Index über die gespeicherten Posts für merge_posts: Signaturen und
+    Buckets bleiben zwischen den Aufrufen erhalten, pro Post-id, solange
+    Titel und Beschreibung gleich bleiben. Pro Lauf werden nur neue und
+    geänderte Posts gehasht; die frischen Posts werden gegen den Index
+    geprüft statt den ganzen Bestand neu zu clustern.
+
+    Ergebnis wie collapse(bestand + frische, keep=gespeichert): kanonisch
+    ist der früheste passende Post, gespeicherte Posts fallen nie weg.
+    Nicht erneut verglichen werden gespeicherte Posts untereinander – das
+    ist beim Speichern schon geschehen; verbunden werden sie nur, wenn ein
+    neuer Post zu beiden passt.
+    """
+
+    def __init__(self):
+        self._entries: dict[str, _Entry] = {}
+        # Band-Hash -> ein _Entry oder eine Liste davon (die meisten Buckets haben nur einen)
+        self._buckets: dict[int, object] = {}
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _add(self, post_id, text: int, sigs, source, root) -> _Entry:
+        old = self._remove(post_id)
+        if old is None:
+            self._seq += 1
+        # ein geänderter Post behält seinen Platz in der Reihenfolge
+        entry = _Entry(post_id, text, sigs, source, root, old.seq if old is not None else self._seq)
+        self._entries[post_id] = entry
+        buckets = self._buckets
+        for key in _band_keys(sigs):
+            members = buckets.get(key)
+            if members is None:
+                buckets[key] = entry
+            elif isinstance(members, _Entry):
+                if members.root != root:
+                    buckets[key] = [members, entry]
+            elif len(members) < BUCKET_MAX and all(m.root != root for m in members):
+                members.append(entry)
+        return entry
+
+    def _remove(self, post_id) -> _Entry | None:
+        entry = self._entries.pop(post_id, None)
+        if entry is None:
+            return None
+        buckets = self._buckets
+        for key in _band_keys(entry.sigs):
+            members = buckets.get(key)
+            if members is entry:
+                del buckets[key]
+            elif isinstance(members, list) and entry in members:
+                members.remove(entry)
+                if len(members) == 1:
+                    buckets[key] = members[0]
+        return entry
+
+    def _matches(self, sigs, source) -> list[_Entry]:
+        """Die Cluster-Köpfe aller ähnlichen Posts im Index, frühester zuerst."""
+        roots: dict[int, _Entry] = {}
+        checked: set[int] = set()
+        for key in _band_keys(sigs):
+            members = self._buckets.get(key)
+            if members is None:
+                continue
+            for entry in (members,) if isinstance(members, _Entry) else members:
+                if id(entry) in checked:
+                    continue
+                checked.add(id(entry))
+                root = self._entries.get(entry.root)
+                if root is not None and id(root) not in roots and _similar(sigs, source, entry):
+                    roots[id(root)] = root
+        return sorted(roots.values(), key=lambda e: e.seq)
+
+    def sync(self, stored: list[dict]) -> None:
+        """Bringt den Index auf den Stand von stored: neue und geänderte Posts hashen, gelöschte entfernen."""
+        live: set[str] = set()
+        todo = []
+        for p in stored:
+            post_id = p.get("id")
+            if not post_id:
+                continue
+            live.add(post_id)
+            entry = self._entries.get(post_id)
+            text = _text_key(p)
+            if entry is None or entry.root != post_id or entry.text != text:
+                todo.append((post_id, text, p))
+        for post_id in [k for k in self._entries if k not in live]:
+            self._remove(post_id)
+        for (post_id, text, p), sigs in zip(todo, post_signatures([p for _, _, p in todo])):
+            self._add(post_id, text, sigs, p.get("source"), post_id)
+
+    def collapse(self, stored: list[dict], fresh: list[dict]) -> tuple[list[dict], list[dict]]:
+        """
+        Wie collapse(stored + fresh, keep=gespeichert), aber gehasht werden
+        nur fresh und was sich in stored seit dem letzten Aufruf geändert
+        hat. Gibt (behaltene frische Posts, geänderte kanonische Posts) zurück.
+        """
+        with self._lock:
+            self.sync(stored)
+            by_key = {p.get("id"): p for p in stored}
+            order = {p.get("id"): (0, i) for i, p in enumerate(stored)}
+            # Kopf -> übrige Posts seines Clusters (Schlüssel) und alle Index-Einträge mit diesem Kopf
+            groups: dict = {}
+            entries: dict = {}
+            for i, (p, sigs) in enumerate(zip(fresh, post_signatures(fresh))):
+                key, source = p.get("id") or id(p), p.get("source")
+                by_key[key] = p
+                order[key] = (1, i)
+                roots = self._matches(sigs, source)
+                head = roots[0].id if roots else key
+                # verbindet der Post mehrere Cluster, gehen die späteren im frühesten auf (wie in cluster())
+                for other in roots[1:]:
+                    groups.setdefault(head, []).extend([other.id] + groups.pop(other.id, []))
+                    for entry in entries.pop(other.id, [other]):
+                        entry.root = head
+                        entries.setdefault(head, [self._entries[head]]).append(entry)
+                entry = self._add(key, _text_key(p), sigs, source, head)
+                if roots:
+                    groups.setdefault(head, []).append(key)
+                    # als Kettenglied: spätere Beinahe-Duplikate dieses Posts finden denselben Kopf
+                    entries.setdefault(head, [self._entries[head]]).append(entry)
+
+            changed: list[dict] = []
+            dropped: set = set()
+            for head, members in groups.items():
+                canonical = by_key[head]
+                before = canonical.get("sources")
+                sources = list(before or [canonical.get("source")])
+                for key in sorted(members, key=order.__getitem__):
+                    src = by_key[key].get("source")
+                    if src and src not in sources:
+                        sources.append(src)
+                    if order[key][0] == 1:  # gespeicherte Posts bleiben
+                        dropped.add(key)
+                if sources != before:
+                    canonical["sources"] = sources
+                    changed.append(canonical)
+            kept = [p for p in fresh if (p.get("id") or id(p)) not in dropped]
+            return kept, changed
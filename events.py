@@ -0,0 +1,54 @@
+# events.py In-process event bus behind the /api/stream server-sent events endpoint.
+import json
+import threading
+from collections import deque
+
+EVENT_BUFFER = 500
+
+
+class EventBus:
+    """
+    Ringpuffer der letzten Events mit fortlaufender id. Publisher hängen an,
+    Leser warten mit wait(after_id) auf alles, was nach after_id kam.
+    Ist after_id nicht mehr im Puffer (oder aus einem früheren Prozess),
+    liefert wait() None – der Client muss dann neu laden.
+    """
+
+    def __init__(self, maxlen: int = EVENT_BUFFER):
+        self._cond = threading.Condition()
+        self._events: deque[dict] = deque(maxlen=maxlen)
+        self._last_id = 0
+
+    def publish(self, kind: str, data) -> int:
+        with self._cond:
+            self._last_id += 1
+            self._events.append({"id": self._last_id, "type": kind, "data": data})
+            self._cond.notify_all()
+            return self._last_id
+
+    def last_id(self) -> int:
+        with self._cond:
+            return self._last_id
+
+    def _since(self, after_id: int) -> list[dict] | None:
+        if after_id > self._last_id:
+            return None
+        if after_id == self._last_id:
+            return []
+        if not self._events or self._events[0]["id"] > after_id + 1:
+            return None
+        return [e for e in self._events if e["id"] > after_id]
+
+    def wait(self, after_id: int, timeout: float) -> list[dict] | None:
+        """Events nach after_id; wartet bis zu timeout Sekunden, [] bei Timeout."""
+        with self._cond:
+            events = self._since(after_id)
+            if events == []:
+                self._cond.wait(timeout)
+                events = self._since(after_id)
+            return events
+
+
+def format_sse(event: dict) -> str:
+    data = json.dumps(event["data"], ensure_ascii=False)
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {data}\n\n"
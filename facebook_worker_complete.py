@@ -2,15 +2,11 @@
 # Scrapes Facebook news pages and extracts highly engaged posts
 # Engagement Score = (comments × 2) + reactions
 
-import json
 import os
-import time
-import requests
-from datetime import datetime
+
+from storage import get_storage
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-NEWSDB_PATH = os.path.join(BASE_DIR, "newsdb.json")
-STATUS_PATH = os.path.join(BASE_DIR, "reload_status.json")
 
 # Austrian news pages to monitor
 FACEBOOK_PAGES = [
@@ -35,46 +31,9 @@ FACEBOOK_PAGES = [
 
 def load_newsdb() -> dict:
     """Load existing news database."""
-    if not os.path.exists(NEWSDB_PATH):
-        data = {
-            "posts": [],
-            "comments": [],
-            "lists": {"fundgrube": []},
-            "chat": [],
-        }
-        with open(NEWSDB_PATH, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-        return data
-    
-    with open(NEWSDB_PATH, "r", encoding="utf-8") as f:
-        content = f.read().strip()
-    
-    if not content:
-        return {
-            "posts": [],
-            "comments": [],
-            "lists": {"fundgrube": []},
-            "chat": [],
-        }
-    
-    try:
-        return json.loads(content)
-    except json.JSONDecodeError:
-        return {
-            "posts": [],
-            "comments": [],
-            "lists": {"fundgrube": []},
-            "chat": [],
-        }
+    return get_storage().load()
 
 
 def save_newsdb(data: dict) -> None:
     """Save news database."""
-    if "lists" not in data:
-        data["lists"] = {"fundgrube": []}
-    if "comments" not in data:
-        data["comments"] = []
-    if "posts" not in data:
-        data["posts"] = []
-    
-    
+    get_storage().save(data)
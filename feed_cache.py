@@ -0,0 +1,138 @@
+# feed_cache.py Persistent ETag/Last-Modified cache for the feed downloads in scrape_worker.
+import json
+import os
+import threading
+import time
+
+from persist import FileLock, atomic_write_json
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+FEED_CACHE_PATH = os.path.join(BASE_DIR, "feed_cache.json")
+
+
+class FeedCache:
+    """
+    Validator-Cache pro Feed-URL: ETag, Last-Modified, Größe der letzten Antwort
+    und die daraus erzeugten Posts. Bei 304 werden die Posts wiederverwendet.
+    Die Zähler (hits, misses, bytes_saved, bytes_downloaded) gelten pro Lauf.
+    changed: seit dem letzten save() hat sich ein Eintrag geändert.
+
+    Reload und Ingest-Daemon halten je eine eigene Instanz auf dieselbe Datei;
+    save() liest sie deshalb unter einer Dateisperre neu ein und behält pro URL
+    den jüngeren Eintrag (stored_at), statt blind zu überschreiben.
+    """
+
+    def __init__(self, path: str = FEED_CACHE_PATH):
+        self.path = path
+        self.entries: dict[str, dict] = {}
+        self.seen: set[str] = set()
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self.bytes_downloaded = 0
+        self.changed = False
+        self.created_at = time.time()
+        self._dropped: dict[str, float] = {}   # URL -> Zeitpunkt, seit dem sie keine Validatoren mehr liefert
+        self._lock = threading.Lock()
+        self._file_lock = FileLock(path + ".lock")
+
+    @classmethod
+    def load(cls, path: str = FEED_CACHE_PATH) -> "FeedCache":
+        cache = cls(path)
+        cache.entries = cache._read()
+        return cache
+
+    def _read(self) -> dict[str, dict]:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f).get("feeds", {})
+        except Exception:
+            print("Warnung: feed_cache.json nicht lesbar, starte mit leerem Cache.")
+            return {}
+
+    def save(self, prune: bool = True) -> None:
+        """
+        Schreibt den Cache, zusammengeführt mit dem aktuellen Dateiinhalt: pro URL
+        gewinnt der jüngere Eintrag. Mit prune fallen URLs weg, die in diesem Lauf
+        nicht geladen und seit dem Anlegen der Instanz von niemandem erneuert wurden.
+        """
+        with self._file_lock:
+            disk = self._read()
+            with self._lock:
+                for url, entry in disk.items():
+                    stored_at = entry.get("stored_at", 0)
+                    if url in self._dropped:
+                        if stored_at > self._dropped[url]:
+                            self.entries[url] = entry
+                        continue
+                    ours = self.entries.get(url)
+                    if ours is None or stored_at >= ours.get("stored_at", 0):
+                        self.entries[url] = entry
+                self._dropped.clear()
+                if prune:
+                    feeds = {u: e for u, e in self.entries.items()
+                             if u in self.seen or e.get("stored_at", 0) > self.created_at}
+                else:
+                    feeds = dict(self.entries)
+                self.changed = False
+            atomic_write_json(self.path, {"feeds": feeds})
+
+    def conditional_headers(self, url: str) -> dict:
+        with self._lock:
+            self.seen.add(url)
+            entry = self.entries.get(url)
+        if not entry:
+            return {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def hit(self, url: str) -> list[dict] | None:
+        """304 erhalten: gespeicherte Posts (als Kopie) oder None, falls nichts im Cache liegt."""
+        with self._lock:
+            self.seen.add(url)
+            entry = self.entries.get(url)
+            if entry is None:
+                return None
+            self.hits += 1
+            self.bytes_saved += int(entry.get("size") or 0)
+            return [dict(p) for p in entry.get("posts", [])]
+
+    def store(self, url: str, headers: dict, size: int, posts: list[dict]) -> None:
+        """Volle Antwort erhalten: Validatoren und Posts merken."""
+        headers = {k.lower(): v for k, v in headers.items()}
+        with self._lock:
+            self.seen.add(url)
+            self.misses += 1
+            self.bytes_downloaded += int(size)
+            if not headers.get("etag") and not headers.get("last-modified"):
+                if self.entries.pop(url, None) is not None:
+                    self._dropped[url] = time.time()
+                    self.changed = True
+                return
+            entry = {
+                "etag": headers.get("etag"),
+                "last_modified": headers.get("last-modified"),
+                "size": int(size),
+                "posts": [dict(p) for p in posts],
+            }
+            old = self.entries.get(url)
+            if old is None or any(old.get(k) != v for k, v in entry.items()):
+                entry["stored_at"] = time.time()
+                self.entries[url] = entry
+                self._dropped.pop(url, None)
+                self.changed = True
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "bytes_saved": self.bytes_saved,
+                "bytes_downloaded": self.bytes_downloaded,
+            }
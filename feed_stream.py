@@ -0,0 +1,186 @@
+# feed_stream.py Incremental RSS 2.0 / RSS 1.0 (RDF) / Atom parser that stops at the per-source entry cap.
+#
+# feedparser baut für jeden Feed das ganze Dokument samt Sanitizer, Namespaces
+# und Channel-Metadaten auf, obwohl scrape_worker pro Eintrag nur Link, Titel,
+# Beschreibung und Datum braucht und meist nur die ersten 40–120 Einträge
+# verwendet. Hier läuft ein XMLPullParser blockweise über die Antwort, jedes
+# fertige <item>/<entry> wird sofort in ein FeedEntry übersetzt und danach
+# weggeworfen; ist das Limit erreicht, wird der Rest gar nicht erst geparst.
+#
+# Alles, was kein wohlgeformtes RSS/RDF/Atom ist (kaputtes XML, HTML-Entities
+# ohne DTD, unbekannte Encodings, Atom 0.3, ...), meldet parse_entries mit
+# None – scrape_worker nimmt dann wie bisher feedparser.
+import re
+import time
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+from urllib.parse import urljoin
+
+try:
+    from feedparser.datetimes import _parse_date
+except ImportError:  # feedparser < 6
+    try:
+        from feedparser import _parse_date
+    except ImportError:
+        _parse_date = None
+
+# published: Unix-Zeit wie ts_from_entry sie aus feedparser berechnet, None wenn der Feed keine hat
+FeedEntry = namedtuple("FeedEntry", ["link", "title", "summary", "published"])
+
+CHUNK_SIZE = 16 * 1024  # Bytes pro Parser-Schritt; kleiner = früherer Abbruch, größer = weniger Overhead
+
+ATOM = "{http://www.w3.org/2005/Atom}"
+RDF = "{http://www.w3.org/1999/02/22-rdf-syntax-ns#}"
+RSS10 = "{http://purl.org/rss/1.0/}"
+RSS090 = "{http://my.netscape.com/rdf/simple/0.9/}"
+CONTENT_ENCODED = "{http://purl.org/rss/1.0/modules/content/}encoded"
+XML_BASE = "{http://www.w3.org/XML/1998/namespace}base"
+
+# Wurzelelement -> Tag der Einträge
+ENTRY_TAGS = {
+    "rss": ("item",),
+    RDF + "RDF": (RSS10 + "item", RSS090 + "item", "item"),
+    ATOM + "feed": (ATOM + "entry",),
+}
+
+
+# Wie feedparsers Sanitizer: <script>/<style> samt Inhalt weg, sonst landet
+# der Code nach strip_tags als Text in der Beschreibung
+SCRIPT_STYLE_RE = re.compile(r"<(script|style)\b[^>]*>.*?(?:</\1\s*>|$)", re.IGNORECASE | re.DOTALL)
+SCRIPT_STYLE_TAGS = ("script", "style")
+
+
+class UnsupportedFeed(ValueError):
+    """Kein RSS/RDF/Atom, das der Stream-Parser kennt."""
+
+
+def _itertext(elem):
+    """elem.itertext() ohne den Inhalt von <script>/<style>-Kindelementen."""
+    if elem.text:
+        yield elem.text
+    for child in elem:
+        if child.tag.rpartition("}")[2].lower() not in SCRIPT_STYLE_TAGS:
+            yield from _itertext(child)
+        if child.tail:
+            yield child.tail
+
+
+def _text(elem) -> str:
+    if elem is None:
+        return ""
+    if len(elem):  # Atom type="xhtml": Markup als Kindelemente
+        return "".join(_itertext(elem)).strip()
+    return (elem.text or "").strip()
+
+
+def _summary(elem) -> str:
+    """Beschreibung als (escaptes) HTML, ohne Skripte und Stylesheets."""
+    text = _text(elem)
+    return SCRIPT_STYLE_RE.sub("", text).strip() if "<" in text else text
+
+
+def _timestamp(value: str) -> int | None:
+    """Datum wie feedparser (published_parsed, UTC) -> Unix-Zeit wie ts_from_entry."""
+    if not value or _parse_date is None:
+        return None
+    parsed = _parse_date(value)
+    return int(time.mktime(parsed)) if parsed else None
+
+
+def _rss_entry(item, base: str) -> FeedEntry:
+    fields = {}
+    for child in item:
+        tag = child.tag
+        if tag == CONTENT_ENCODED:
+            fields.setdefault("content", child)
+            continue
+        if tag[0] == "{":
+            ns, _, local = tag[1:].partition("}")
+            if "{" + ns + "}" not in (RSS10, RSS090):
+                continue
+            tag = local
+        fields.setdefault(tag, child)
+
+    link = _text(fields.get("link"))
+    if not link:
+        guid = fields.get("guid")
+        if guid is not None and guid.get("isPermaLink", "true").lower() != "false":
+            link = _text(guid)
+    summary = _summary(fields.get("description")) or _summary(fields.get("content"))
+    return FeedEntry(
+        urljoin(base, link) if link else "",
+        _text(fields.get("title")),
+        summary,
+        _timestamp(_text(fields.get("pubDate"))),
+    )
+
+
+def _atom_entry(entry, base: str) -> FeedEntry:
+    base = urljoin(base, entry.get(XML_BASE, ""))
+    link = ""
+    for elem in entry.iterfind(ATOM + "link"):
+        if elem.get("rel", "alternate") == "alternate" and elem.get("href"):
+            link = elem.get("href").strip()
+            break
+    summary = _summary(entry.find(ATOM + "summary")) or _summary(entry.find(ATOM + "content"))
+    return FeedEntry(
+        urljoin(base, link) if link else "",
+        _text(entry.find(ATOM + "title")),
+        summary,
+        _timestamp(_text(entry.find(ATOM + "published"))),
+    )
+
+
+def iter_entries(content: bytes, base_url: str = "", chunk_size: int = CHUNK_SIZE):
+    """
+    Liefert die Einträge des Feeds der Reihe nach als FeedEntry, während
+    content blockweise geparst wird. Wer früher aufhört zu iterieren, spart
+    den Rest des Dokuments. Wirft ET.ParseError bei kaputtem XML und
+    UnsupportedFeed, wenn das Wurzelelement kein RSS/RDF/Atom ist.
+    """
+    parser = ET.XMLPullParser(events=("start", "end"))
+    root = None
+    entry_tags: tuple = ()
+    make_entry = _rss_entry
+    base = base_url
+    depth = 0
+    for start in range(0, len(content), chunk_size):
+        parser.feed(content[start:start + chunk_size])
+        for event, elem in parser.read_events():
+            if event == "start":
+                depth += 1
+                if root is None:
+                    root = elem
+                    if elem.tag not in ENTRY_TAGS:
+                        raise UnsupportedFeed(elem.tag)
+                    entry_tags = ENTRY_TAGS[elem.tag]
+                    if elem.tag == ATOM + "feed":
+                        make_entry = _atom_entry
+                        base = urljoin(base_url, elem.get(XML_BASE, ""))
+                continue
+            depth -= 1
+            if elem.tag in entry_tags:
+                yield make_entry(elem, base)
+                # Eintrag ist verarbeitet: Kinder freigeben, damit der Baum nicht wächst
+                elem.clear()
+    parser.close()
+    if root is None:
+        raise UnsupportedFeed("leeres Dokument")
+
+
+def parse_entries(content: bytes, limit: int | None = None, base_url: str = "") -> list[FeedEntry] | None:
+    """
+    Die ersten limit Einträge des Feeds; None, wenn der Stream-Parser den
+    Feed nicht lesen kann (dann feedparser verwenden).
+    """
+    entries: list[FeedEntry] = []
+    if limit is not None and limit <= 0:
+        return entries
+    try:
+        for entry in iter_entries(content, base_url):
+            entries.append(entry)
+            if limit is not None and len(entries) >= limit:
+                break
+    except (ET.ParseError, UnsupportedFeed):
+        return None
+    return entries
@@ -0,0 +1,393 @@
+# ingest.py Long-running ingestion daemon: polls every feed on its own adaptive schedule and scores new items right away.
+#
+# Statt bei jedem Reload alle Feeds zu laden, hat hier jede Quelle aus
+# CATEGORIES und REDDIT_SUBS einen eigenen Abfrageplan (FeedSchedule):
+#   - die Rate neuer Einträge wird pro Feed aus den Veröffentlichungszeiten
+#     der neuesten Einträge geschätzt (Feeds ohne Zeiten: gleitend aus den
+#     tatsächlich neuen Einträgen pro Abruf) und das Intervall so gewählt,
+#     dass im Schnitt TARGET_NEW_PER_POLL neue Einträge pro Abruf anfallen,
+#     begrenzt auf [MIN_INTERVAL, MAX_INTERVAL];
+#   - fehlgeschlagene Abrufe (Netzwerk, HTTP 4xx/5xx) warten exponentiell
+#     länger, mit Zufallsanteil, damit nicht alle Feeds eines Hosts
+#     gleichzeitig wiederkommen;
+#   - neue Einträge werden sofort mit merge_posts übernommen und bewertet
+#     (score_posts), nicht erst beim nächsten categorize-Lauf.
+# Alle CATEGORIZE_INTERVAL Sekunden läuft, falls etwas dazukam, der volle
+# categorize_worker (Obergrenze pro Quelle, Neuberechnung aller Scores).
+# Die Pläne überleben Neustarts in ingest_state.json.
+#
+#   python ingest.py            # läuft, bis Strg+C
+#   python ingest.py --once     # nur die fälligen Feeds einmal abfragen
+#
+# In der App startet der Daemon mit AGGREPAGE_INGEST=1 als Hintergrund-Thread;
+# categorize läuft dort als Job des JobRunners, wie ein Reload.
+import os
+import random
+import threading
+import time
+import traceback
+from statistics import median
+
+import categorize_worker
+import metrics
+import scrape_worker
+from feed_cache import FeedCache
+from persist import atomic_write_json, read_json
+from storage import get_storage
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+INGEST_STATE_PATH = os.path.join(BASE_DIR, "ingest_state.json")
+
+MIN_INTERVAL = 120.0            # Sekunden; schneller fragt kein Feed ab
+MAX_INTERVAL = 6 * 3600.0       # auch ein stiller Feed wird mindestens so oft abgefragt
+DEFAULT_INTERVAL = 900.0        # bis es eine Schätzung gibt
+TARGET_NEW_PER_POLL = 0.7       # angestrebte neue Einträge pro Abruf (kleiner = schneller, mehr Abrufe)
+RATE_ITEMS = 20                 # so viele der neuesten Einträge gehen in die Rate ein
+RATE_WINDOW = 7 * 86400         # ältere Veröffentlichungszeiten zählen nicht
+RATE_ALPHA = 0.3                # Feeds ohne Zeiten: Gewicht des neuesten Abrufs in der gleitenden Rate
+JITTER = 0.1                    # ±10 % auf jedes Intervall
+BACKOFF_MAX = 6 * 3600.0        # längste Wartezeit nach Fehlern
+IDLE_WAIT = 30.0                # höchstens so lange schläft die Schleife am Stück
+BUSY_WAIT = 30.0                # mindestens so lange nach einer übersprungenen (Reload) oder fehlgeschlagenen Runde
+
+CATEGORIZE_INTERVAL = float(os.environ.get("AGGREPAGE_INGEST_CATEGORIZE_SECONDS", "3600"))
+
+
+def publication_rate(posts: list[dict], now: float) -> float | None:
+    """
+    Einträge pro Sekunde aus den Veröffentlichungszeiten im Feed: die
+    neuesten RATE_ITEMS Einträge geteilt durch die Zeit seit dem ältesten
+    davon. Wird ein Feed still, sinkt die Rate mit jeder Stunde ohne neuen
+    Eintrag. None, wenn der Feed keine brauchbaren Zeiten liefert.
+    """
+    stamps = sorted(t for t in (int(p.get("created_at") or 0) for p in posts) if now - RATE_WINDOW <= t <= now)
+    stamps = stamps[-RATE_ITEMS:]
+    if len(stamps) < 2 or stamps[-1] <= stamps[0]:
+        return None
+    return len(stamps) / (now - stamps[0])
+
+
+def interval_for(rate: float | None) -> float:
+    if not rate:
+        return MAX_INTERVAL
+    return min(MAX_INTERVAL, max(MIN_INTERVAL, TARGET_NEW_PER_POLL / rate))
+
+
+class FeedSchedule:
+    """
+    Abfrageplan eines Feeds: geschätzte Rate neuer Einträge (pro Sekunde),
+    daraus das Intervall, nächster Termin und Fehlerzähler für den Backoff.
+    seen sind die ids aus dem letzten Abruf; was nicht darin war, ist neu.
+    """
+
+    def __init__(self, key: str, name: str, category: str, spec):
+        self.key = key
+        self.name = name
+        self.category = category
+        self.spec = spec  # Feed-dict aus CATEGORIES bzw. Subreddit-Name
+        self.interval = DEFAULT_INTERVAL
+        self.rate: float | None = None
+        self.next_at = 0.0
+        self.last_ok: float | None = None
+        self.failures = 0
+        self.polls = 0
+        self.new_items = 0
+        self.seen: set[str] | None = None
+
+    def poll(self, pool: scrape_worker.FetchPool, cache: FeedCache | None) -> tuple[object, list[dict]]:
+        if self.category == "reddit_politics":
+            return scrape_worker.poll_reddit_sub(pool, self.spec, cache)
+        return scrape_worker.poll_feed(pool, self.category, self.spec, cache)
+
+    def fresh(self, posts: list[dict]) -> list[dict]:
+        """
+        Die neuen Posts eines Abrufs. Nach einem Neustart fehlt seen; dann
+        zählt als neu, was nach dem letzten erfolgreichen Abruf erschienen ist,
+        damit Posts, die categorize schon aussortiert hat, nicht wiederkommen.
+        """
+        if self.seen is not None:
+            return [p for p in posts if p.get("id") not in self.seen]
+        if self.last_ok is not None:
+            return [p for p in posts if int(p.get("created_at") or 0) > self.last_ok]
+        return list(posts)
+
+    def succeeded(self, now: float, posts: list[dict], new: int, rng: random.Random) -> None:
+        rate = publication_rate(posts, now)
+        if rate is not None:
+            self.rate = rate
+        elif self.last_ok is not None and now > self.last_ok:
+            # ohne Zeiten im Feed: neue Einträge pro Sekunde seit dem letzten Abruf, gleitend gemittelt
+            observed = new / (now - self.last_ok)
+            self.rate = observed if self.rate is None else (1 - RATE_ALPHA) * self.rate + RATE_ALPHA * observed
+        self.interval = interval_for(self.rate)
+        self.seen = {p.get("id") for p in posts}
+        self.last_ok = now
+        self.failures = 0
+        self.polls += 1
+        self.new_items += new
+        self.next_at = now + self.interval * rng.uniform(1 - JITTER, 1 + JITTER)
+
+    def failed(self, now: float, rng: random.Random) -> None:
+        """Exponentieller Backoff ab dem normalen Intervall, zufällig in [delay/2, delay]."""
+        self.failures += 1
+        self.polls += 1
+        delay = min(BACKOFF_MAX, max(self.interval, MIN_INTERVAL) * 2 ** (self.failures - 1))
+        self.next_at = now + rng.uniform(delay / 2, delay)
+
+    def state(self) -> dict:
+        return {
+            "name": self.name,
+            "category": self.category,
+            "interval": round(self.interval, 1),
+            "rate_per_hour": round(self.rate * 3600, 3) if self.rate is not None else None,
+            "next_at": round(self.next_at, 1),
+            "last_ok": self.last_ok,
+            "failures": self.failures,
+            "polls": self.polls,
+            "new_items": self.new_items,
+        }
+
+    def restore(self, state: dict) -> None:
+        rate = state.get("rate_per_hour")
+        self.rate = rate / 3600 if rate is not None else None
+        self.interval = float(state.get("interval") or interval_for(self.rate))
+        self.next_at = float(state.get("next_at") or 0.0)
+        self.last_ok = state.get("last_ok")
+        self.failures = int(state.get("failures") or 0)
+        self.polls = int(state.get("polls") or 0)
+        self.new_items = int(state.get("new_items") or 0)
+
+
+def build_schedules() -> list[FeedSchedule]:
+    """Ein Plan pro Feed-URL aus CATEGORIES und pro Subreddit aus REDDIT_SUBS."""
+    schedules: dict[str, FeedSchedule] = {}
+    for category, feeds in scrape_worker.CATEGORIES.items():
+        for src in feeds:
+            schedules.setdefault(src["url"], FeedSchedule(src["url"], src["name"], category, src))
+    for sub in scrape_worker.REDDIT_SUBS:
+        key = f"reddit:{sub}"
+        schedules.setdefault(key, FeedSchedule(key, f"r/{sub}", "reddit_politics", sub))
+    return list(schedules.values())
+
+
+class IngestDaemon:
+    """
+    Fragt in einer Schleife die fälligen Feeds ab (über einen gemeinsamen
+    FetchPool und den FeedCache), übernimmt neue Einträge in die Datenbank
+    und bewertet sie sofort. busy() -> True (z. B. ein laufender Reload)
+    verschiebt die Runde; on_change(summary) wird nach jeder Runde
+    aufgerufen, die etwas gespeichert hat. Mit start_job (JobRunner.start)
+    läuft categorize als Job neben den Reloads statt im eigenen Thread.
+    """
+
+    def __init__(self, store=None, schedules: list[FeedSchedule] | None = None,
+                 cache: FeedCache | None = None, state_path: str | None = INGEST_STATE_PATH,
+                 categorize_interval: float = CATEGORIZE_INTERVAL, busy=None, on_change=None,
+                 start_job=None, seed: int | None = None, runs_log: str | None = metrics.RUNS_LOG_PATH,
+                 max_age_days: float = scrape_worker.POST_MAX_AGE_DAYS):
+        self._store = store
+        self.schedules = schedules if schedules is not None else build_schedules()
+        self.cache = cache if cache is not None else FeedCache.load()
+        self.state_path = state_path
+        self.categorize_interval = categorize_interval
+        self.busy = busy
+        self.on_change = on_change
+        self.start_job = start_job
+        self.rng = random.Random(seed)
+        self.runs_log = runs_log
+        self.max_age_days = max_age_days
+        self.last_categorize = time.time()
+        self.pending_categorize = False
+        self._pool: scrape_worker.FetchPool | None = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._restore()
+
+    @property
+    def store(self):
+        return self._store if self._store is not None else get_storage()
+
+    # ---- Zustand ----
+
+    def _restore(self) -> None:
+        if not self.state_path:
+            return
+        try:
+            state = read_json(self.state_path, {}) or {}
+        except Exception:
+            print("Warnung: ingest_state.json nicht lesbar, starte mit Standard-Intervallen.")
+            return
+        feeds = state.get("feeds", {})
+        for s in self.schedules:
+            if s.key in feeds:
+                s.restore(feeds[s.key])
+
+    def save_state(self) -> None:
+        if self.state_path:
+            atomic_write_json(self.state_path, self.status(), fsync=False)
+
+    def status(self) -> dict:
+        return {
+            "updated_at": int(time.time()),
+            "feeds": {s.key: s.state() for s in self.schedules},
+        }
+
+    # ---- eine Runde ----
+
+    def next_due(self) -> float:
+        return min((s.next_at for s in self.schedules), default=time.time() + IDLE_WAIT)
+
+    def poll_once(self, now: float | None = None) -> dict:
+        """
+        Fragt alle fälligen Feeds ab und speichert die neuen Einträge. Gibt
+        die Zusammenfassung zurück; {"skipped": "busy"}, wenn busy() die
+        Runde verschoben hat (die Feeds bleiben dann fällig).
+        """
+        now = time.time() if now is None else now
+        due = [s for s in self.schedules if s.next_at <= now]
+        if not due:
+            return {}
+        if self.busy is not None and self.busy():
+            return {"skipped": "busy"}
+        if self._pool is None:
+            self._pool = scrape_worker.FetchPool()
+
+        with metrics.worker_run("ingest", self.runs_log) as run:
+            with run.phase("fetch"):
+                results = self._pool.run([lambda s=s: s.poll(self._pool, self.cache) for s in due])
+            fresh: list[dict] = []
+            failed = 0
+            for s, (status, posts) in zip(due, results):
+                if scrape_worker.is_failure(status):
+                    s.failed(now, self.rng)
+                    failed += 1
+                else:
+                    new = s.fresh(posts)
+                    s.succeeded(now, posts, len(new), self.rng)
+                    fresh.extend(new)
+                metrics.FEED_POLL_INTERVAL.set(s.interval, source=s.name)
+            if self.cache.changed:  # sonst nur 304er: nichts Neues zu schreiben
+                self.cache.save(prune=False)
+            run.counts.update(polled=len(due), failed=failed, new=len(fresh))
+
+            if fresh:
+                with run.phase("store"):
+                    changes = self._store_fresh(fresh, now)
+                added = changes["added"]
+                lags = []
+                for p in added:
+                    lag = now - int(p.get("created_at") or 0)
+                    if lag >= 0:
+                        lags.append(lag)
+                        metrics.INGEST_LAG_SECONDS.observe(lag, category=p.get("auto_category") or "international")
+                run.counts.update(added=len(added), updated=len(changes["updated"]),
+                                  expired=len(changes["expired"]), duplicates=changes["duplicates"])
+                if lags:
+                    run.counts["median_lag_seconds"] = round(median(lags))
+                self.pending_categorize = self.pending_categorize or bool(added)
+        self.save_state()
+
+        summary = run.summary()
+        if fresh and self.on_change is not None:
+            self.on_change(summary)
+        return summary
+
+    def _store_fresh(self, fresh: list[dict], now: float) -> dict:
+        """merge_posts + score_posts für die neuen und geänderten Posts, in einer Transaktion."""
+        store = self.store
+        with store.transaction():
+            _, changes = scrape_worker.merge_posts(store.list_posts(), fresh, self.max_age_days, now=now,
+                                                   pruned=store.pruned_keys(), index=scrape_worker.DEDUPE_INDEX)
+            changed = changes["added"] + changes["updated"]
+            if changed:
+                categorize_worker.score_posts(changed, now=now, reclassify=categorize_worker.CLASSIFY)
+            if changed or changes["expired"]:
+                store.update_posts(changed, changes["expired"])
+        return changes
+
+    def maybe_categorize(self, now: float | None = None) -> bool:
+        """Voller categorize-Lauf, wenn seit dem letzten CATEGORIZE_INTERVAL vergangen ist und etwas dazukam."""
+        now = time.time() if now is None else now
+        if not (self.categorize_interval and self.pending_categorize):
+            return False
+        if now - self.last_categorize < self.categorize_interval:
+            return False
+        if self.start_job is not None:
+            # läuft schon ein Reload, startet der Job nicht: beim nächsten Mal wieder versuchen
+            _, started = self.start_job("categorize", [("categorize", categorize_worker.main)])
+            if not started:
+                return False
+        elif self.busy is not None and self.busy():
+            return False
+        else:
+            categorize_worker.main()
+        self.last_categorize = now
+        self.pending_categorize = False
+        return True
+
+    # ---- Schleife ----
+
+    def step(self) -> float:
+        """
+        Eine Runde der Schleife; gibt zurück, wie lange danach zu warten ist.
+        Übersprungene oder fehlgeschlagene Runden lassen die Feeds fällig –
+        ohne BUSY_WAIT liefe die Schleife dann ohne Pause weiter.
+        """
+        try:
+            summary = self.poll_once()
+            self.maybe_categorize()
+        except Exception:
+            traceback.print_exc()
+            return BUSY_WAIT
+        if summary.get("skipped"):
+            return BUSY_WAIT
+        return min(IDLE_WAIT, max(0.0, self.next_due() - time.time()))
+
+    def run_forever(self) -> None:
+        print(f"Ingest: {len(self.schedules)} Feeds, Intervalle {MIN_INTERVAL:.0f}–{MAX_INTERVAL:.0f}s")
+        try:
+            while not self._stop.is_set():
+                self._stop.wait(self.step())
+        finally:
+            self.close()
+
+    def start(self) -> threading.Thread:
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run_forever, name="ingest", daemon=True)
+            self._thread.start()
+        return self._thread
+
+    def stop(self, timeout: float | None = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Feeds laufend mit eigenem Intervall pro Quelle laden")
+    ap.add_argument("--once", action="store_true", help="nur die fälligen Feeds einmal abfragen und beenden")
+    ap.add_argument("--categorize-every", type=float, default=CATEGORIZE_INTERVAL,
+                    help="Sekunden zwischen vollen categorize-Läufen (0 = nie)")
+    ap.add_argument("--max-age-days", type=float, default=scrape_worker.POST_MAX_AGE_DAYS,
+                    help="Posts älter als N Tage verwerfen (0 = nie)")
+    args = ap.parse_args()
+
+    daemon = IngestDaemon(categorize_interval=args.categorize_every, max_age_days=args.max_age_days)
+    if args.once:
+        try:
+            daemon.poll_once()
+        finally:
+            daemon.close()
+    else:
+        try:
+            daemon.run_forever()
+        except KeyboardInterrupt:
+            print("Ingest beendet.")
@@ -0,0 +1,105 @@
+# jobs.py Background job runner for reloads: runs the worker main() functions in-process, one job at a time.
+import threading
+import time
+import traceback
+import uuid
+
+import metrics
+from progress import get_reporter
+
+JOB_HISTORY = 20
+
+
+def _copy(job: dict) -> dict:
+    return dict(job, timings=dict(job["timings"]))
+
+
+class JobRunner:
+    """
+    Führt einen Job (eine Folge von Schritten) in einem Hintergrund-Thread
+    aus. Läuft bereits ein Job, wird kein zweiter gestartet. Die Jobs
+    bleiben (die letzten JOB_HISTORY) mit Zustand und Fehler abrufbar.
+    on_finish(job) wird nach dem Ende jedes Jobs aufgerufen.
+    """
+
+    def __init__(self, history: int = JOB_HISTORY, on_finish=None):
+        self.history = history
+        self.on_finish = on_finish
+        self._lock = threading.Lock()
+        self._jobs: dict[str, dict] = {}
+        self._order: list[str] = []
+        self._running: str | None = None
+
+    def start(self, name: str, steps: list[tuple[str, object]]) -> tuple[dict, bool]:
+        """
+        Startet einen Job mit den Schritten [(label, callable), ...].
+        Gibt (job, True) zurück, oder (laufender job, False), wenn schon einer läuft.
+        """
+        with self._lock:
+            if self._running is not None:
+                return _copy(self._jobs[self._running]), False
+            job = {
+                "id": uuid.uuid4().hex,
+                "name": name,
+                "state": "running",
+                "step": None,
+                "created_at": int(time.time()),
+                "finished_at": None,
+                "error": None,
+                "timings": {},  # Sekunden pro Schritt
+            }
+            self._jobs[job["id"]] = job
+            self._order.append(job["id"])
+            while len(self._order) > self.history:
+                self._jobs.pop(self._order.pop(0), None)
+            self._running = job["id"]
+
+        threading.Thread(target=self._run, args=(job["id"], steps), name=f"job-{name}", daemon=True).start()
+        return _copy(job), True
+
+    def _run(self, job_id: str, steps: list[tuple[str, object]]) -> None:
+        state, error = "done", None
+        try:
+            for label, fn in steps:
+                with self._lock:
+                    self._jobs[job_id]["step"] = label
+                t0 = time.perf_counter()
+                try:
+                    fn()
+                finally:
+                    seconds = time.perf_counter() - t0
+                    metrics.RELOAD_PHASE_SECONDS.observe(seconds, phase=label)
+                    with self._lock:
+                        self._jobs[job_id]["timings"][label] = round(seconds, 3)
+        except BaseException as e:
+            traceback.print_exc()
+            state, error = "error", f"{type(e).__name__}: {e}"
+            get_reporter().done("Fehler beim Aktualisieren", error=error)
+        finally:
+            # gedrosselte Zwischenstände nicht liegen lassen: der letzte Stand gehört in reload_status.json
+            get_reporter().flush()
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if job is not None:
+                    job["state"] = state
+                    job["error"] = error
+                    job["finished_at"] = int(time.time())
+                    job = _copy(job)
+                self._running = None
+            if job is not None and self.on_finish is not None:
+                self.on_finish(job)
+
+    def get(self, job_id: str) -> dict | None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return _copy(job) if job else None
+
+    def latest(self) -> dict | None:
+        """Der laufende Job, sonst der zuletzt gestartete."""
+        with self._lock:
+            job_id = self._running or (self._order[-1] if self._order else None)
+            return _copy(self._jobs[job_id]) if job_id else None
+
+    def is_running(self) -> bool:
+        with self._lock:
+            return self._running is not None
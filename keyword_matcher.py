@@ -0,0 +1,88 @@
+# keyword_matcher.py Aho-Corasick multi-keyword matcher used by categorize_worker for keyword scoring.
+from collections import deque
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick-Automat über alle Keywords eines Mappings {keyword: weight}.
+    Ein Durchlauf über den Text findet jedes Keyword, das als Teilstring
+    vorkommt – dieselbe Semantik wie `word in text`, aber unabhängig von
+    der Anzahl der Keywords.
+    """
+
+    def __init__(self, mapping: dict[str, float]):
+        self.words = list(mapping.keys())
+        self.weights = [float(w) for w in mapping.values()]
+
+        goto: list[dict[str, int]] = [{}]
+        out: list[list[int]] = [[]]
+        always: list[int] = []  # leeres Keyword: `"" in text` ist immer wahr
+        for idx, word in enumerate(self.words):
+            if not word:
+                always.append(idx)
+                continue
+            state = 0
+            for ch in word:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto.append({})
+                    out.append([])
+                    goto[state][ch] = nxt
+                state = nxt
+            out[state].append(idx)
+
+        # Fehler-Links per Breitensuche; Ausgaben der Suffix-Zustände erben
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                target = goto[f].get(ch, 0)
+                fail[nxt] = target if target != nxt else 0
+                out[nxt] = out[nxt] + out[fail[nxt]]
+
+        self._goto = goto
+        self._fail = fail
+        self._out = [tuple(o) for o in out]
+        self._always = tuple(always)
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def find(self, text: str) -> set[int]:
+        """Indizes (in self.words) aller Keywords, die in text vorkommen."""
+        goto = self._goto
+        fail = self._fail
+        out = self._out
+        found = set(self._always)
+        add = found.update
+        state = 0
+        for ch in text:
+            while True:
+                nxt = goto[state].get(ch)
+                if nxt is not None:
+                    state = nxt
+                    break
+                if not state:
+                    break
+                state = fail[state]
+            hits = out[state]
+            if hits:
+                add(hits)
+        return found
+
+    def score(self, text: str) -> int:
+        """
+        Summe(weight * 100) der gefundenen Keywords, addiert in Mapping-
+        Reihenfolge – damit bitgleich zur Schleife über mapping.items().
+        """
+        weights = self.weights
+        score = 0.0
+        for idx in sorted(self.find(text)):
+            score += weights[idx] * 100.0
+        return int(score)
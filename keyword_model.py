@@ -0,0 +1,283 @@
+# keyword_model.py Compiles the keyword JSON files and word_ratings.json into one pickled matcher artifact, with hot reload on source changes.
+#
+# Das Artefakt (keywords.model) wird bei Bedarf automatisch neu gebaut,
+# sobald sich eine Quelldatei ändert. Von Hand bauen und Statistik zeigen:
+#
+#   python keyword_model.py compile
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+import unicodedata
+import weakref
+
+from keyword_matcher import KeywordMatcher
+from persist import atomic_write_bytes
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_PATH = os.path.join(BASE_DIR, "keywords.model")
+
+# Kategorie -> Keyword-Datei {keyword: weight}; die Gewichte dort gelten vorrangig
+KEYWORD_FILES = {
+    "austria": "keywords_austria.json",
+    "international": "keywords_international.json",
+    "good_news": "keywords_good_news.json",
+    "investigativ": "keywords_investigativ.json",
+}
+# Liste von {word, category, rating, signals}; ergänzt Wörter, die in den Keyword-Dateien fehlen
+RATINGS_FILE = "word_ratings.json"
+
+MODEL_FORMAT = 2
+CHECK_SECONDS = 2.0  # so oft werden die Quelldateien höchstens auf Änderungen geprüft
+
+
+def normalize_word(word) -> str:
+    """Schreibweise, unter der Keywords verglichen werden: NFC, klein."""
+    return unicodedata.normalize("NFC", str(word)).lower()
+
+
+def normalize_category(category) -> str:
+    return str(category).strip().lower().replace(" ", "_")
+
+
+def source_paths(base_dir: str = BASE_DIR) -> list[str]:
+    return [os.path.join(base_dir, f) for f in (*KEYWORD_FILES.values(), RATINGS_FILE)]
+
+
+def source_stamps(base_dir: str = BASE_DIR) -> dict:
+    """{Dateiname: (mtime_ns, size)} der Quellen; None für fehlende Dateien."""
+    stamps = {}
+    for path in source_paths(base_dir):
+        try:
+            st = os.stat(path)
+            stamps[os.path.basename(path)] = (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            stamps[os.path.basename(path)] = None
+    return stamps
+
+
+def _load_json(base_dir: str, filename: str, default):
+    try:
+        with open(os.path.join(base_dir, filename), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        print(f"Warnung: Konnte Keyword-Datei {filename} nicht laden oder parsen.")
+        return default
+
+
+# ----------------------------
+# Kompilieren
+# ----------------------------
+
+class CompiledKeywords:
+    """
+    Ergebnis des Kompilierens: pro Kategorie das zusammengeführte Mapping
+    {keyword: weight} und der fertige Aho-Corasick-Automat, dazu ein
+    kombinierter Automat über die Keywords aller Kategorien. entries[i]
+    sagt für dessen Keyword i, in welchen Kategorien es an welcher Stelle
+    mit welchem Gewicht steht. revision ist ein Hash über die Mappings und
+    ändert sich genau dann, wenn sich die Scores ändern können.
+    """
+
+    def __init__(self, mappings: dict, matchers: dict, combined: KeywordMatcher, entries: list,
+                 stamps: dict, stats: dict, revision: str):
+        self.mappings = mappings
+        self.matchers = matchers
+        self.combined = combined
+        self.entries = entries
+        self.stamps = stamps
+        self.stats = stats
+        self.revision = revision
+
+    @classmethod
+    def build(cls, mappings: dict, stamps: dict, stats: dict) -> "CompiledKeywords":
+        matchers = {cat: KeywordMatcher(m) for cat, m in mappings.items()}
+        index: dict[str, int] = {}
+        entries: list[list] = []
+        for cat, mapping in mappings.items():
+            for pos, (word, weight) in enumerate(mapping.items()):
+                i = index.setdefault(word, len(entries))
+                if i == len(entries):
+                    entries.append([])
+                entries[i].append((cat, pos, weight))
+        combined = KeywordMatcher(dict.fromkeys(index, 0.0))
+        revision = hashlib.sha1(json.dumps(mappings).encode("utf-8")).hexdigest()[:12]
+        return cls(mappings, matchers, combined, [tuple(e) for e in entries], stamps, stats, revision)
+
+    def to_state(self) -> dict:
+        """Inhalt des Artefakts; nur Grundtypen und KeywordMatcher."""
+        return {
+            "format": MODEL_FORMAT,
+            "mappings": self.mappings,
+            "matchers": self.matchers,
+            "combined": self.combined,
+            "entries": self.entries,
+            "stamps": self.stamps,
+            "stats": self.stats,
+            "revision": self.revision,
+        }
+
+    @classmethod
+    def from_state(cls, data: dict) -> "CompiledKeywords":
+        return cls(data["mappings"], data["matchers"], data["combined"], data["entries"],
+                   data["stamps"], data["stats"], data["revision"])
+
+    def scores(self, text: str) -> dict[str, int]:
+        """
+        Scores aller Kategorien mit einem Durchlauf über text (normalisiert,
+        klein). Pro Kategorie werden die Gewichte in Mapping-Reihenfolge
+        addiert – bitgleich zu matchers[cat].score(text).
+        """
+        hits: dict[str, list] = {}
+        for i in self.combined.find(text):
+            for cat, pos, weight in self.entries[i]:
+                hits.setdefault(cat, []).append((pos, weight))
+        out = dict.fromkeys(self.mappings, 0)
+        for cat, found in hits.items():
+            found.sort()
+            score = 0.0
+            for _, weight in found:
+                score += weight * 100.0
+            out[cat] = int(score)
+        return out
+
+
+def merge_sources(base_dir: str = BASE_DIR) -> tuple[dict, dict]:
+    """
+    Führt Keyword-Dateien und word_ratings.json zu {Kategorie: {keyword: weight}}
+    zusammen. Keywords werden normalisiert (NFC, klein) und dedupliziert –
+    bei gleichen Keywords gilt das höhere Gewicht, die Reihenfolge des
+    ersten Vorkommens bleibt. Aus word_ratings.json kommen nur Wörter dazu,
+    die in der Keyword-Datei der Kategorie fehlen (Gewicht = rating);
+    Kategorien ohne eigene Datei bekommen ein eigenes Mapping.
+    Gibt (mappings, stats) zurück.
+    """
+    mappings: dict[str, dict[str, float]] = {}
+    stats = {"duplicates": 0, "from_ratings": 0}
+    for category, filename in KEYWORD_FILES.items():
+        mapping: dict[str, float] = {}
+        for word, weight in _load_json(base_dir, filename, {}).items():
+            key, weight = normalize_word(word), float(weight)
+            if key in mapping:
+                stats["duplicates"] += 1
+                weight = max(weight, mapping[key])
+            mapping[key] = weight
+        mappings[category] = mapping
+
+    from_files = {cat: set(m) for cat, m in mappings.items()}
+    for entry in _load_json(base_dir, RATINGS_FILE, []):
+        try:
+            key = normalize_word(entry["word"])
+            category = normalize_category(entry["category"])
+            weight = float(entry["rating"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if key in from_files.get(category, ()):
+            continue
+        mapping = mappings.setdefault(category, {})
+        if key in mapping:
+            stats["duplicates"] += 1
+            weight = max(weight, mapping[key])
+        else:
+            stats["from_ratings"] += 1
+        mapping[key] = weight
+    return mappings, stats
+
+
+def compile_model(base_dir: str = BASE_DIR, path: str | None = None) -> CompiledKeywords:
+    """Baut das Modell aus den Quellen und schreibt es nach path (Standard: keywords.model)."""
+    stamps = source_stamps(base_dir)
+    mappings, stats = merge_sources(base_dir)
+    model = CompiledKeywords.build(mappings, stamps, stats)
+    data = pickle.dumps(model.to_state(), protocol=pickle.HIGHEST_PROTOCOL)
+    try:
+        atomic_write_bytes(path or os.path.join(base_dir, os.path.basename(MODEL_PATH)), data, fsync=False)
+    except OSError as e:
+        print(f"Warnung: Keyword-Modell konnte nicht gespeichert werden: {e}")
+    return model
+
+
+def load_model(path: str = MODEL_PATH) -> CompiledKeywords | None:
+    """Das gespeicherte Modell, None wenn es fehlt oder unlesbar ist."""
+    try:
+        with open(path, "rb") as f:
+            data = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception:
+        print(f"Warnung: Keyword-Modell {path} ist unlesbar und wird neu gebaut.")
+        return None
+    if not isinstance(data, dict) or data.get("format") != MODEL_FORMAT:
+        return None
+    return CompiledKeywords.from_state(data)
+
+
+# ----------------------------
+# Laufzeit: aktuelles Modell mit Hot-Reload
+# ----------------------------
+
+class KeywordModel:
+    """
+    Hält das aktuelle kompilierte Modell. current() prüft höchstens alle
+    check_seconds die Quelldateien (nur stat) und lädt bzw. baut das Modell
+    neu, wenn sie sich geändert haben – ein laufender Prozess (die App)
+    übernimmt neue Gewichte also ohne Neustart. Das alte Modell bleibt
+    gültig, bis das neue fertig ist; der Tausch ist eine Zuweisung.
+    """
+
+    def __init__(self, base_dir: str = BASE_DIR, path: str | None = None,
+                 check_seconds: float = CHECK_SECONDS):
+        self.base_dir = base_dir
+        self.path = path or os.path.join(base_dir, os.path.basename(MODEL_PATH))
+        self.check_seconds = check_seconds
+        self.reloads = 0
+        self._lock = threading.Lock()
+        self._model: CompiledKeywords | None = None
+        self._checked = 0.0
+        if hasattr(os, "register_at_fork"):
+            # Ein per fork gestarteter Worker erbt das Modell, aber nie ein gehaltenes Lock
+            ref = weakref.ref(self)
+            os.register_at_fork(after_in_child=lambda: ref() is not None and ref()._reset_lock())
+
+    def _reset_lock(self) -> None:
+        self._lock = threading.Lock()
+
+    def current(self) -> CompiledKeywords:
+        model = self._model
+        if model is not None and time.monotonic() - self._checked < self.check_seconds:
+            return model
+        with self._lock:
+            if self._model is None or time.monotonic() - self._checked >= self.check_seconds:
+                stamps = source_stamps(self.base_dir)
+                if self._model is None or self._model.stamps != stamps:
+                    self._model = self._load(stamps)
+                    self.reloads += 1
+                self._checked = time.monotonic()
+            return self._model
+
+    def _load(self, stamps: dict) -> CompiledKeywords:
+        model = load_model(self.path)
+        if model is None or model.stamps != stamps:
+            model = compile_model(self.base_dir, self.path)
+        return model
+
+
+if __name__ == "__main__":
+    import sys
+
+    if sys.argv[1:2] != ["compile"]:
+        print("Aufruf: python keyword_model.py compile")
+        sys.exit(2)
+    t0 = time.perf_counter()
+    compiled = compile_model()
+    t1 = time.perf_counter()
+    load_model()
+    t2 = time.perf_counter()
+    print(f"{MODEL_PATH}: Revision {compiled.revision}")
+    for cat, mapping in compiled.mappings.items():
+        print(f"  {cat}: {len(mapping)} Keywords")
+    print(f"  {compiled.stats['duplicates']} Duplikate zusammengeführt, "
+          f"{compiled.stats['from_ratings']} Wörter aus {RATINGS_FILE}")
+    print(f"Kompilieren {(t1 - t0) * 1000:.0f} ms, Laden {(t2 - t1) * 1000:.1f} ms")
@@ -0,0 +1,123 @@
+# likes.py Like handling for the app: in-memory aggregation of likes with batched, time-bounded persistence.
+#
+# Wie lange ein Like höchstens nur im Speicher liegt, steuert
+# AGGREPAGE_LIKE_FLUSH_SECONDS (Standard 1.0; 0 = jedes Like sofort schreiben).
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+import categorize_worker
+from storage import get_storage
+
+LIKE_FLUSH_SECONDS = float(os.environ.get("AGGREPAGE_LIKE_FLUSH_SECONDS", "1.0"))
+LIKE_FLUSH_MAX_PENDING = 200  # so viele offene Posts lösen sofort ein Schreiben aus
+LIKE_KW_CACHE_SIZE = 2048     # Keyword-Scores der zuletzt gelikten Posts (LRU)
+
+
+class LikeBuffer:
+    """
+    Sammelt Likes als Zähler pro Post und schreibt sie gebündelt über
+    Storage.add_likes: spätestens flush_seconds nach dem ersten offenen
+    Like oder sobald max_pending Posts offen sind. Beim Schreiben werden
+    die Zähler auf den dann gespeicherten Stand addiert, ein Worker-Lauf
+    dazwischen wird also nicht überschrieben.
+    Der Keyword-Anteil des Scores wird pro Post gecacht (gültig, solange
+    Titel, Beschreibung, Kategorie und Keyword-Modell gleich bleiben); ein
+    Like rechnet nur Likes und Frische neu. Der Cache hält höchstens
+    kw_cache_size Posts, die am längsten nicht gelikten fallen heraus.
+    """
+
+    def __init__(self, store=None, flush_seconds: float = LIKE_FLUSH_SECONDS,
+                 max_pending: int = LIKE_FLUSH_MAX_PENDING, kw_cache_size: int = LIKE_KW_CACHE_SIZE):
+        self._store = store
+        self.flush_seconds = flush_seconds
+        self.max_pending = max_pending
+        self.flushes = 0
+        self._lock = threading.RLock()
+        self._pending: dict[str, int] = {}
+        self._timer: threading.Timer | None = None
+        self.kw_cache_size = max(1, int(kw_cache_size))
+        self._kw_cache: OrderedDict[str, tuple] = OrderedDict()
+
+    @property
+    def store(self):
+        return self._store if self._store is not None else get_storage()
+
+    def keyword_score(self, post: dict) -> int:
+        key = (
+            post.get("title", "") or "",
+            post.get("description", "") or "",
+            post.get("auto_category") or "international",
+        )
+        revision = categorize_worker.keyword_model().revision
+        post_id = post.get("id")
+        with self._lock:
+            cached = self._kw_cache.get(post_id)
+            if cached is not None and cached[0] == (key, revision):
+                self._kw_cache.move_to_end(post_id)
+                return cached[1]
+        score = categorize_worker.keyword_score_from_json(*key)
+        with self._lock:
+            self._kw_cache[post_id] = ((key, revision), score)
+            self._kw_cache.move_to_end(post_id)
+            while len(self._kw_cache) > self.kw_cache_size:
+                self._kw_cache.popitem(last=False)
+        return score
+
+    def rescore(self, post: dict, now: float | None = None) -> None:
+        """Setzt auto_score wie compute_points, mit gecachtem Keyword-Anteil."""
+        if now is None:
+            now = datetime.now().timestamp()
+        likes = int(post.get("likes") or 0)
+        created_at = int(post.get("created_at") or 0)
+        post["auto_score"] = int(
+            categorize_worker.likes_and_freshness(likes, created_at, now) + self.keyword_score(post)
+        )
+
+    def like(self, post_id: str) -> dict | None:
+        """
+        Zählt ein Like für post_id und gibt den Post mit allen offenen Likes
+        und neuem Score zurück, None wenn es den Post nicht gibt.
+        """
+        with self._lock:
+            post = self.store.get_post(post_id)
+            if post is None:
+                return None
+            n = self._pending.get(post_id, 0) + 1
+            self._pending[post_id] = n
+            post["likes"] = int(post.get("likes") or 0) + n
+            self.rescore(post)
+
+            if self.flush_seconds <= 0 or len(self._pending) >= self.max_pending:
+                self.flush()
+            else:
+                self._schedule()
+        return post
+
+    def _schedule(self) -> None:
+        if self._timer is None:
+            self._timer = threading.Timer(self.flush_seconds, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def pending(self) -> int:
+        with self._lock:
+            return sum(self._pending.values())
+
+    def flush(self) -> None:
+        """Schreibt alle offenen Likes; bei einem Fehler bleiben sie offen und es gibt einen neuen Versuch."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pending:
+                return
+            try:
+                self.store.add_likes(self._pending, self.rescore)
+            except Exception:
+                if self.flush_seconds > 0:
+                    self._schedule()
+                raise
+            self._pending = {}
+            self.flushes += 1
@@ -0,0 +1,374 @@
+# metrics.py In-process metrics (counters, gauges, histograms) in Prometheus text format, plus structured worker-run summaries.
+#
+# Alles lebt im Speicher des Prozesses; die App zeigt es unter /metrics
+# (Prometheus-Textformat 0.0.4). Ein Messpunkt kostet ein paar hundert
+# Nanosekunden (Lock + Dict-Zugriff), die Messung bleibt also im Betrieb an.
+# Abschalten mit AGGREPAGE_METRICS=0.
+#
+# Jeder Worker-Lauf (scrape, categorize) schreibt am Ende eine Zeile JSON
+# nach worker_runs.jsonl: Phasen, Feeds, Storage-Zugriffe, Ergebnisse.
+import contextvars
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+RUNS_LOG_PATH = os.path.join(BASE_DIR, "worker_runs.jsonl")
+RUNS_LOG_MAX_BYTES = 1024 * 1024  # danach wird nach worker_runs.jsonl.1 rotiert
+
+ENABLED = os.environ.get("AGGREPAGE_METRICS", "1") != "0"
+
+# Sekunden; von 1 ms (304, Cache-Treffer) bis 30 s (ganzer Scrape-Lauf)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PHASE_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values: dict[tuple, object] = {}
+
+    def _key(self, labels: dict) -> tuple:
+        if len(labels) != len(self.labels):
+            raise ValueError(f"{self.name}: Labels {sorted(labels)} statt {list(self.labels)}")
+        return tuple(str(labels[n]) for n in self.labels)
+
+    def _label_str(self, key: tuple, extra: tuple = ()) -> str:
+        pairs = [*zip(self.labels, key), *extra]
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in pairs) + "}"
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values = {}
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+            lines += self._render_items(items)
+        return lines
+
+    def _render_items(self, items) -> list[str]:
+        return [f"{self.name}{self._label_str(key)} {_format_value(v)}" for key, v in items]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        if not ENABLED:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        if not ENABLED:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Histogram(_Metric):
+    """Feste Buckets; pro Label-Kombination [Zähler pro Bucket, Summe, Anzahl]."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        if not ENABLED:
+            return
+        key = self._key(labels)
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][i] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, **labels)
+
+    def snapshot(self, **labels) -> tuple[float, int]:
+        """(Summe, Anzahl) für eine Label-Kombination."""
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return (state[1], state[2]) if state else (0.0, 0)
+
+    def _render_items(self, items) -> list[str]:
+        lines = []
+        for key, (counts, total, n) in items:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = (("le", _format_value(bound)),)
+                lines.append(f"{self.name}_bucket{self._label_str(key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{self._label_str(key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{self._label_str(key)} {n}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: dict[str, _Metric] = {}
+
+    def _get(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metrik {name} existiert bereits als {metric.kind}")
+            return metric
+
+    def counter(self, name: str, help: str, labels: tuple = ()) -> Counter:
+        return self._get(Counter, name, help, labels)
+
+    def gauge(self, name: str, help: str, labels: tuple = ()) -> Gauge:
+        return self._get(Gauge, name, help, labels)
+
+    def histogram(self, name: str, help: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help, labels, buckets)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for m in metrics:
+            lines += m.render()
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# ----------------------------
+# Die Metriken der App
+# ----------------------------
+
+HTTP_SECONDS = REGISTRY.histogram(
+    "aggrepage_http_request_duration_seconds", "Dauer der Flask-Requests bis zur Antwort",
+    ("method", "route", "status"),
+)
+STORAGE_SECONDS = REGISTRY.histogram(
+    "aggrepage_storage_duration_seconds", "Lesen/Schreiben der Datenbank (load_db/save_db)",
+    ("backend", "op"),
+)
+STORAGE_BYTES = REGISTRY.counter(
+    "aggrepage_storage_bytes_total", "Gelesene bzw. geschriebene Bytes der Datenbankdatei",
+    ("backend", "op"),
+)
+FEED_SECONDS = REGISTRY.histogram(
+    "aggrepage_feed_fetch_duration_seconds", "Laden und Parsen eines Feeds", ("source",),
+)
+FEED_FETCHES = REGISTRY.counter(
+    "aggrepage_feed_fetches_total", "Feed-Abrufe nach Ergebnis (HTTP-Status, 304 aus Cache, error)",
+    ("source", "status"),
+)
+FEED_ENTRIES = REGISTRY.gauge(
+    "aggrepage_feed_entries", "Gelesene Einträge im letzten Abruf eines Feeds (bis zum Limit)", ("source",),
+)
+RELOAD_PHASE_SECONDS = REGISTRY.histogram(
+    "aggrepage_reload_phase_duration_seconds", "Dauer der Schritte eines Reload-Jobs", ("phase",),
+    buckets=PHASE_BUCKETS,
+)
+WORKER_PHASE_SECONDS = REGISTRY.histogram(
+    "aggrepage_worker_phase_duration_seconds", "Dauer der Phasen innerhalb eines Worker-Laufs",
+    ("worker", "phase"), buckets=PHASE_BUCKETS,
+)
+WORKER_LAST_RUN = REGISTRY.gauge(
+    "aggrepage_worker_last_run_timestamp_seconds", "Ende des letzten Worker-Laufs (Unix-Zeit)", ("worker",),
+)
+FEED_POLL_INTERVAL = REGISTRY.gauge(
+    "aggrepage_feed_poll_interval_seconds", "Aktuelles Abfrage-Intervall des Ingest-Daemons pro Feed", ("source",),
+)
+INGEST_LAG_SECONDS = REGISTRY.histogram(
+    "aggrepage_ingest_lag_seconds", "Zeit von der Veröffentlichung bis zum Speichern eines neuen Artikels",
+    ("category",), buckets=(60.0, 120.0, 300.0, 600.0, 900.0, 1800.0, 3600.0, 7200.0, 21600.0, 86400.0),
+)
+
+
+def render() -> str:
+    return REGISTRY.render()
+
+
+# ----------------------------
+# Worker-Läufe
+# ----------------------------
+
+# Der Lauf des aktuellen Kontexts: jeder Job-Thread setzt seinen eigenen,
+# FetchPool.run reicht ihn an die Download-Threads weiter.
+_current_run: contextvars.ContextVar["WorkerRun | None"] = contextvars.ContextVar("worker_run", default=None)
+
+
+class WorkerRun:
+    """
+    Sammelt die Kennzahlen eines Worker-Laufs: Phasen (phase()), Feeds
+    und Storage-Zugriffe (über record_feed / record_storage, solange der
+    Lauf im aufrufenden Kontext aktiv ist – parallele Läufe in anderen
+    Threads und Requests der App zählen nicht mit) und beliebige Ergebnisse
+    in counts. Als Kontextmanager aktiv; am Ende wird die Zusammenfassung
+    nach worker_runs.jsonl geschrieben und als eine Zeile ausgegeben.
+    """
+
+    def __init__(self, worker: str, log_path: str | None = RUNS_LOG_PATH):
+        self.worker = worker
+        self.log_path = log_path
+        self.started_at = time.time()
+        self.phases: dict[str, float] = {}
+        self.feeds: list[dict] = []
+        self.storage: dict[str, dict] = {}
+        self.counts: dict = {}
+        self.error: str | None = None
+        self._lock = threading.Lock()
+        self._t0 = time.perf_counter()
+        self._token: contextvars.Token | None = None
+
+    def __enter__(self) -> "WorkerRun":
+        self._token = _current_run.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self._token is not None:
+            _current_run.reset(self._token)
+            self._token = None
+        if exc is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        self.finish()
+
+    @contextmanager
+    def phase(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - t0
+            self.phases[name] = round(self.phases.get(name, 0.0) + seconds, 4)
+            WORKER_PHASE_SECONDS.observe(seconds, worker=self.worker, phase=name)
+
+    def _add_feed(self, feed: dict) -> None:
+        with self._lock:
+            self.feeds.append(feed)
+
+    def _add_storage(self, op: str, seconds: float, nbytes: int | None) -> None:
+        with self._lock:
+            s = self.storage.setdefault(op, {"count": 0, "seconds": 0.0, "bytes": 0})
+            s["count"] += 1
+            s["seconds"] = round(s["seconds"] + seconds, 4)
+            s["bytes"] += nbytes or 0
+
+    def summary(self) -> dict:
+        with self._lock:
+            feeds = sorted(self.feeds, key=lambda f: -f["seconds"])
+            statuses: dict[str, int] = {}
+            for f in feeds:
+                statuses[f["status"]] = statuses.get(f["status"], 0) + 1
+            return {
+                "worker": self.worker,
+                "started_at": datetime.fromtimestamp(self.started_at).isoformat(timespec="seconds"),
+                "seconds": round(time.perf_counter() - self._t0, 3),
+                "error": self.error,
+                "phases": dict(self.phases),
+                "counts": dict(self.counts),
+                "storage": {op: dict(v) for op, v in self.storage.items()},
+                "feed_status": statuses,
+                "feeds": feeds,  # langsamste zuerst
+            }
+
+    def finish(self) -> dict:
+        summary = self.summary()
+        WORKER_LAST_RUN.set(time.time(), worker=self.worker)
+        short = {k: summary[k] for k in ("worker", "seconds", "phases", "counts")}
+        if summary["feeds"]:
+            short["feed_status"] = summary["feed_status"]
+        print("Laufzusammenfassung: " + json.dumps(short, ensure_ascii=False))
+        if self.log_path:
+            try:
+                append_run_log(self.log_path, summary)
+            except OSError as e:
+                print(f"Warnung: Laufzusammenfassung konnte nicht geschrieben werden: {e}")
+        return summary
+
+
+def append_run_log(path: str, summary: dict) -> None:
+    try:
+        if os.path.getsize(path) > RUNS_LOG_MAX_BYTES:
+            os.replace(path, path + ".1")
+    except FileNotFoundError:
+        pass
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(summary, ensure_ascii=False, sort_keys=True) + "\n")
+
+
+def worker_run(worker: str, log_path: str | None = RUNS_LOG_PATH) -> WorkerRun:
+    return WorkerRun(worker, log_path)
+
+
+def record_feed(source: str, category: str, seconds: float, status, entries: int, posts: int) -> None:
+    """Ein Feed-Abruf: Metriken und, falls ein Worker-Lauf aktiv ist, dessen Zusammenfassung."""
+    status = str(status)
+    FEED_SECONDS.observe(seconds, source=source)
+    FEED_FETCHES.inc(source=source, status=status)
+    FEED_ENTRIES.set(entries, source=source)
+    feed = {"source": source, "category": category, "seconds": round(seconds, 4),
+            "status": status, "entries": entries, "posts": posts}
+    run = _current_run.get()
+    if run is not None:
+        run._add_feed(feed)
+
+
+def record_storage(backend: str, op: str, seconds: float, nbytes: int | None = None) -> None:
+    STORAGE_SECONDS.observe(seconds, backend=backend, op=op)
+    if nbytes is not None:
+        STORAGE_BYTES.inc(nbytes, backend=backend, op=op)
+    run = _current_run.get()
+    if run is not None:
+        run._add_storage(op, seconds, nbytes)
@@ -0,0 +1,186 @@
+# persist.py Crash-safe file persistence shared by storage, progress and feed cache: atomic replace, cross-process lock, version conflicts.
+import json
+import os
+import tempfile
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class VersionConflict(Exception):
+    """Die Daten wurden seit dem Lesen (expected_version) von jemand anderem geschrieben."""
+
+    def __init__(self, expected: int, actual: int):
+        super().__init__(f"Version {actual} statt erwarteter {expected}")
+        self.expected = expected
+        self.actual = actual
+
+
+class CorruptFileError(Exception):
+    """Eine Datendatei existiert, ist aber kein gültiges JSON."""
+
+
+# ----------------------------
+# Atomares Schreiben
+# ----------------------------
+
+def _fsync_dir(path: str) -> None:
+    if fcntl is None:  # Verzeichnisse lassen sich unter Windows nicht öffnen
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _write_temp(path: str, write, mode: str, fsync: bool) -> tuple[str, os.stat_result]:
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, mode, encoding=None if "b" in mode else "utf-8") as f:
+            write(f)
+            f.flush()
+            if fsync:
+                os.fsync(f.fileno())
+            st = os.fstat(f.fileno())
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return tmp, st
+
+
+def write_temp_json(path: str, obj, fsync: bool = True, default=None) -> tuple[str, os.stat_result]:
+    """
+    Schreibt obj in eine temporäre Datei neben path und gibt (tmp, stat)
+    zurück. Erst replace_file() macht sie unter path sichtbar.
+    default wird an json.dump durchgereicht.
+    """
+    return _write_temp(path, lambda f: json.dump(obj, f, ensure_ascii=False, default=default), "w", fsync)
+
+
+def replace_file(tmp: str, path: str, fsync: bool = True) -> None:
+    """Ersetzt path atomar durch tmp; Leser sehen die alte oder die neue Datei, nie eine halbe."""
+    try:
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    if fsync:
+        _fsync_dir(os.path.dirname(os.path.abspath(path)))
+
+
+def atomic_write_json(path: str, obj, fsync: bool = True) -> os.stat_result:
+    """Temporäre Datei + fsync + rename. Gibt den stat der neuen Datei zurück."""
+    tmp, st = write_temp_json(path, obj, fsync)
+    replace_file(tmp, path, fsync)
+    return st
+
+
+def atomic_write_bytes(path: str, data: bytes, fsync: bool = True) -> os.stat_result:
+    """Wie atomic_write_json, für Binärdaten."""
+    tmp, st = _write_temp(path, lambda f: f.write(data), "wb", fsync)
+    replace_file(tmp, path, fsync)
+    return st
+
+
+def read_json(path: str, default=None):
+    """
+    Liest path als JSON. Fehlt die Datei oder ist sie leer, kommt default
+    zurück; ist sie nicht lesbar, gibt es CorruptFileError statt leerer Daten.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            content = f.read()
+    except FileNotFoundError:
+        return default
+    except UnicodeDecodeError as e:
+        raise CorruptFileError(f"{path}: {e}") from e
+    if not content.strip():
+        return default
+    try:
+        return json.loads(content)
+    except json.JSONDecodeError as e:
+        raise CorruptFileError(f"{path}: {e}") from e
+
+
+def file_stamp(path: str):
+    """(inode, mtime_ns, size) – ändert sich bei jedem atomaren Ersetzen; None, wenn die Datei fehlt."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat_stamp(st)
+
+
+def stat_stamp(st: os.stat_result):
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+
+# ----------------------------
+# Prozessübergreifende Sperre
+# ----------------------------
+
+class FileLock:
+    """
+    Exklusive Sperre über eine Lock-Datei, gültig über Prozessgrenzen
+    (fcntl.flock, unter Windows msvcrt.locking). Innerhalb einer Instanz
+    reentrant; zwischen Threads schützt sie nicht – der Aufrufer hält
+    dafür zusätzlich eine threading-Sperre.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd: int | None = None
+        self._depth = 0
+
+    def acquire(self) -> None:
+        if self._depth == 0:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                _lock_fd(fd)
+            except BaseException:
+                os.close(fd)
+                raise
+            self._fd = fd
+        self._depth += 1
+
+    def release(self) -> None:
+        self._depth -= 1
+        if self._depth == 0:
+            fd, self._fd = self._fd, None
+            try:
+                _unlock_fd(fd)
+            finally:
+                os.close(fd)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+if fcntl is not None:
+    def _lock_fd(fd: int) -> None:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+
+    def _unlock_fd(fd: int) -> None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+else:
+    def _lock_fd(fd: int) -> None:
+        os.lseek(fd, 0, os.SEEK_SET)
+        while True:
+            try:
+                msvcrt.locking(fd, msvcrt.LK_LOCK, 1)  # versucht es selbst 10 s lang
+                return
+            except OSError:
+                continue
+
+    def _unlock_fd(fd: int) -> None:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
@@ -0,0 +1,160 @@
+# post_record.py Compact __slots__ record for posts held in memory, converted to and from the JSON dict shape at the edges.
+import sys
+
+# Felder mit eigenem Slot: die Schlüssel aus scrape_worker.make_post (+ thumb, sources, Klassifikator-Felder)
+FIELDS = (
+    "id",
+    "source",
+    "title",
+    "description",
+    "url",
+    "created_at",
+    "auto_category",
+    "auto_score",
+    "likes",
+    "manual_category",
+    "thumb",
+    "sources",
+    "feed_category",
+    "category_confidence",
+)
+_FIELD_SET = frozenset(FIELDS)
+
+# Werte, die sich über tausende Posts wiederholen: einmal im Speicher
+INTERNED = frozenset(("source", "auto_category", "manual_category"))
+
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+class _Layout:
+    """
+    Schlüsselreihenfolge eines Posts; alle Posts mit denselben Schlüsseln
+    teilen sich eine Instanz. Für jede Reihenfolge werden – wie bei
+    dataclasses – einmal eigene Funktionen zum Befüllen und Zurückwandeln
+    erzeugt, ohne Schleife und getattr pro Feld.
+    """
+
+    __slots__ = ("keys", "fill", "to_dict", "copy")
+
+    def __init__(self, keys: tuple):
+        self.keys = keys
+        fields = [k for k in keys if k in _FIELD_SET]
+        extra = [k for k in keys if k not in _FIELD_SET]
+        fill = [f"    p.{k} = {'_intern(' if k in INTERNED else '('}d[{k!r}])" for k in fields]
+        fill.append("    p._extra = {" + ", ".join(f"{k!r}: d[{k!r}]" for k in extra) + "}" if extra
+                    else "    p._extra = None")
+        items = ", ".join(f"{k!r}: p.{k}" if k in _FIELD_SET else f"{k!r}: p._extra[{k!r}]" for k in keys)
+        copy = [f"    q.{k} = p.{k}" for k in fields]
+        src = (
+            "def fill(p, d):\n" + "\n".join(fill) + "\n"
+            "def to_dict(p):\n    return {" + items + "}\n"
+            "def copy(p, q):\n" + ("\n".join(copy) or "    pass") + "\n"
+        )
+        ns = {"_intern": _intern}
+        exec(src, ns)
+        self.fill = ns["fill"]
+        self.to_dict = ns["to_dict"]
+        self.copy = ns["copy"]
+
+
+_LAYOUTS: dict[tuple, _Layout] = {}
+
+
+def _layout(keys: tuple) -> _Layout:
+    layout = _LAYOUTS.get(keys)
+    if layout is None:
+        if not all(type(k) is str for k in keys):
+            raise TypeError("Post-Schlüssel müssen Strings sein")
+        layout = _LAYOUTS.setdefault(keys, _Layout(keys))
+    return layout
+
+
+class Post:
+    """
+    Ein Post mit festen Slots statt eines dicts pro Datensatz; source und
+    Kategorien sind interniert. Die Schlüsselreihenfolge des Original-dicts
+    hält ein geteiltes _Layout, to_dict() liefert also dasselbe dict in
+    derselben Reihenfolge – from_dict(d).to_dict() == d, auch als JSON.
+    Unbekannte Schlüssel landen in _extra. Lesend verhält sich ein Post wie ein
+    Mapping (get, [], in, keys), damit Index- und Ranking-Code beide
+    Formen nimmt.
+    """
+
+    __slots__ = FIELDS + ("_layout", "_extra")
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Post":
+        if type(data) is cls:
+            return data.copy()
+        post = cls.__new__(cls)
+        layout = _layout(tuple(data))
+        layout.fill(post, data)
+        post._layout = layout
+        return post
+
+    def to_dict(self) -> dict:
+        return self._layout.to_dict(self)
+
+    def copy(self) -> "Post":
+        post = Post.__new__(Post)
+        self._layout.copy(self, post)
+        post._layout = self._layout
+        post._extra = dict(self._extra) if self._extra else None
+        return post
+
+    # ---- lesender Mapping-Zugriff ----
+
+    def __getitem__(self, key):
+        if key in _FIELD_SET:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self._extra and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        if key in _FIELD_SET:
+            return getattr(self, key, default)
+        if self._extra:
+            return self._extra.get(key, default)
+        return default
+
+    def __contains__(self, key) -> bool:
+        if key in _FIELD_SET:
+            return hasattr(self, key)
+        return bool(self._extra) and key in self._extra
+
+    def keys(self):
+        return self._layout.keys
+
+    def __iter__(self):
+        return iter(self._layout.keys)
+
+    def __len__(self) -> int:
+        return len(self._layout.keys)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Post):
+            other = other.to_dict()
+        return self.to_dict() == other
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"Post({self.to_dict()!r})"
+
+
+def as_dict(obj) -> dict:
+    """Eigene dict-Kopie eines Posts, egal ob Post oder dict."""
+    return obj.to_dict() if type(obj) is Post else dict(obj)
+
+
+def json_default(obj):
+    """default= für json.dump: Posts werden als ihr dict geschrieben."""
+    if type(obj) is Post:
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
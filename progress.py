@@ -0,0 +1,108 @@
+# progress.py Throttled, atomic reload progress reporting to reload_status.json, shared by the workers.
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+from persist import atomic_write_json
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STATUS_PATH = os.path.join(BASE_DIR, "reload_status.json")
+
+STATUS_MAX_WRITES_PER_SEC = 4.0
+STATUS_MIN_PERCENT_STEP = 5
+
+
+class ProgressReporter:
+    """
+    Fasst Fortschrittsmeldungen zusammen, statt jede einzeln zu schreiben.
+    Geschrieben wird, wenn sich der Schritt ändert, ein Fehler gemeldet wird,
+    der Fortschritt um min_step Prozent gewachsen ist oder seit dem letzten
+    Schreiben 1/max_rate Sekunden vergangen sind. Alles andere bleibt als
+    letzter Stand liegen und wird mit flush() bzw. dem nächsten Schreiben
+    nachgeholt. Geschrieben wird atomar über persist.atomic_write_json.
+    """
+
+    def __init__(self, path: str = STATUS_PATH, max_rate: float = STATUS_MAX_WRITES_PER_SEC,
+                 min_step: int = STATUS_MIN_PERCENT_STEP):
+        self.path = path
+        self.min_interval = 1.0 / max_rate if max_rate > 0 else 0.0
+        self.min_step = min_step
+        self.writes = 0
+        self._lock = threading.Lock()
+        self._state: dict | None = None
+        self._written: dict | None = None
+        self._last_write = 0.0
+        self._listeners: list = []
+
+    def add_listener(self, fn) -> None:
+        """fn(status) wird nach jedem tatsächlichen Schreiben aufgerufen."""
+        self._listeners.append(fn)
+
+    def update(self, step: str, percent: int, error=None, current_title=None, force: bool = False) -> None:
+        state = {
+            "step": step,
+            "percent": int(percent),
+            "error": error,
+            "current_title": current_title,
+        }
+        with self._lock:
+            self._state = state
+            last = self._written
+            due = (
+                force
+                or last is None
+                or error is not None
+                or state["step"] != last["step"]
+                or state["percent"] - last["percent"] >= self.min_step
+                or state["percent"] < last["percent"]
+                or time.monotonic() - self._last_write >= self.min_interval
+            )
+            if due:
+                self._write(state)
+
+    def done(self, step: str, error=None) -> None:
+        self.update(step, 100, error, None, force=True)
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._state is not None and self._state is not self._written:
+                self._write(self._state)
+
+    def current(self) -> dict | None:
+        with self._lock:
+            return dict(self._state) if self._state else None
+
+    def _write(self, state: dict) -> None:
+        data = dict(state)
+        data["time"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        data = {k: data[k] for k in ("step", "percent", "time", "error", "current_title")}
+        atomic_write_json(self.path, data, fsync=False)  # Fortschritt muss keinen Absturz überleben
+        self._written = state
+        self._last_write = time.monotonic()
+        self.writes += 1
+        for fn in self._listeners:
+            fn(data)
+
+
+def read_status(path: str = STATUS_PATH) -> dict:
+    """Letzter geschriebener Stand aus reload_status.json."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+_reporter: ProgressReporter | None = None
+_reporter_lock = threading.Lock()
+
+
+def get_reporter() -> ProgressReporter:
+    """Der im Prozess geteilte Reporter für STATUS_PATH."""
+    global _reporter
+    with _reporter_lock:
+        if _reporter is None:
+            _reporter = ProgressReporter()
+        return _reporter
@@ -0,0 +1,128 @@
+# ranking.py Maintained per-category ranking of posts by auto_score with cursor pagination for /api/posts.
+from bisect import bisect_left, bisect_right, insort
+
+from selection import iter_diverse
+
+
+def _score(post: dict):
+    return post.get("auto_score", 0) or 0
+
+
+def encode_cursor(post: dict) -> str:
+    """Cursor hinter post: "<auto_score>:<id>"."""
+    return f"{_score(post)}:{post.get('id')}"
+
+
+def decode_cursor(cursor: str) -> tuple[float, str]:
+    """Umkehrung von encode_cursor; ValueError bei kaputtem Cursor."""
+    score, sep, post_id = cursor.partition(":")
+    if not sep:
+        raise ValueError(f"invalid cursor: {cursor!r}")
+    return float(score), post_id
+
+
+class RankingIndex:
+    """
+    Posts sortiert nach auto_score, je Kategorie und über alle Posts.
+    Die Schlüssel sind (-auto_score, seq) mit seq = Position in der
+    Post-Liste, damit gleiche Scores in derselben Reihenfolge stehen wie
+    bei sorted(posts, key=auto_score, reverse=True). Doppelte ids zählen
+    einmal, der erste Eintrag gewinnt (wie get_post). upsert()/delete()
+    halten die Listen per bisect sortiert, top() liest nur die ersten
+    limit Einträge. Nicht thread-sicher – der Aufrufer hält seine Sperre.
+    """
+
+    def __init__(self, posts: list[dict]):
+        self._posts: dict[int, dict] = {}      # seq -> post
+        self._seqs: dict[str, int] = {}        # id -> seq
+        self._all: list[tuple] = []
+        self._by_cat: dict[str, list[tuple]] = {}
+        self._next = 0
+        for p in posts:
+            if p.get("id") not in self._seqs:
+                self._add(p, sort=False)
+        self._all.sort()
+        for keys in self._by_cat.values():
+            keys.sort()
+
+    def __len__(self) -> int:
+        return len(self._posts)
+
+    def _lists_for(self, post: dict) -> list[list[tuple]]:
+        category = post.get("auto_category")
+        if not category:
+            return [self._all]
+        return [self._all, self._by_cat.setdefault(category, [])]
+
+    def _add(self, post: dict, sort: bool = True) -> None:
+        seq = self._next
+        self._next += 1
+        self._posts[seq] = post
+        self._seqs[post.get("id")] = seq
+        key = (-_score(post), seq)
+        for keys in self._lists_for(post):
+            if sort:
+                insort(keys, key)
+            else:
+                keys.append(key)
+
+    def _unlink(self, seq: int) -> None:
+        post = self._posts[seq]
+        key = (-_score(post), seq)
+        for keys in self._lists_for(post):
+            del keys[bisect_left(keys, key)]
+
+    def upsert(self, post: dict) -> None:
+        """Ersetzt den Post mit derselben id an seiner Position, sonst wird angehängt."""
+        seq = self._seqs.get(post.get("id"))
+        if seq is None:
+            self._add(post)
+            return
+        self._unlink(seq)
+        self._posts[seq] = post
+        key = (-_score(post), seq)
+        for keys in self._lists_for(post):
+            insort(keys, key)
+
+    def delete(self, post_id: str) -> None:
+        seq = self._seqs.pop(post_id, None)
+        if seq is not None:
+            self._unlink(seq)
+            del self._posts[seq]
+
+    def _cursor_key(self, cursor: str) -> tuple:
+        """Schlüssel, hinter dem die Seite ab cursor beginnt."""
+        score, post_id = decode_cursor(cursor)
+        seq = self._seqs.get(post_id)
+        if seq is not None and _score(self._posts[seq]) == score:
+            return (-score, seq)
+        return (-score, float("inf"))
+
+    def top(self, category: str | None = None, limit: int = 50,
+            cursor: str | None = None, per_source: int | None = None) -> tuple[list[dict], str | None]:
+        """
+        Die limit besten Posts (ab cursor) und der Cursor für die nächste
+        Seite (None am Ende). Existiert der Cursor-Post nicht mehr mit
+        demselben Score, geht es nach allen Posts mit diesem Score weiter.
+        per_source begrenzt die Posts pro Quelle über alle Seiten hinweg
+        (selection.iter_diverse); gelesen wird dann nur bis zur Seite.
+        """
+        keys = self._by_cat.get(category, []) if category else self._all
+        if per_source is not None:
+            return self._top_diverse(keys, limit, cursor, per_source)
+        start = bisect_right(keys, self._cursor_key(cursor)) if cursor else 0
+        page = [self._posts[seq] for _, seq in keys[start:start + limit]]
+        more = start + limit < len(keys)
+        return page, (encode_cursor(page[-1]) if page and more else None)
+
+    def _top_diverse(self, keys: list[tuple], limit: int, cursor: str | None,
+                     per_source: int) -> tuple[list[dict], str | None]:
+        after = self._cursor_key(cursor) if cursor else None
+        page = []
+        for post in iter_diverse((self._posts[seq] for _, seq in keys), per_source=per_source):
+            if after is not None and (-_score(post), self._seqs[post.get("id")]) <= after:
+                continue
+            if len(page) == limit:
+                return page, (encode_cursor(page[-1]) if page else None)
+            page.append(post)
+        return page, None
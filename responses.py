@@ -0,0 +1,130 @@
+# responses.py JSON responses for the API: streaming encoder, gzip/brotli compression and strong ETags from the DB revision.
+#
+# Antworten mit revision bekommen ein starkes ETag (Stand der DB +
+# Kodierung). Schickt der Client es als If-None-Match zurück und hat sich
+# nichts geändert, gibt es 304, ohne dass die Daten gelesen oder
+# serialisiert werden. Cache-Control: no-cache lässt den Browser bei jedem
+# Poll nachfragen – die Antwort ist dann meist ein leeres 304.
+import gzip
+import json
+import zlib
+
+from flask import Response, request
+
+from post_record import json_default
+
+try:
+    import brotli
+except ImportError:  # optional, sonst nur gzip
+    brotli = None
+
+COMPRESS_MIN_BYTES = 1024  # kleinere Antworten gehen unkomprimiert raus
+STREAM_CHUNK_BYTES = 64 * 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+_encoder = json.JSONEncoder(ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=json_default)
+
+
+def _encodings() -> list[str]:
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def _choose_encoding() -> str | None:
+    return request.accept_encodings.best_match(_encodings())
+
+
+def _etag(revision: str, encoding: str | None) -> str:
+    # Starkes ETag gilt pro Repräsentation: komprimiert und unkomprimiert unterscheiden sich
+    return f"{revision}.{encoding or 'identity'}"
+
+
+# ----------------------------
+# Kodieren / Komprimieren
+# ----------------------------
+
+def encode_json(obj) -> bytes:
+    return _encoder.encode(obj).encode("utf-8")
+
+
+def iter_json(obj, chunk_bytes: int = STREAM_CHUNK_BYTES):
+    """obj als JSON in Blöcken von etwa chunk_bytes, ohne den ganzen String zu bauen."""
+    buf, size = [], 0
+    for part in _encoder.iterencode(obj):
+        buf.append(part)
+        size += len(part)
+        if size >= chunk_bytes:
+            yield "".join(buf).encode("utf-8")
+            buf, size = [], 0
+    if buf:
+        yield "".join(buf).encode("utf-8")
+
+
+def compress(body: bytes, encoding: str | None) -> bytes:
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return body
+
+
+def compress_stream(chunks, encoding: str | None):
+    """Komprimiert einen Block-Strom fortlaufend; ohne encoding unverändert."""
+    if encoding is None:
+        yield from chunks
+        return
+    if encoding == "gzip":
+        comp = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # 31: gzip-Header, mtime 0
+        process, finish = comp.compress, comp.flush
+    else:
+        comp = brotli.Compressor(quality=BROTLI_QUALITY)
+        process, finish = comp.process, comp.finish
+    for chunk in chunks:
+        out = process(chunk)
+        if out:
+            yield out
+    yield finish()
+
+
+# ----------------------------
+# Antworten
+# ----------------------------
+
+def json_response(build, revision: str | None = None, stream: bool = False,
+                  headers: dict | None = None) -> Response:
+    """
+    Antwort mit dem JSON von build(). Mit revision (Storage.revision(),
+    VOR den Daten gelesen, damit das ETag nie neuer ist als die Daten)
+    kommt 304, wenn If-None-Match passt – build() läuft dann gar nicht.
+    stream=True schreibt das JSON blockweise statt als einen String.
+    build() darf ein Tupel (obj, headers) liefern, etwa für X-Next-Cursor.
+    """
+    encoding = _choose_encoding()
+    out_headers = {"Vary": "Accept-Encoding"}
+    if revision is not None:
+        out_headers["Cache-Control"] = "no-cache"
+        # kleine Antworten gehen auch bei Accept-Encoding unkomprimiert raus
+        for etag in {_etag(revision, encoding), _etag(revision, None)}:
+            if request.if_none_match.contains_weak(etag):
+                out_headers["ETag"] = f'"{etag}"'
+                return Response(status=304, headers=out_headers)
+
+    obj = build()
+    if isinstance(obj, tuple):
+        obj, extra = obj
+        out_headers.update(extra)
+    out_headers.update(headers or {})
+
+    if stream:
+        chunks = iter_json(obj)
+    else:
+        body = encode_json(obj)
+        if len(body) < COMPRESS_MIN_BYTES:
+            encoding = None
+    if encoding is not None:
+        out_headers["Content-Encoding"] = encoding
+    if revision is not None:
+        out_headers["ETag"] = f'"{_etag(revision, encoding)}"'
+    if stream:
+        return Response(compress_stream(chunks, encoding), mimetype="application/json", headers=out_headers)
+    return Response(compress(body, encoding), mimetype="application/json", headers=out_headers)
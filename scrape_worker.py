@@ -1,13 +1,23 @@
 # scrape_worker.py This program fetches news articles from various RSS feeds and Reddit.
+import contextvars
 import json
-import os
+import re
+import threading
 import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from urllib.parse import urlsplit
 
 import feedparser
 import requests
 
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-NEWSDB_PATH = os.path.join(BASE_DIR, "newsdb.json")
+import dedupe
+import feed_stream
+import metrics
+from feed_cache import FeedCache
+from progress import get_reporter
+from storage import get_storage
 
 # ----------------------------
 # Feeds pro Kategorie
@@ -140,21 +150,110 @@ REDDIT_HEADERS = {
     "User-Agent": "aggrepage/1.0 by yourname"
 }
 
+REDDIT_URL = "https://www.reddit.com/r/{sub}/top.json?limit=20&t=day&raw_json=1"
+REDDIT_BLOCKLIST = ["trump", "maga"]  # rausfiltern
+
+FEED_HEADERS = {
+    "User-Agent": "aggrepage/1.0 (+feedparser)"
+}
+
+# ----------------------------
+# Nebenläufiges Laden
+# ----------------------------
+
+FETCH_MAX_WORKERS = 16       # parallele Downloads insgesamt
+FETCH_MAX_PER_HOST = 2       # parallele Downloads pro Host (host:port)
+FETCH_TIMEOUT = 15.0         # Sekunden pro Feed, Verbindung + Download
+FETCH_CONNECT_TIMEOUT = 5.0
+
+FetchResult = namedtuple("FetchResult", ["url", "status", "headers", "content"])
+
+
+class FetchPool:
+    """
+    Begrenzter Thread-Pool für die Feed-Downloads.
+    max_workers begrenzt die Downloads insgesamt, max_per_host pro Host,
+    timeout gilt pro Feed für Verbindungsaufbau und Body zusammen.
+    """
+
+    def __init__(self, max_workers: int = FETCH_MAX_WORKERS, max_per_host: int = FETCH_MAX_PER_HOST,
+                 timeout: float = FETCH_TIMEOUT):
+        self.max_workers = max(1, int(max_workers))
+        self.max_per_host = max(1, int(max_per_host))
+        self.timeout = float(timeout)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="fetch")
+        self._host_slots: dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+
+    def _slot(self, url: str) -> threading.BoundedSemaphore:
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = self._host_slots[host] = threading.BoundedSemaphore(self.max_per_host)
+            return slot
+
+    def _session(self) -> requests.Session:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def get(self, url: str, headers: dict | None = None) -> FetchResult:
+        """Lädt url vollständig; Timeouts und Netzwerkfehler werden als Exception geworfen."""
+        with self._slot(url):
+            deadline = time.monotonic() + self.timeout
+            resp = self._session().get(
+                url,
+                headers=headers,
+                stream=True,
+                timeout=(min(FETCH_CONNECT_TIMEOUT, self.timeout), self.timeout),
+            )
+            try:
+                chunks = []
+                for chunk in resp.iter_content(64 * 1024):
+                    chunks.append(chunk)
+                    if time.monotonic() > deadline:
+                        raise requests.Timeout(f"Feed-Timeout nach {self.timeout:.0f}s")
+            finally:
+                resp.close()
+        return FetchResult(resp.url, resp.status_code, dict(resp.headers), b"".join(chunks))
+
+    def run(self, jobs: list) -> list:
+        """
+        Führt die Callables parallel aus, Ergebnisse kommen in Job-Reihenfolge zurück.
+        Jeder Job läuft in einer Kopie des aufrufenden Kontexts, damit record_feed
+        den aktiven Worker-Lauf findet.
+        """
+        futures = [self._executor.submit(contextvars.copy_context().run, job) for job in jobs]
+        return [f.result() for f in futures]
+
 # ----------------------------
 # Hilfsfunktionen
 # ----------------------------
 
 
+_TAG_RE = re.compile(r"<[^>]+>")
+
+
 def ts_from_entry(entry) -> int:
     if getattr(entry, "published_parsed", None):
-        import time as _time
-        return int(_time.mktime(entry.published_parsed))
+        return int(time.mktime(entry.published_parsed))
     return int(time.time())
 
 
 def strip_tags(text: str) -> str:
-    import re
-    return re.sub(r"<[^>]+>", " ", text or "")
+    return _TAG_RE.sub(" ", text or "")
 
 
 def make_post(category: str, source_name: str, title: str, desc: str, url: str, created_ts: int) -> dict:
@@ -172,24 +271,99 @@ def make_post(category: str, source_name: str, title: str, desc: str, url: str,
     }
 
 
-def load_existing_lists_comments() -> dict:
-    if not os.path.exists(NEWSDB_PATH):
-        return {"lists": {"fundgrube": []}, "comments": []}
-    try:
-        with open(NEWSDB_PATH, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        return {
-            "lists": data.get("lists", {"fundgrube": []}),
-            "comments": data.get("comments", []),
-        }
-    except Exception:
-        return {"lists": {"fundgrube": []}, "comments": []}
+# ----------------------------
+# Inkrementeller Import
+# ----------------------------
 
+POST_MAX_AGE_DAYS = 14
+
+# Signaturen des Bestands für die Beinahe-Duplikate, geteilt von Reload und Ingest im selben Prozess
+DEDUPE_INDEX = dedupe.DedupeIndex()
+
+# Felder, die aus dem Feed kommen und bei einem erneuten Fund aktualisiert werden.
+# Alles andere (likes, auto_score, manual_category, ...) gehört der App bzw. dem
+# categorize_worker und bleibt erhalten.
+FEED_FIELDS = ("title", "description", "thumb")
+
+
+def merge_posts(existing: list[dict], fresh: list[dict], max_age_days: float = POST_MAX_AGE_DAYS,
+                now: float | None = None, near_duplicates: bool = True,
+                pruned: set[str] = frozenset(), index: dedupe.DedupeIndex | None = None) -> tuple[list[dict], dict]:
+    """
+    Führt frisch geladene Posts mit dem Bestand zusammen.
+    Dedupliziert über id und url, hängt nur neue Posts an, aktualisiert bei
+    bekannten Posts die Feed-Felder und entfernt Posts älter als max_age_days.
+    Mit near_duplicates fallen außerdem neue Posts weg, die dieselbe
+    Geschichte unter anderer URL sind (dedupe.py); ihre Quelle zählt beim
+    kanonischen Post unter "sources" mit. index (DEDUPE_INDEX) hält die
+    Signaturen des Bestands zwischen den Läufen, gehasht werden dann nur
+    neue und geänderte Posts; ohne index wird der Bestand jedes Mal gehasht. Neue Posts, deren id oder url in
+    pruned steht (von categorize aussortiert, Storage.pruned_keys), kommen
+    nicht wieder herein.
+    Gibt (posts, changes) zurück; changes enthält die Listen added und
+    updated (Posts), expired (ids) und die Anzahl duplicates.
+    """
+    now = time.time() if now is None else now
+    cutoff = now - max_age_days * 86400 if max_age_days else None
+
+    merged: list[dict] = []
+    by_key: dict[str, dict] = {}
+    added: list[dict] = []
+    updated: list[dict] = []
+    expired: list[str] = []
+    for p in existing:
+        if cutoff is not None and int(p.get("created_at") or 0) < cutoff:
+            expired.append(p.get("id"))
+            continue
+        merged.append(p)
+        for key in (p.get("id"), p.get("url")):
+            if key:
+                by_key.setdefault(key, p)
+
+    seen_updates: set[int] = set()
+    for p in fresh:
+        if cutoff is not None and int(p.get("created_at") or 0) < cutoff:
+            continue
+        old = by_key.get(p.get("id")) or by_key.get(p.get("url"))
+        if old is None:
+            if p.get("id") in pruned or p.get("url") in pruned:
+                continue
+            merged.append(p)
+            for key in (p.get("id"), p.get("url")):
+                if key:
+                    by_key[key] = p
+            added.append(p)
+            continue
 
-def save_newsdb(posts: list[dict], lists: dict, comments: list[dict]) -> None:
-    data = {"posts": posts, "comments": comments, "lists": lists}
-    with open(NEWSDB_PATH, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+        changed = False
+        for field in FEED_FIELDS:
+            if field in p and old.get(field) != p[field]:
+                old[field] = p[field]
+                changed = True
+        # Reddit-Ups wachsen – User-Likes dürfen dabei nicht verloren gehen
+        if int(p.get("likes") or 0) > int(old.get("likes") or 0):
+            old["likes"] = int(p["likes"])
+            changed = True
+        if changed and id(old) not in seen_updates:
+            seen_updates.add(id(old))
+            updated.append(old)
+
+    duplicates = 0
+    if near_duplicates and added:
+        fresh_ids = {id(p) for p in added}
+        # gespeicherte Posts (Likes, Kommentare) bleiben, verworfen werden nur neue
+        stored = [p for p in merged if id(p) not in fresh_ids]
+        kept, canonicals = (index if index is not None else dedupe.DedupeIndex()).collapse(stored, added)
+        duplicates = len(added) - len(kept)
+        kept_ids = {id(p) for p in kept}
+        merged = [p for p in merged if id(p) not in fresh_ids or id(p) in kept_ids]
+        added = kept
+        for p in canonicals:
+            if id(p) not in fresh_ids and id(p) not in seen_updates:
+                seen_updates.add(id(p))
+                updated.append(p)
+
+    return merged, {"added": added, "updated": updated, "expired": expired, "duplicates": duplicates}
 
 
 # ----------------------------
@@ -197,32 +371,97 @@ def save_newsdb(posts: list[dict], lists: dict, comments: list[dict]) -> None:
 # ----------------------------
 
 
-def fetch_category(category: str, feeds: list[dict]) -> list[dict]:
+def _feed_done(name: str, category: str, started: float, status, posts: list[dict],
+               entries: int | None = None) -> tuple[object, list[dict]]:
+    """Meldet einen fertigen Feed-Abruf an metrics und gibt (status, posts) zurück."""
+    metrics.record_feed(name, category, time.perf_counter() - started, status,
+                        len(posts) if entries is None else entries, len(posts))
+    return status, posts
+
+
+def is_failure(status) -> bool:
+    """Status aus poll_feed/poll_reddit_sub: Abruf fehlgeschlagen (Netzwerk, Parser, HTTP 4xx/5xx)?"""
+    return status == "error" or (isinstance(status, int) and status >= 400)
+
+
+def feed_entries(content: bytes, max_entries: int, headers: dict | None = None) -> list[feed_stream.FeedEntry]:
+    """
+    Die ersten max_entries Einträge eines Feeds. Wohlgeformtes RSS/RDF/Atom
+    liest feed_stream inkrementell und hört beim Limit auf; alles andere
+    geht wie bisher durch feedparser.
+    """
+    headers = headers or {}
+    entries = feed_stream.parse_entries(content, max_entries, headers.get("content-location", ""))
+    if entries is not None:
+        return entries
+    feed = feedparser.parse(content, response_headers=headers)
+    return [
+        feed_stream.FeedEntry(
+            getattr(entry, "link", "") or "",
+            getattr(entry, "title", "") or "",
+            getattr(entry, "summary", "") or "",
+            ts_from_entry(entry) if getattr(entry, "published_parsed", None) else None,
+        )
+        for entry in getattr(feed, "entries", [])[:max_entries]
+    ]
+
+
+def fetch_feed(pool: FetchPool, category: str, src: dict, cache: FeedCache | None = None) -> list[dict]:
+    return poll_feed(pool, category, src, cache)[1]
+
+
+def poll_feed(pool: FetchPool, category: str, src: dict,
+              cache: FeedCache | None = None) -> tuple[object, list[dict]]:
+    """Wie fetch_feed, gibt aber (status, posts) zurück: HTTP-Status, 304 aus dem Cache oder "error"."""
+    started = time.perf_counter()
+    name = src["name"]
+    url = src["url"]
+    max_entries = MAX_ENTRIES_BY_SOURCE.get(name, DEFAULT_MAX_PER_FEED)
+
+    req_headers = dict(FEED_HEADERS)
+    if cache is not None:
+        req_headers.update(cache.conditional_headers(url))
+
+    try:
+        res = pool.get(url, headers=req_headers)
+        if res.status == 304 and cache is not None:
+            cached = cache.hit(url)
+            if cached is not None:
+                print(f"{category} / {name}: unverändert (304), {len(cached)} Artikel aus Cache")
+                return _feed_done(name, category, started, 304, cached)
+            res = pool.get(url, headers=FEED_HEADERS)
+        headers = {k.lower(): v for k, v in res.headers.items()}
+        headers.setdefault("content-location", res.url)
+        entries = feed_entries(res.content, max_entries, headers)
+    except Exception:
+        print(f"Fehler beim Laden von Feed {name} ({url})")
+        return _feed_done(name, category, started, "error", [])
+
+    print(f"{category} / {name}: {len(entries)} Einträge gelesen (max {max_entries})")
+
     posts: list[dict] = []
-    for src in feeds:
-        name = src["name"]
-        url = src["url"]
-        max_entries = MAX_ENTRIES_BY_SOURCE.get(name, DEFAULT_MAX_PER_FEED)
-
-        try:
-            feed = feedparser.parse(url)
-        except Exception:
-            print(f"Fehler beim Laden von Feed {name} ({url})")
+    now = int(time.time())
+    for entry in entries:
+        if not entry.link:
             continue
+        posts.append(make_post(category, name, entry.title, strip_tags(entry.summary), entry.link,
+                               entry.published or now))
 
-        entries = getattr(feed, "entries", [])
-        print(f"{category} / {name}: {len(entries)} Einträge (verwende max {max_entries})")
+    if cache is not None and res.status == 200:
+        cache.store(url, res.headers, len(res.content), posts)
+    return _feed_done(name, category, started, res.status, posts, len(entries))
 
-        for entry in entries[:max_entries]:
-            link = getattr(entry, "link", None)
-            if not link:
-                continue
-            title = getattr(entry, "title", "") or ""
-            desc_raw = getattr(entry, "summary", "") or ""
-            desc = strip_tags(desc_raw)
-            created_ts = ts_from_entry(entry)
-            posts.append(make_post(category, name, title, desc, link, created_ts))
-    return posts
+
+def fetch_category(category: str, feeds: list[dict], pool: FetchPool | None = None,
+                   cache: FeedCache | None = None) -> list[dict]:
+    own_pool = pool is None
+    pool = pool or FetchPool()
+    try:
+        chunks = pool.run([partial(fetch_feed, pool, category, src, cache) for src in feeds])
+    finally:
+        if own_pool:
+            pool.close()
+    return [p for chunk in chunks for p in chunk]
 
 
 def get_reddit_thumb(d: dict) -> str:
@@ -241,52 +480,126 @@ def get_reddit_thumb(d: dict) -> str:
     return thumb
 
 
-def fetch_reddit_json(subs: list[str]) -> list[dict]:
+def fetch_reddit_sub(pool: FetchPool, sub: str, cache: FeedCache | None = None) -> list[dict]:
+    return poll_reddit_sub(pool, sub, cache)[1]
+
+
+def poll_reddit_sub(pool: FetchPool, sub: str, cache: FeedCache | None = None) -> tuple[object, list[dict]]:
+    """Wie fetch_reddit_sub, gibt aber (status, posts) zurück."""
+    started = time.perf_counter()
+    name = f"r/{sub}"
+    api_url = REDDIT_URL.format(sub=sub)
+    req_headers = dict(REDDIT_HEADERS)
+    if cache is not None:
+        req_headers.update(cache.conditional_headers(api_url))
+
+    try:
+        res = pool.get(api_url, headers=req_headers)
+        if res.status == 304 and cache is not None:
+            cached = cache.hit(api_url)
+            if cached is not None:
+                print(f"reddit_politics / r/{sub}: unverändert (304), {len(cached)} Artikel aus Cache")
+                return _feed_done(name, "reddit_politics", started, 304, cached)
+            res = pool.get(api_url, headers=REDDIT_HEADERS)
+        if res.status != 200:
+            print(f"Reddit {sub}: HTTP {res.status}")
+            return _feed_done(name, "reddit_politics", started, res.status, [])
+        data = json.loads(res.content)
+    except Exception as e:
+        print(f"Fehler beim Laden von Reddit /r/{sub}: {e}")
+        return _feed_done(name, "reddit_politics", started, "error", [])
+
+    children = data.get("data", {}).get("children", [])
+    print(f"reddit_politics / r/{sub}: {len(children)} Einträge")
+
     posts: list[dict] = []
-    blocklist = ["trump", "maga"]  # rausfiltern
-
-    for sub in subs:
-        api_url = f"https://www.reddit.com/r/{sub}/top.json?limit=20&t=day&raw_json=1"
-        try:
-            resp = requests.get(api_url, headers=REDDIT_HEADERS, timeout=10)
-            if resp.status_code != 200:
-                print(f"Reddit {sub}: HTTP {resp.status_code}")
-                continue
-            data = resp.json()
-        except Exception as e:
-            print(f"Fehler beim Laden von Reddit /r/{sub}: {e}")
+    for child in children:
+        d = child.get("data", {})
+        title = d.get("title") or ""
+        if any(b.lower() in title.lower() for b in REDDIT_BLOCKLIST):
             continue
 
-        children = data.get("data", {}).get("children", [])
-        print(f"reddit_politics / r/{sub}: {len(children)} Einträge")
+        thumb = get_reddit_thumb(d)
+        selftext = d.get("selftext") or ""
+        ups = int(d.get("ups") or 0)
+        permalink = d.get("permalink") or ""
+        full_url = "https://www.reddit.com" + permalink if permalink else d.get("url") or ""
+        created_utc = int(d.get("created_utc") or time.time())
+        subreddit = d.get("subreddit") or sub
+
+        text = selftext.strip()
+        desc_parts = [f"/r/{subreddit}"]
+        if text:
+            desc_parts.append(text)
+        desc_parts.append(f"Upvotes: {ups}")
+        desc = "\n\n".join(desc_parts)
+
+        post = make_post("reddit_politics", f"r/{subreddit}", title, desc, full_url, created_utc)
+        post["likes"] = ups
+        if thumb:
+            post["thumb"] = thumb
+        posts.append(post)
+
+    if cache is not None:
+        cache.store(api_url, res.headers, len(res.content), posts)
+    return _feed_done(name, "reddit_politics", started, res.status, posts, len(children))
+
+
+def fetch_reddit_json(subs: list[str], pool: FetchPool | None = None,
+                      cache: FeedCache | None = None) -> list[dict]:
+    own_pool = pool is None
+    pool = pool or FetchPool()
+    try:
+        chunks = pool.run([partial(fetch_reddit_sub, pool, sub, cache) for sub in subs])
+    finally:
+        if own_pool:
+            pool.close()
+    return [p for chunk in chunks for p in chunk]
+
+
+def fetch_all(pool: FetchPool, cache: FeedCache | None = None, progress=None) -> list[dict]:
+    """
+    Lädt alle Feeds aus CATEGORIES und REDDIT_SUBS über einen gemeinsamen Pool.
+    Die Reihenfolge der Artikel ist dieselbe wie beim sequentiellen Laden.
+    Mit cache werden bedingte Requests geschickt (ETag / Last-Modified).
+    progress(done, total, name) wird nach jedem fertigen Feed aufgerufen.
+    """
+    jobs = []
+    labels = []
+    names = []
+    for cat, feeds in CATEGORIES.items():
+        for src in feeds:
+            jobs.append(partial(fetch_feed, pool, cat, src, cache))
+            labels.append(cat)
+            names.append(src["name"])
+    for sub in REDDIT_SUBS:
+        jobs.append(partial(fetch_reddit_sub, pool, sub, cache))
+        labels.append("reddit_politics")
+        names.append(f"r/{sub}")
 
-        for child in children:
-            d = child.get("data", {})
-            title = d.get("title") or ""
-            if any(b.lower() in title.lower() for b in blocklist):
-                continue
+    if progress is not None:
+        done = [0]
+        done_lock = threading.Lock()
+
+        def tracked(job, name):
+            result = job()
+            with done_lock:
+                done[0] += 1
+                n = done[0]
+            progress(n, len(jobs), name)
+            return result
+
+        jobs = [partial(tracked, job, name) for job, name in zip(jobs, names)]
 
-            thumb = get_reddit_thumb(d)
-            selftext = d.get("selftext") or ""
-            ups = int(d.get("ups") or 0)
-            permalink = d.get("permalink") or ""
-            full_url = "https://www.reddit.com" + permalink if permalink else d.get("url") or ""
-            created_utc = int(d.get("created_utc") or time.time())
-            subreddit = d.get("subreddit") or sub
-
-            text = selftext.strip()
-            desc_parts = [f"/r/{subreddit}"]
-            if text:
-                desc_parts.append(text)
-            desc_parts.append(f"Upvotes: {ups}")
-            desc = "\n\n".join(desc_parts)
-
-            post = make_post("reddit_politics", f"r/{subreddit}", title, desc, full_url, created_utc)
-            post["likes"] = ups
-            if thumb:
-                post["thumb"] = thumb
-            posts.append(post)
-    return posts
+    chunks = pool.run(jobs)
+
+    per_cat: dict[str, int] = {}
+    for label, chunk in zip(labels, chunks):
+        per_cat[label] = per_cat.get(label, 0) + len(chunk)
+    for cat, count in per_cat.items():
+        print(f"{cat}: {count} Artikel (nach Limit)")
+
+    return [p for chunk in chunks for p in chunk]
 
 
 # ----------------------------
@@ -294,20 +607,32 @@ def fetch_reddit_json(subs: list[str]) -> list[dict]:
 # ----------------------------
 
 
-def main():
-    all_posts: list[dict] = []
-    meta = load_existing_lists_comments()
-    lists = meta["lists"]
-    comments = meta["comments"]
+def main(incremental: bool = True, max_age_days: float = POST_MAX_AGE_DAYS):
+    with metrics.worker_run("scrape") as run:
+        _scrape(run, incremental, max_age_days)
 
-    for cat, feeds in CATEGORIES.items():
-        cat_posts = fetch_category(cat, feeds)
-        print(f"{cat}: {len(cat_posts)} Artikel (nach Limit)")
-        all_posts.extend(cat_posts)
 
-    reddit_posts = fetch_reddit_json(REDDIT_SUBS)
-    print(f"reddit_politics: {len(reddit_posts)} Artikel")
-    all_posts.extend(reddit_posts)
+def _scrape(run: metrics.WorkerRun, incremental: bool, max_age_days: float) -> None:
+    all_posts: list[dict] = []
+    store = get_storage()
+    reporter = get_reporter()
+    reporter.update("Feeds werden geladen …", 0, force=True)
+
+    def report(done, total, name):
+        reporter.update("Feeds werden geladen …", int(done / max(1, total) * 50), None, name)
+
+    with run.phase("fetch"):
+        cache = FeedCache.load()
+        with FetchPool() as pool:
+            all_posts.extend(fetch_all(pool, cache, report))
+        cache.save()
+    reporter.update("Artikel werden gespeichert …", 55)
+    st = cache.stats()
+    print(
+        f"Feed-Cache: {st['hits']} unverändert (304), {st['misses']} geladen, "
+        f"{st['bytes_saved'] / 1024:.0f} KB gespart, {st['bytes_downloaded'] / 1024:.0f} KB geladen"
+    )
+    run.counts.update(fetched=len(all_posts), cache_hits=st["hits"], bytes_downloaded=st["bytes_downloaded"])
 
     # Statistik pro Quelle ausgeben
     from collections import defaultdict
@@ -320,9 +645,41 @@ def main():
     for src, count in sorted(source_counts.items(), key=lambda x: (-x[1], x[0])):
         print(f"{src}: {count}")
 
-    save_newsdb(all_posts, lists, comments)
-    print(f"\nGesamt {len(all_posts)} Artikel gespeichert.")
+    if not incremental:
+        with run.phase("save"):
+            posts, _ = dedupe.collapse(all_posts)
+            store.replace_posts(posts)
+        run.counts.update(stored=len(posts), duplicates=len(all_posts) - len(posts))
+        print(f"\nGesamt {len(posts)} Artikel gespeichert ({len(all_posts) - len(posts)} Duplikate zusammengeführt).")
+        reporter.update("Feeds geladen", 60, force=True)
+        return
+
+    # Zusammenführen und Schreiben in einer Transaktion: Likes und Kommentare,
+    # die während des Ladens dazukamen, gehen nicht verloren
+    with run.phase("merge"), store.transaction():
+        posts, changes = merge_posts(store.list_posts(), all_posts, max_age_days, pruned=store.pruned_keys(),
+                                     index=DEDUPE_INDEX)
+        added, updated, expired = changes["added"], changes["updated"], changes["expired"]
+        if added or updated or expired:
+            store.update_posts(added + updated, expired)
+    run.counts.update(added=len(added), updated=len(updated), expired=len(expired),
+                      duplicates=changes["duplicates"], stored=len(posts))
+    print(
+        f"\nInkrementell: {len(added)} neu, {len(updated)} aktualisiert, "
+        f"{len(expired)} abgelaufen, {changes['duplicates']} Duplikate zusammengeführt, "
+        f"{len(posts)} im Bestand."
+    )
+    if not (added or updated or expired):
+        print("Keine Änderungen, Datenbank bleibt unverändert.")
+    reporter.update("Feeds geladen", 60, force=True)
 
 
 if __name__ == "__main__":
-    main()
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Feeds laden und in newsdb.json übernehmen")
+    ap.add_argument("--full", action="store_true", help="Bestand verwerfen und alle Posts neu schreiben")
+    ap.add_argument("--max-age-days", type=float, default=POST_MAX_AGE_DAYS,
+                    help="Posts älter als N Tage verwerfen (0 = nie)")
+    args = ap.parse_args()
+    main(incremental=not args.full, max_age_days=args.max_age_days)
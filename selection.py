@@ -0,0 +1,158 @@
+# selection.py Single-pass top-k selection with per-source, per-category and global quotas (worker and /api/posts).
+#
+# Zwei Wege, dieselben Quoten:
+#   DiversitySelector – unsortierte Posts in einem Durchlauf, pro (Kategorie,
+#                       Quelle) ein Heap mit höchstens k Einträgen: O(n log k);
+#                       sortiert wird am Ende nur die Auswahl.
+#   iter_diverse      – schon nach Score sortierte Posts (RankingIndex), lazy
+#                       gefiltert mit Zählern: O(1) pro Post, bricht früh ab.
+from heapq import heappush, heapreplace
+
+
+def _score(post) -> float:
+    return post.get("auto_score", 0) or 0
+
+
+def _category(post) -> str:
+    return post.get("auto_category") or "international"
+
+
+def _source(post) -> str:
+    return post.get("source") or "unknown"
+
+
+def _quota(default: int | None, overrides: dict | None, name: str) -> int | None:
+    """Quote für name: Eintrag in overrides, sonst default; None = unbegrenzt."""
+    if overrides and name in overrides:
+        return overrides[name]
+    return default
+
+
+class DiversitySelector:
+    """
+    Wählt aus einem Strom unsortierter Posts pro Kategorie und Quelle die
+    per_source besten (nach auto_score, bei Gleichstand der frühere Post).
+    source_quotas / category_quotas überschreiben die Quote einzelner
+    Quellen bzw. Kategorien; per_category begrenzt die Auswahl pro
+    Kategorie, limit die Gesamtzahl (die besten über alle Kategorien).
+    Mit by_category=False zählen Quellen über alle Kategorien hinweg und
+    per_category gilt für die ganze Auswahl.
+
+    grouped() liefert dieselbe Reihenfolge wie bisher main() mit
+    sort + Gruppierung + pick_per_source: Kategorien nach ihrem besten
+    Post, darin nach Score, bei gleichem Score Quellen in der Reihenfolge
+    ihres besten Posts. ranked() liefert die Auswahl nach Score (wie
+    RankingIndex).
+    """
+
+    def __init__(self, per_source: int | None = 3, per_category: int | None = None, limit: int | None = None,
+                 source_quotas: dict | None = None, category_quotas: dict | None = None,
+                 by_category: bool = True):
+        self.by_category = by_category
+        self.per_source = per_source
+        self.per_category = per_category
+        self.limit = limit
+        self.source_quotas = source_quotas
+        self.category_quotas = category_quotas
+        # (Kategorie, Quelle) -> Min-Heap (score, -pos, post): oben liegt der schwächste Post
+        self._heaps: dict[tuple[str | None, str], list] = {}
+        self._seen = 0
+
+    def add(self, post) -> None:
+        self.extend((post,))
+
+    def extend(self, posts) -> "DiversitySelector":
+        # Heißer Pfad: ein Durchlauf über alle Posts, daher alles lokal
+        heaps, per_source, overrides, by_category = self._heaps, self.per_source, self.source_quotas, self.by_category
+        pos = self._seen
+        for post in posts:
+            pos += 1
+            source = post.get("source") or "unknown"
+            k = overrides[source] if overrides and source in overrides else per_source
+            key = ((post.get("auto_category") or "international") if by_category else None, source)
+            heap = heaps.get(key)
+            if heap is None:
+                if k is not None and k <= 0:
+                    continue
+                heap = heaps[key] = []
+            score = post.get("auto_score", 0) or 0
+            if k is None or len(heap) < k:
+                heappush(heap, (score, -pos, post))
+            elif score > heap[0][0]:
+                # gleicher Score: der frühere Post bleibt
+                heapreplace(heap, (score, -pos, post))
+        self._seen = pos
+        return self
+
+    def _by_category(self, grouped: bool) -> dict[str, list[tuple]]:
+        """Kategorie -> [(Sortierschlüssel, post)], sortiert und auf die Kategorie-Quote gekürzt."""
+        cats: dict[str, list[tuple]] = {}
+        for (cat, _), heap in self._heaps.items():
+            if not heap:
+                continue
+            best_score, best_neg_pos, _ = max(heap)
+            source_rank = (-best_score, -best_neg_pos)
+            out = cats.setdefault(cat, [])
+            for score, neg_pos, post in heap:
+                key = (-score, source_rank, -neg_pos) if grouped else (-score, -neg_pos)
+                out.append((key, post))
+        for cat, entries in cats.items():
+            entries.sort(key=lambda e: e[0])
+            k = _quota(self.per_category, self.category_quotas, cat)
+            if k is not None:
+                del entries[max(0, k):]
+        return cats
+
+    def _within_limit(self, cats: dict[str, list[tuple]]) -> set[int] | None:
+        """ids (id()) der limit besten Posts über alle Kategorien; None ohne limit."""
+        if self.limit is None:
+            return None
+        ranked = sorted(((-_score(p), key[-1], id(p)) for entries in cats.values() for key, p in entries))
+        return {ident for _, _, ident in ranked[:max(0, self.limit)]}
+
+    def grouped(self) -> list:
+        """Auswahl nach Kategorie gruppiert (Reihenfolge wie früher in main)."""
+        cats = self._by_category(grouped=True)
+        keep = self._within_limit(cats)
+        order = sorted(cats, key=lambda c: min(key[1] for key, _ in cats[c]))
+        return [p for cat in order for _, p in cats[cat] if keep is None or id(p) in keep]
+
+    def ranked(self) -> list:
+        """Auswahl nach Score absteigend, bei Gleichstand in Eingabereihenfolge."""
+        entries = [e for cat_entries in self._by_category(grouped=False).values() for e in cat_entries]
+        entries.sort(key=lambda e: e[0])
+        posts = [p for _, p in entries]
+        return posts if self.limit is None else posts[:max(0, self.limit)]
+
+
+def iter_diverse(ranked_posts, per_source: int | None = None, per_category: int | None = None,
+                 limit: int | None = None, source_quotas: dict | None = None,
+                 category_quotas: dict | None = None):
+    """
+    Filtert einen bereits nach Score sortierten Post-Strom auf die Quoten:
+    ein Post kommt durch, solange seine Quelle (über alle Kategorien des
+    Stroms) und seine Kategorie ihre Quote nicht erreicht haben. Weil die
+    Eingabe sortiert ist, ist das für eine einzelne Kategorie genau
+    DiversitySelector(...).ranked() – ohne Heap und ohne die ganze Eingabe
+    zu lesen.
+    """
+    if limit is not None and limit <= 0:
+        return
+    per_src: dict[str, int] = {}
+    per_cat: dict[str, int] = {}
+    taken = 0
+    for post in ranked_posts:
+        source = _source(post)
+        k = _quota(per_source, source_quotas, source)
+        if k is not None and per_src.get(source, 0) >= k:
+            continue
+        cat = _category(post)
+        k = _quota(per_category, category_quotas, cat)
+        if k is not None and per_cat.get(cat, 0) >= k:
+            continue
+        per_src[source] = per_src.get(source, 0) + 1
+        per_cat[cat] = per_cat.get(cat, 0) + 1
+        yield post
+        taken += 1
+        if limit is not None and taken >= limit:
+            return
@@ -118,12 +118,17 @@ async function loadPosts(view) {
       const catLabel = labelForCategory(p.auto_category || "");
       const showThumb = (currentView !== "reddit_politics") && p.thumb;
       const commentCount = p.comment_count || 0;
+      // Dieselbe Meldung bei weiteren Quellen (Duplikaterkennung im scrape_worker)
+      const others = (p.sources || []).filter(s => s !== source);
+      const sourceHint = others.length
+        ? ` <span title="${others.join(", ")}">+${others.length} ${others.length === 1 ? "Quelle" : "Quellen"}</span>`
+        : "";
 
       return `
         <article class="card ${liked ? "liked" : ""}">
           <div class="card-main">
             <header class="card-header">
-              <div class="card-source">${source || "unbekannt"}</div>
+              <div class="card-source">${source || "unbekannt"}${sourceHint}</div>
               <div class="card-meta-right">
                 ${date ? `<span>${date}</span>` : ""}
                 <span>Punkte: ${score}</span>
@@ -246,8 +251,10 @@ function setupCommentsUI() {
     if (!text) return;
     try {
       await sendComment(postId, text);
-      await populateComments(postId);
       form.reset();
+      // mit Event-Stream kommen Liste und Badge über das "comment"-Event
+      if (streamConnected) return;
+      await populateComments(postId);
 
       // Kommentar-Badge aktualisieren
       const chip = document.querySelector(
@@ -373,12 +380,69 @@ function setupImageModal() {
 
 // ---------- Reload ----------
 
+function sleep(ms) {
+  return new Promise(resolve => setTimeout(resolve, ms));
+}
+
+async function startReload() {
+  // 409: es läuft schon ein Reload – dann auf diesen warten
+  const res = await fetch("/api/reload", { method: "POST" });
+  const data = await res.json();
+  if (res.status === 202 || res.status === 409) return data.job_id;
+  throw new Error(data.error || `HTTP ${res.status}`);
+}
+
+async function pollReload(jobId, btn) {
+  while (true) {
+    const data = await fetchJSON(`/api/reload/${encodeURIComponent(jobId)}`);
+    const pct = (data.status && data.status.percent) || 0;
+    btn.textContent = `Aktualisiere … ${pct}%`;
+    if (data.job.state !== "running") return data.job;
+    await sleep(1000);
+  }
+}
+
+function waitForReload(jobId, btn) {
+  if (!streamConnected) return pollReload(jobId, btn);
+  // Fortschritt und Ende kommen über den Event-Stream
+  return new Promise(resolve => {
+    const offStatus = onStream("status", st => {
+      btn.textContent = `Aktualisiere … ${st.percent || 0}%`;
+    });
+    const offReload = onStream("reload", job => {
+      if (job.id !== jobId) return;
+      offStatus();
+      offReload();
+      offDisconnect();
+      resolve(job);
+    });
+    // Verbindung weg: per Polling weiter warten
+    const offDisconnect = onStream("disconnect", () => {
+      offStatus();
+      offReload();
+      offDisconnect();
+      resolve(pollReload(jobId, btn));
+    });
+    // falls der Job schon fertig war, bevor wir zugehört haben
+    fetchJSON(`/api/reload/${encodeURIComponent(jobId)}`).then(data => {
+      if (data.job.state !== "running") {
+        offStatus();
+        offReload();
+        offDisconnect();
+        resolve(data.job);
+      }
+    }).catch(console.error);
+  });
+}
+
 async function reloadAll() {
   const btn = document.getElementById("reload-btn");
   btn.disabled = true;
   btn.textContent = "Aktualisiere …";
   try {
-    await fetchJSON("/api/reload", { method: "POST" });
+    const jobId = await startReload();
+    const job = await waitForReload(jobId, btn);
+    if (job.state === "error") console.error(job.error);
     await loadStatus();
     await loadPosts(currentView);
     await loadChat();
@@ -392,6 +456,27 @@ async function reloadAll() {
 
 // ---------- Chat ----------
 
+let chatMessages = [];
+
+function renderChat() {
+  const box = document.getElementById("chat-messages");
+  if (!box) return;
+  const msgs = chatMessages;
+  if (!msgs.length) {
+    box.innerHTML = '<p class="empty-text">Noch keine Nachrichten.</p>';
+    return;
+  }
+  box.innerHTML = msgs.map(m => `
+    <div class="activity-item">
+      <div class="activity-meta">
+        <span>${m.author}</span>
+        <span>${tsToDate(m.created_at)}</span>
+      </div>
+      <div class="activity-text">${m.text}</div>
+    </div>
+  `).join("");
+}
+
 async function loadChat() {
   const box = document.getElementById("chat-messages");
   if (!box) return;
@@ -403,20 +488,8 @@ async function loadChat() {
       }
       return;
     }
-    const msgs = await res.json();
-    if (!msgs.length) {
-      box.innerHTML = '<p class="empty-text">Noch keine Nachrichten.</p>';
-      return;
-    }
-    box.innerHTML = msgs.map(m => `
-      <div class="activity-item">
-        <div class="activity-meta">
-          <span>${m.author}</span>
-          <span>${tsToDate(m.created_at)}</span>
-        </div>
-        <div class="activity-text">${m.text}</div>
-      </div>
-    `).join("");
+    chatMessages = await res.json();
+    renderChat();
   } catch (e) {
     console.error(e);
     box.innerHTML = '<p class="empty-text">Fehler beim Laden.</p>';
@@ -448,14 +521,106 @@ function setupChat() {
         return;
       }
       input.value = "";
-      await loadChat();
+      if (!streamConnected) await loadChat();
     } catch (err) {
       console.error(err);
     }
   });
 
-  setInterval(loadChat, 10000);
   loadChat();
+  // ohne EventSource bleibt es beim Polling
+  if (!window.EventSource) startChatPolling();
+}
+
+// Polling als Ersatz, solange der Event-Stream nicht verbunden ist
+let chatPoll = null;
+
+function startChatPolling() {
+  if (!chatPoll) chatPoll = setInterval(loadChat, 10000);
+}
+
+function stopChatPolling() {
+  if (chatPoll) {
+    clearInterval(chatPoll);
+    chatPoll = null;
+  }
+}
+
+// ---------- Live-Updates (SSE) ----------
+
+let streamConnected = false;
+const streamHandlers = {};
+
+function onStream(type, fn) {
+  (streamHandlers[type] = streamHandlers[type] || []).push(fn);
+  return () => {
+    streamHandlers[type] = streamHandlers[type].filter(h => h !== fn);
+  };
+}
+
+function emitStream(type, data) {
+  (streamHandlers[type] || []).forEach(fn => fn(data));
+}
+
+function setupStream() {
+  if (!window.EventSource) return;
+  const source = new EventSource("/api/stream");
+  source.onopen = () => {
+    streamConnected = true;
+    stopChatPolling();
+  };
+  // der Browser verbindet sich selbst neu (und holt Verpasstes über Last-Event-ID);
+  // bis dahin – oder für immer, wenn er aufgibt – per Polling
+  source.onerror = () => {
+    if (streamConnected) emitStream("disconnect");
+    streamConnected = false;
+    startChatPolling();
+  };
+  ["chat", "comment", "status", "reload", "ingest", "resync"].forEach(type => {
+    source.addEventListener(type, (e) => emitStream(type, JSON.parse(e.data)));
+  });
+
+  onStream("chat", msg => {
+    // nach einer Polling-Phase kann die Nachricht schon da sein
+    const seen = chatMessages.some(m =>
+      m.created_at === msg.created_at && m.author === msg.author && m.text === msg.text);
+    if (seen) return;
+    chatMessages = chatMessages.concat([msg]).slice(-50);
+    renderChat();
+  });
+
+  onStream("comment", c => {
+    const chip = document.querySelector(
+      `.chip-comments[data-post-id="${CSS.escape(c.post_id)}"]`
+    );
+    if (chip) {
+      const next = parseInt(chip.dataset.count || "0", 10) + 1;
+      chip.dataset.count = String(next);
+      chip.textContent = `${next} Kommentare`;
+    }
+    const modal = document.getElementById("comment-modal");
+    const openId = document.getElementById("comment-post-id").value;
+    if (!modal.classList.contains("hidden") && openId === c.post_id) {
+      populateComments(c.post_id);
+    }
+  });
+
+  onStream("reload", async () => {
+    await loadStatus();
+    if (currentView !== "fundgrube") await loadPosts(currentView);
+  });
+
+  // Ingest-Daemon hat neue Posts gespeichert
+  onStream("ingest", async counts => {
+    if (!counts.added) return;
+    await loadStatus();
+    if (currentView !== "fundgrube") await loadPosts(currentView);
+  });
+
+  onStream("resync", async () => {
+    await loadChat();
+    await loadStatus();
+  });
 }
 
 // ---------- Tabs ----------
@@ -482,6 +647,7 @@ window.addEventListener("DOMContentLoaded", async () => {
   setupFundgrubeAdd();
   setupChat();
   setupImageModal();
+  setupStream();
   await loadStatus();
   await loadPosts("austria");
 });
@@ -0,0 +1,1039 @@
+# storage.py Storage backends for the news database: whole-file JSON (default) and indexed SQLite.
+#
+# Backend wählen über die Umgebungsvariable AGGREPAGE_STORAGE=json|sqlite.
+# Einmalige Migration vom JSON-File nach SQLite:
+#
+#   python storage.py migrate
+#
+# Chat- und Kommentar-Logs des JSON-Backends zusammenfassen:
+#
+#   python storage.py compact
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+
+import metrics
+from applog import AppendLog
+from persist import FileLock, VersionConflict, file_stamp, read_json, replace_file, stat_stamp, write_temp_json
+from post_record import Post, as_dict, json_default
+from ranking import RankingIndex, decode_cursor, encode_cursor
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+NEWSDB_PATH = os.path.join(BASE_DIR, "newsdb.json")
+SQLITE_PATH = os.path.join(BASE_DIR, "newsdb.sqlite3")
+
+STORAGE_BACKEND = os.environ.get("AGGREPAGE_STORAGE", "json")
+
+RANKING_PATCH_MAX = 500  # größere Änderungen: Ranking neu aufbauen statt einzeln patchen
+PRUNED_MAX_AGE_DAYS = 14  # wie scrape_worker.POST_MAX_AGE_DAYS: ältere Posts nimmt merge_posts ohnehin nicht
+
+
+def empty_db() -> dict:
+    return {
+        "posts": [],
+        "comments": [],
+        "lists": {"fundgrube": []},
+        "chat": [],
+    }
+
+
+def _normalize(db: dict) -> dict:
+    db.setdefault("posts", [])
+    db.setdefault("comments", [])
+    db.setdefault("lists", {"fundgrube": []})
+    db.setdefault("chat", [])
+    return db
+
+
+def _tombstones(old: dict, pruned, now: float | None = None) -> dict[str, int]:
+    """
+    Aussortierte Posts: {id oder url: created_at}, ergänzt um pruned und
+    ohne Einträge, die älter als PRUNED_MAX_AGE_DAYS sind.
+    """
+    cutoff = (time.time() if now is None else now) - PRUNED_MAX_AGE_DAYS * 86400
+    out = {k: t for k, t in old.items() if t >= cutoff}
+    for p in pruned:
+        created = _int(p.get("created_at"))
+        if created >= cutoff:
+            for key in (p.get("id"), p.get("url")):
+                if key:
+                    out[key] = created
+    return out
+
+
+def _score(post: dict) -> int:
+    return post.get("auto_score", 0) or 0
+
+
+def _unique_posts(posts: list[dict]) -> list[dict]:
+    """Doppelte ids (gleiche URL aus zwei Feeds) – der erste Eintrag gewinnt, wie bei get_post."""
+    seen = set()
+    out = []
+    for p in posts:
+        pid = p.get("id")
+        if pid in seen:
+            continue
+        seen.add(pid)
+        out.append(p)
+    return out
+
+
+def _apply_post_updates(posts: list[dict], upserts: list[dict], deletes=()) -> list[dict]:
+    """
+    Neue Post-Liste: ein Upsert ersetzt den ersten Post mit derselben id an
+    seiner Stelle (wie get_post), sonst wird er angehängt; deletes fliegen raus.
+    """
+    posts = list(posts)
+    index: dict = {}
+    for i, p in enumerate(posts):
+        index.setdefault(p.get("id"), i)
+    for p in upserts:
+        i = index.get(p.get("id"))
+        if i is None:
+            index[p.get("id")] = len(posts)
+            posts.append(p)
+        else:
+            posts[i] = p
+    if deletes:
+        drop = set(deletes)
+        posts = [p for p in posts if p.get("id") not in drop]
+    return posts
+
+
+class Storage(ABC):
+    """
+    Schnittstelle für die News-DB. Die Basisklasse implementiert alle
+    Operationen über load()/save() auf dem ganzen Dokument; Backends mit
+    zeilenweisem Zugriff überschreiben die einzelnen Methoden.
+    Schreiboperationen laufen in transaction() über Lesen, Ändern und
+    Schreiben. Jedes Schreiben erhöht version(); Worker, die lange
+    rechnen, übergeben die gelesene Version als expected_version und
+    bekommen VersionConflict, wenn zwischendurch jemand geschrieben hat.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+
+    @contextmanager
+    def transaction(self):
+        """Exklusiver Schreibzugriff; Lesen + Schreiben darin sieht keine fremden Änderungen."""
+        with self._lock:
+            yield self
+
+    def version(self) -> int:
+        return int(self.load().get("version") or 0)
+
+    def revision(self, *parts: str) -> str:
+        """
+        Kennung für den Stand der Teile parts ("posts", "lists", "comments",
+        "chat"; ohne Angabe: alles). Ändert sich bei jedem Schreiben darauf,
+        taugt also als ETag. Hier: die Version, die jedes Schreiben erhöht.
+        """
+        return str(self.version())
+
+    def _check_version(self, expected_version: int | None) -> None:
+        if expected_version is not None:
+            actual = self.version()
+            if actual != expected_version:
+                raise VersionConflict(expected_version, actual)
+
+    # ---- ganzes Dokument ----
+
+    @abstractmethod
+    def load(self) -> dict:
+        """Das ganze Dokument als dict (eigene Kopie)."""
+
+    @abstractmethod
+    def save(self, db: dict) -> None:
+        """Ersetzt das ganze Dokument."""
+
+    # ---- Posts ----
+
+    def list_posts(self, category: str | None = None) -> list[dict]:
+        posts = self.load()["posts"]
+        if category:
+            posts = [p for p in posts if p.get("auto_category") == category]
+        return posts
+
+    def top_posts(self, category: str | None = None, limit: int = 50) -> list[dict]:
+        posts = sorted(self.list_posts(category), key=_score, reverse=True)
+        return posts[:limit]
+
+    def page_posts(self, category: str | None = None, limit: int = 50,
+                   cursor: str | None = None, per_source: int | None = None) -> tuple[list[dict], str | None]:
+        """
+        Eine Seite der nach auto_score sortierten Posts ab cursor und der
+        Cursor für die nächste Seite (None am Ende). ValueError bei kaputtem Cursor.
+        per_source: höchstens so viele Posts pro Quelle (über alle Seiten).
+        """
+        return RankingIndex(self.list_posts(category)).top(None, limit, cursor, per_source)
+
+    def count_posts(self) -> int:
+        return len(self.load()["posts"])
+
+    def get_post(self, post_id: str) -> dict | None:
+        for p in self.load()["posts"]:
+            if p.get("id") == post_id:
+                return p
+        return None
+
+    def update_posts(self, upserts: list[dict], deletes: list[str] = (),
+                     expected_version: int | None = None) -> None:
+        """Fügt Posts ein bzw. ersetzt sie (über id) und löscht die Posts in deletes."""
+        with self.transaction():
+            self._check_version(expected_version)
+            db = self.load()
+            db["posts"] = _apply_post_updates(db["posts"], upserts, deletes)
+            self.save(db)
+
+    def update_post(self, post: dict) -> None:
+        self.update_posts([post])
+
+    def add_likes(self, counts: dict[str, int], rescore) -> list[dict]:
+        """
+        Addiert counts {post_id: n} auf die aktuell gespeicherten Likes,
+        ruft rescore(post) auf und schreibt alle Posts in einem Zug.
+        Unbekannte ids werden übersprungen.
+        """
+        with self.transaction():
+            posts = []
+            for post_id, n in counts.items():
+                p = self.get_post(post_id)
+                if p is None:
+                    continue
+                p["likes"] = int(p.get("likes") or 0) + n
+                rescore(p)
+                posts.append(p)
+            if posts:
+                self.update_posts(posts)
+        return posts
+
+    def replace_posts(self, posts: list[dict], expected_version: int | None = None, pruned=()) -> None:
+        """
+        Ersetzt alle Posts. pruned sind bewusst aussortierte Posts (categorize):
+        ihre id und url merkt sich die DB, damit merge_posts sie beim nächsten
+        Laden nicht wieder als neu übernimmt.
+        """
+        with self.transaction():
+            self._check_version(expected_version)
+            db = self.load()
+            db["posts"] = posts
+            db["pruned"] = _tombstones(db.get("pruned", {}), pruned)
+            self.save(db)
+
+    def pruned_keys(self) -> set[str]:
+        """ids und urls der aussortierten Posts (siehe replace_posts)."""
+        return set(self.load().get("pruned", {}))
+
+    # ---- Kommentare ----
+
+    def comments_for(self, post_id: str) -> list[dict]:
+        comments = [c for c in self.load()["comments"] if c.get("post_id") == post_id]
+        comments.sort(key=lambda c: c.get("created_at", 0))
+        return comments
+
+    def comment_counts(self, post_ids: list[str] | None = None) -> dict[str, int]:
+        counts: dict[str, int] = {}
+        for c in self.load()["comments"]:
+            pid = c.get("post_id")
+            if not pid:
+                continue
+            counts[pid] = counts.get(pid, 0) + 1
+        if post_ids is not None:
+            counts = {pid: counts[pid] for pid in post_ids if pid in counts}
+        return counts
+
+    def add_comment(self, comment: dict) -> None:
+        with self.transaction():
+            db = self.load()
+            db["comments"].append(comment)
+            self.save(db)
+
+    # ---- Chat ----
+
+    def recent_chat(self, limit: int = 50) -> list[dict]:
+        """Die letzten limit Nachrichten, älteste zuerst."""
+        msgs = sorted(self.load()["chat"], key=lambda m: m.get("created_at", 0), reverse=True)[:limit]
+        return list(reversed(msgs))
+
+    def add_chat(self, msg: dict) -> None:
+        with self.transaction():
+            db = self.load()
+            db["chat"].append(msg)
+            self.save(db)
+
+    # ---- Listen (Fundgrube) ----
+
+    def get_lists(self) -> dict:
+        return self.load().get("lists", {"fundgrube": []})
+
+    def add_list_item(self, name: str, item: dict) -> dict:
+        """Hängt item an die Liste name an; ohne id wird user_<n> vergeben."""
+        with self.transaction():
+            db = self.load()
+            items = db.setdefault("lists", {}).setdefault(name, [])
+            item.setdefault("id", f"user_{len(items) + 1}")
+            items.append(item)
+            self.save(db)
+        return item
+
+    # ---- Statistik ----
+
+    def stats(self) -> dict:
+        db = self.load()
+        return {
+            "posts_count": len(db.get("posts", [])),
+            "fundgrube_count": len(db.get("lists", {}).get("fundgrube", [])),
+        }
+
+
+def _copy_post(post) -> dict:
+    """Post als eigenes dict; sources ist die einzige Liste darin und wird mitkopiert."""
+    out = as_dict(post)
+    if isinstance(out.get("sources"), list):
+        out["sources"] = list(out["sources"])
+    return out
+
+
+def _copy_doc(db: dict) -> dict:
+    """Kopie mit eigenen Listen und Datensätzen (Posts als dicts, samt eigener sources-Liste)."""
+    out = {k: v for k, v in db.items()}
+    out["posts"] = [_copy_post(p) for p in db.get("posts", [])]
+    for key in ("comments", "chat"):
+        out[key] = [as_dict(x) for x in db.get(key, [])]
+    out["lists"] = {name: [dict(i) for i in items] for name, items in db.get("lists", {}).items()}
+    if "pruned" in db:
+        out["pruned"] = dict(db["pruned"])
+    return out
+
+
+# Welcher Teil des Dokuments eine Sicht speist: ein Schreibzugriff auf
+# einen Teil verwirft nur dessen Sichten.
+_VIEW_SOURCES = {
+    "ranking": "posts",
+    "category": "posts",
+    "post_index": "posts",
+}
+
+
+def log_dir_for(path: str) -> str:
+    """Verzeichnis der Chat-/Kommentar-Logs zu einer DB-Datei: newsdb.json -> newsdb_log/."""
+    return os.path.splitext(path)[0] + "_log"
+
+
+def _view_source(key) -> str:
+    return _VIEW_SOURCES[key[0] if isinstance(key, tuple) else key]
+
+
+class JsonStorage(Storage):
+    """
+    Das bisherige newsdb.json mit einem geteilten, thread-sicheren Lese-Cache.
+    Das geparste Dokument bleibt im Speicher, bis sich die Datei ändert
+    oder der Prozess selbst schreibt. Abgeleitete Sichten (Ranking pro
+    Kategorie, id-Index, ...) hängen am selben Snapshot. Eigene
+    Einzel-Schreibzugriffe (Likes) patchen Ranking und id-Index, statt sie
+    neu aufzubauen.
+
+    Kommentare und Chat liegen nicht in newsdb.json, sondern als
+    append-only JSONL-Logs in newsdb_log/ (siehe applog.py): ein neuer
+    Eintrag ist eine angehängte Zeile. Beim ersten Start werden die
+    bisherigen Einträge aus newsdb.json übernommen; load() setzt das
+    Dokument wieder vollständig zusammen.
+
+    Geschrieben wird über eine temporäre Datei + fsync + rename, unter der
+    Prozess-Sperre und einer Lock-Datei (newsdb.json.lock) für andere
+    Prozesse. Leser nehmen keine der beiden: sie sehen den alten Snapshot,
+    bis die neue Datei vollständig ist, und warten höchstens auf das rename.
+    Nach außen gehen nur Kopien, die Datensätze im Snapshot werden nie verändert.
+    Im Snapshot liegen Posts als kompakte Post-Objekte (post_record.py),
+    nach außen gehen wie bisher dicts.
+    """
+
+    def __init__(self, path: str = NEWSDB_PATH):
+        super().__init__()
+        self.path = path
+        self._file_lock = FileLock(path + ".lock")
+        self._view_lock = threading.RLock()  # Snapshot, Stempel und Sichten
+        self._doc: dict | None = None
+        self._stamp = None
+        self._views: dict = {}
+        log_dir = log_dir_for(path)
+        self._comments = AppendLog(os.path.join(log_dir, "comments"), index_key="post_id")
+        self._chat = AppendLog(os.path.join(log_dir, "chat"))
+        if not os.path.isdir(log_dir):
+            self._import_logs(log_dir)
+
+    def _import_logs(self, log_dir: str) -> None:
+        """Legt die Logs mit comments/chat aus newsdb.json an (atomar per Verzeichnis-rename); die Datei räumt danach _import_stray auf."""
+        with self.transaction():
+            if os.path.isdir(log_dir):
+                return
+            db = read_json(self.path) or {}
+            tmp_dir = f"{log_dir}.{os.getpid()}.tmp"
+            AppendLog(os.path.join(tmp_dir, "comments")).extend(db.get("comments", []))
+            AppendLog(os.path.join(tmp_dir, "chat")).extend(db.get("chat", []))
+            os.makedirs(os.path.join(tmp_dir, "comments"), exist_ok=True)
+            os.makedirs(os.path.join(tmp_dir, "chat"), exist_ok=True)
+            os.replace(tmp_dir, log_dir)
+
+    @contextmanager
+    def transaction(self):
+        with self._lock, self._file_lock:
+            yield self
+
+    def _read_file(self) -> tuple[dict, bool]:
+        """
+        Snapshot aus der Datei; dazu, ob sie noch comments/chat enthält
+        (nach _import_logs oder von einem Schreiber, der die Logs nicht kennt).
+        """
+        t0 = time.perf_counter()
+        db = read_json(self.path)
+        db = _normalize(db) if db is not None else empty_db()
+        db["posts"] = [Post.from_dict(p) for p in db["posts"]]
+        stamp = file_stamp(self.path)
+        metrics.record_storage("json", "read", time.perf_counter() - t0, stamp[1] if stamp else 0)
+        # Kommentare und Chat kommen aus den Logs
+        stray = bool(db.pop("comments", None)) | bool(db.pop("chat", None))
+        return db, stray
+
+    def _import_stray(self) -> None:
+        """
+        comments/chat, die (wieder) in newsdb.json stehen, in die Logs
+        übernehmen – nur was dort noch nicht steht – und die Datei ohne sie
+        neu schreiben. Die Version bleibt: Posts und Listen sind unverändert.
+        """
+        with self.transaction():
+            db = read_json(self.path)
+            if not db:
+                return
+            for log, key in ((self._comments, "comments"), (self._chat, "chat")):
+                records = db.pop(key, None) or []
+                if records:
+                    known = {json.dumps(r, sort_keys=True, default=str) for r in log.records()}
+                    log.extend([r for r in records if json.dumps(r, sort_keys=True, default=str) not in known])
+            tmp, _ = write_temp_json(self.path, db, default=json_default)
+            replace_file(tmp, self.path)
+
+    def _snapshot(self) -> dict:
+        with self._view_lock:
+            stamp = file_stamp(self.path)
+            if self._doc is not None and stamp == self._stamp:
+                return self._doc
+            doc, stray = self._read_file()
+            if not stray:
+                self._doc = doc
+                self._stamp = stamp
+                self._views = {}
+                return doc
+        # außerhalb von _view_lock: transaction() kommt in der Sperr-Reihenfolge davor
+        self._import_stray()
+        return self._snapshot()
+
+    def _view(self, key, build):
+        """Abgeleitete Sicht zum aktuellen Snapshot, gebaut beim ersten Zugriff."""
+        with self._view_lock:
+            doc = self._snapshot()
+            views = self._views
+            if key not in views:
+                views[key] = build(doc)
+            return views[key]
+
+    def _commit(self, doc: dict, changed: str | None, patches: dict | None = None) -> None:
+        """
+        Schreibt doc mit der nächsten Versionsnummer als neuen Snapshot.
+        doc teilt die unveränderten Datensätze mit dem alten Snapshot.
+        Verworfen werden die Sichten auf den Teil changed (None: alle),
+        außer denen in patches {key: fn(view)}, die in place angepasst werden.
+        Aufruf innerhalb von transaction().
+        """
+        t0 = time.perf_counter()
+        doc["version"] = self.version() + 1
+        tmp, st = write_temp_json(self.path, doc, default=json_default)
+        patches = patches or {}
+        with self._view_lock:
+            replace_file(tmp, self.path)
+            metrics.record_storage("json", "write", time.perf_counter() - t0, st.st_size)
+            views = {}
+            if changed is not None:
+                for key, view in self._views.items():
+                    if _view_source(key) != changed:
+                        views[key] = view
+                    elif key in patches:
+                        patches[key](view)
+                        views[key] = view
+            self._doc = doc
+            self._stamp = stat_stamp(st)
+            self._views = views
+
+    # ---- ganzes Dokument ----
+
+    def version(self) -> int:
+        return int(self._snapshot().get("version") or 0)
+
+    def revision(self, *parts: str) -> str:
+        # Kommentare und Chat erhöhen die Version nicht, dafür steht ihre Log-Position
+        parts = parts or ("posts", "lists", "comments", "chat")
+        tags = []
+        if "posts" in parts or "lists" in parts:
+            tags.append(str(self.version()))
+        if "comments" in parts:
+            tags.append(self._comments.position())
+        if "chat" in parts:
+            tags.append(self._chat.position())
+        return "-".join(tags)
+
+    def load(self) -> dict:
+        db = _copy_doc(self._snapshot())
+        db["comments"] = self._comments.records()
+        db["chat"] = self._chat.records()
+        return db
+
+    def save(self, db: dict) -> None:
+        _normalize(db)
+        with self.transaction():
+            doc = _copy_doc(db)
+            for log, key in ((self._comments, "comments"), (self._chat, "chat")):
+                records = doc.pop(key)
+                if records != log.records():
+                    log.replace(records)
+            doc["posts"] = [Post.from_dict(p) for p in doc["posts"]]
+            self._commit(doc, None)
+
+    # ---- Posts ----
+
+    def _ranking(self) -> RankingIndex:
+        return self._view("ranking", lambda doc: RankingIndex(doc["posts"]))
+
+    def _post_index(self) -> dict:
+        def build(doc):
+            index = {}
+            for p in doc["posts"]:
+                index.setdefault(p.get("id"), p)
+            return index
+        return self._view("post_index", build)
+
+    def list_posts(self, category: str | None = None) -> list[dict]:
+        if category:
+            posts = self._view(
+                ("category", category),
+                lambda doc: [p for p in doc["posts"] if p.get("auto_category") == category],
+            )
+        else:
+            posts = self._snapshot()["posts"]
+        return [_copy_post(p) for p in posts]
+
+    def top_posts(self, category: str | None = None, limit: int = 50) -> list[dict]:
+        return self.page_posts(category, limit)[0]
+
+    def page_posts(self, category: str | None = None, limit: int = 50,
+                   cursor: str | None = None, per_source: int | None = None) -> tuple[list[dict], str | None]:
+        with self._view_lock:
+            page, next_cursor = self._ranking().top(category, limit, cursor, per_source)
+            return [_copy_post(p) for p in page], next_cursor
+
+    def count_posts(self) -> int:
+        return len(self._snapshot()["posts"])
+
+    def get_post(self, post_id: str) -> dict | None:
+        with self._view_lock:
+            p = self._post_index().get(post_id)
+            return _copy_post(p) if p is not None else None
+
+    def update_posts(self, upserts: list[dict], deletes: list[str] = (),
+                     expected_version: int | None = None) -> None:
+        upserts = [Post.from_dict(p) for p in upserts]
+        deletes = list(deletes)
+
+        def patch_ranking(ranking):
+            for p in upserts:
+                ranking.upsert(p)
+            for pid in deletes:
+                ranking.delete(pid)
+
+        def patch_index(index):
+            for p in upserts:
+                index[p.get("id")] = p
+            for pid in deletes:
+                index.pop(pid, None)
+
+        patches = {}
+        if len(upserts) + len(deletes) <= RANKING_PATCH_MAX:
+            patches = {"ranking": patch_ranking, "post_index": patch_index}
+        with self.transaction():
+            self._check_version(expected_version)
+            doc = self._snapshot()
+            posts = _apply_post_updates(doc["posts"], upserts, deletes)
+            self._commit(dict(doc, posts=posts), "posts", patches)
+
+    def replace_posts(self, posts: list[dict], expected_version: int | None = None, pruned=()) -> None:
+        with self.transaction():
+            self._check_version(expected_version)
+            doc = self._snapshot()
+            self._commit(dict(doc, posts=[Post.from_dict(p) for p in posts],
+                              pruned=_tombstones(doc.get("pruned", {}), pruned)), "posts")
+
+    def pruned_keys(self) -> set[str]:
+        return set(self._snapshot().get("pruned", {}))
+
+    # ---- Kommentare ----
+
+    def comments_for(self, post_id: str) -> list[dict]:
+        comments = self._comments.lookup(post_id)
+        comments.sort(key=lambda c: c.get("created_at", 0))
+        return comments
+
+    def comment_counts(self, post_ids: list[str] | None = None) -> dict[str, int]:
+        counts = self._comments.counts()
+        if post_ids is None:
+            return {pid: n for pid, n in counts.items() if pid}
+        return {pid: counts[pid] for pid in post_ids if pid and pid in counts}
+
+    def add_comment(self, comment: dict) -> None:
+        self._comments.append(comment)
+
+    # ---- Chat ----
+
+    def recent_chat(self, limit: int = 50) -> list[dict]:
+        """Die letzten limit geschriebenen Nachrichten (vom Ende des Logs gelesen), nach created_at sortiert."""
+        msgs = self._chat.tail(limit)
+        msgs.sort(key=lambda m: m.get("created_at", 0))
+        return msgs
+
+    def add_chat(self, msg: dict) -> None:
+        self._chat.append(msg)
+
+    def compact_logs(self, include_active: bool = False) -> dict:
+        return {
+            "comments": self._comments.compact(include_active),
+            "chat": self._chat.compact(include_active),
+        }
+
+    # ---- Listen (Fundgrube) ----
+
+    def get_lists(self) -> dict:
+        lists = self._snapshot().get("lists", {"fundgrube": []})
+        return {name: [dict(i) for i in items] for name, items in lists.items()}
+
+    def add_list_item(self, name: str, item: dict) -> dict:
+        with self.transaction():
+            doc = self._snapshot()
+            lists = dict(doc.get("lists", {}))
+            items = list(lists.get(name, []))
+            item.setdefault("id", f"user_{len(items) + 1}")
+            items.append(dict(item))
+            lists[name] = items
+            self._commit(dict(doc, lists=lists), "lists")
+        return item
+
+    # ---- Statistik ----
+
+    def stats(self) -> dict:
+        doc = self._snapshot()
+        return {
+            "posts_count": len(doc.get("posts", [])),
+            "fundgrube_count": len(doc.get("lists", {}).get("fundgrube", [])),
+        }
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    category TEXT,
+    auto_score INTEGER NOT NULL DEFAULT 0,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_posts_category_score ON posts (category, auto_score DESC, seq);
+CREATE INDEX IF NOT EXISTS idx_posts_score ON posts (auto_score DESC, seq);
+
+CREATE TABLE IF NOT EXISTS comments (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    post_id TEXT,
+    created_at INTEGER NOT NULL DEFAULT 0,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_comments_post ON comments (post_id, created_at, seq);
+
+CREATE TABLE IF NOT EXISTS chat (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at INTEGER NOT NULL DEFAULT 0,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_chat_created ON chat (created_at DESC, seq);
+
+CREATE TABLE IF NOT EXISTS list_items (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    list TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_list_items_list ON list_items (list, seq);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+
+CREATE TABLE IF NOT EXISTS pruned (
+    key TEXT PRIMARY KEY,
+    created_at INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+def _dumps(obj) -> str:
+    return json.dumps(obj, ensure_ascii=False)
+
+
+def _int(value) -> int:
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+class SqliteStorage(Storage):
+    """
+    SQLite-Backend: Posts, Kommentare, Chat und Listen liegen als JSON in
+    eigenen Tabellen, mit Indizes auf Post-id, Kategorie, auto_score und
+    Kommentar-post_id. Eine Verbindung pro Thread, WAL für parallele Leser.
+    Jede Schreib-Transaktion zählt meta.version hoch; mit expected_version
+    nur, wenn die Version noch stimmt – das prüft SQLite atomar, auch
+    zwischen Prozessen. Geschrieben wird mit BEGIN IMMEDIATE: transaction()
+    hält die Schreibsperre der Datenbank von Lesen bis Schreiben, so dass
+    add_likes und merge_posts auch gegen andere Prozesse atomar sind.
+    """
+
+    def __init__(self, path: str = SQLITE_PATH):
+        super().__init__()
+        self.path = path
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _write(self):
+        """
+        Schreib-Transaktion (BEGIN IMMEDIATE) auf der Verbindung des Threads;
+        innerhalb von transaction() Teil der äußeren, die erst am Ende committet.
+        """
+        with self._lock:
+            conn = self._conn()
+            if conn.in_transaction:
+                yield conn
+                return
+            conn.execute("BEGIN IMMEDIATE")  # wartet bis zu timeout auf andere Schreiber
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+
+    @contextmanager
+    def transaction(self):
+        with self._write():
+            yield self
+
+    @staticmethod
+    def _bump(conn: sqlite3.Connection, expected_version: int | None = None) -> None:
+        """Erhöht die Version in der laufenden Transaktion; VersionConflict, wenn expected_version nicht passt."""
+        conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('version', '0')")
+        if expected_version is None:
+            conn.execute("UPDATE meta SET value = CAST(value AS INTEGER) + 1 WHERE key = 'version'")
+            return
+        cur = conn.execute(
+            "UPDATE meta SET value = CAST(value AS INTEGER) + 1 "
+            "WHERE key = 'version' AND CAST(value AS INTEGER) = ?",
+            (expected_version,),
+        )
+        if cur.rowcount == 0:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+            raise VersionConflict(expected_version, int(row[0]))
+
+    def version(self) -> int:
+        row = self._conn().execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        return int(row[0]) if row else 0
+
+    # ---- ganzes Dokument ----
+
+    def load(self) -> dict:
+        t0 = time.perf_counter()
+        conn = self._conn()
+        db = empty_db()
+        db["posts"] = [json.loads(r[0]) for r in conn.execute("SELECT data FROM posts ORDER BY seq")]
+        db["comments"] = [json.loads(r[0]) for r in conn.execute("SELECT data FROM comments ORDER BY seq")]
+        db["chat"] = [json.loads(r[0]) for r in conn.execute("SELECT data FROM chat ORDER BY seq")]
+        db["lists"] = self.get_lists()
+        db["pruned"] = dict(conn.execute("SELECT key, created_at FROM pruned"))
+        row = conn.execute("SELECT value FROM meta WHERE key = 'extra'").fetchone()
+        if row:
+            for k, v in json.loads(row[0]).items():
+                db.setdefault(k, v)
+        db["version"] = self.version()
+        metrics.record_storage("sqlite", "read", time.perf_counter() - t0)
+        return db
+
+    def save(self, db: dict) -> None:
+        t0 = time.perf_counter()
+        _normalize(db)
+        extra = {k: v for k, v in db.items() if k not in ("posts", "comments", "lists", "chat", "version", "pruned")}
+        with self._write() as conn:
+            self._bump(conn)
+            conn.execute("DELETE FROM posts")
+            conn.execute("DELETE FROM comments")
+            conn.execute("DELETE FROM chat")
+            conn.execute("DELETE FROM list_items")
+            conn.execute("DELETE FROM pruned")
+            self._insert_posts(conn, _unique_posts(db["posts"]))
+            conn.executemany("INSERT INTO pruned (key, created_at) VALUES (?, ?)",
+                             _tombstones(db.get("pruned", {}), ()).items())
+            conn.executemany(
+                "INSERT INTO comments (post_id, created_at, data) VALUES (?, ?, ?)",
+                [(c.get("post_id"), _int(c.get("created_at")), _dumps(c)) for c in db["comments"]],
+            )
+            conn.executemany(
+                "INSERT INTO chat (created_at, data) VALUES (?, ?)",
+                [(_int(m.get("created_at")), _dumps(m)) for m in db["chat"]],
+            )
+            conn.executemany(
+                "INSERT INTO list_items (list, data) VALUES (?, ?)",
+                [(name, _dumps(item)) for name, items in db["lists"].items() for item in items],
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('lists', ?)",
+                (_dumps(list(db["lists"].keys())),),
+            )
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('extra', ?)", (_dumps(extra),))
+        metrics.record_storage("sqlite", "write", time.perf_counter() - t0)
+
+    # ---- Posts ----
+
+    @staticmethod
+    def _insert_posts(conn: sqlite3.Connection, posts: list[dict]) -> None:
+        conn.executemany(
+            "INSERT INTO posts (id, category, auto_score, data) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET category = excluded.category, "
+            "auto_score = excluded.auto_score, data = excluded.data",
+            [(p.get("id"), p.get("auto_category"), _int(_score(p)), _dumps(p)) for p in posts],
+        )
+
+    def list_posts(self, category: str | None = None) -> list[dict]:
+        if category:
+            rows = self._conn().execute("SELECT data FROM posts WHERE category = ? ORDER BY seq", (category,))
+        else:
+            rows = self._conn().execute("SELECT data FROM posts ORDER BY seq")
+        return [json.loads(r[0]) for r in rows]
+
+    def top_posts(self, category: str | None = None, limit: int = 50) -> list[dict]:
+        if category:
+            rows = self._conn().execute(
+                "SELECT data FROM posts WHERE category = ? ORDER BY auto_score DESC, seq LIMIT ?",
+                (category, limit),
+            )
+        else:
+            rows = self._conn().execute("SELECT data FROM posts ORDER BY auto_score DESC, seq LIMIT ?", (limit,))
+        return [json.loads(r[0]) for r in rows]
+
+    def page_posts(self, category: str | None = None, limit: int = 50,
+                   cursor: str | None = None, per_source: int | None = None) -> tuple[list[dict], str | None]:
+        if per_source is not None:
+            # Quoten zählen ab dem ersten Post der Rangliste, nicht erst ab cursor
+            return super().page_posts(category, limit, cursor, per_source)
+        conn = self._conn()
+        where, args = [], []
+        if category:
+            where.append("category = ?")
+            args.append(category)
+        if cursor:
+            score, post_id = decode_cursor(cursor)
+            row = conn.execute("SELECT seq, auto_score FROM posts WHERE id = ?", (post_id,)).fetchone()
+            if row and row[1] == score:
+                where.append("(auto_score < ? OR (auto_score = ? AND seq > ?))")
+                args += [score, score, row[0]]
+            else:
+                where.append("auto_score < ?")
+                args.append(score)
+        sql = "SELECT data FROM posts"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY auto_score DESC, seq LIMIT ?"
+        posts = [json.loads(r[0]) for r in conn.execute(sql, (*args, limit + 1))]
+        next_cursor = encode_cursor(posts[limit - 1]) if len(posts) > limit else None
+        return posts[:limit], next_cursor
+
+    def count_posts(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM posts").fetchone()[0]
+
+    def get_post(self, post_id: str) -> dict | None:
+        row = self._conn().execute("SELECT data FROM posts WHERE id = ?", (post_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def update_posts(self, upserts: list[dict], deletes: list[str] = (),
+                     expected_version: int | None = None) -> None:
+        with self._write() as conn:
+            self._bump(conn, expected_version)
+            self._insert_posts(conn, upserts)
+            conn.executemany("DELETE FROM posts WHERE id = ?", [(pid,) for pid in deletes])
+
+    def replace_posts(self, posts: list[dict], expected_version: int | None = None, pruned=()) -> None:
+        with self._write() as conn:
+            self._bump(conn, expected_version)
+            conn.execute("DELETE FROM posts")
+            self._insert_posts(conn, _unique_posts(posts))
+            cutoff = time.time() - PRUNED_MAX_AGE_DAYS * 86400
+            conn.execute("DELETE FROM pruned WHERE created_at < ?", (cutoff,))
+            conn.executemany("INSERT OR REPLACE INTO pruned (key, created_at) VALUES (?, ?)",
+                             _tombstones({}, pruned).items())
+
+    def pruned_keys(self) -> set[str]:
+        return {r[0] for r in self._conn().execute("SELECT key FROM pruned")}
+
+    # ---- Kommentare ----
+
+    def comments_for(self, post_id: str) -> list[dict]:
+        rows = self._conn().execute(
+            "SELECT data FROM comments WHERE post_id = ? ORDER BY created_at, seq", (post_id,)
+        )
+        return [json.loads(r[0]) for r in rows]
+
+    def comment_counts(self, post_ids: list[str] | None = None) -> dict[str, int]:
+        conn = self._conn()
+        if post_ids is None:
+            rows = conn.execute(
+                "SELECT post_id, COUNT(*) FROM comments WHERE post_id IS NOT NULL AND post_id != '' "
+                "GROUP BY post_id"
+            )
+            return dict(rows.fetchall())
+        counts: dict[str, int] = {}
+        ids = [pid for pid in post_ids if pid]
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i + 500]
+            marks = ",".join("?" * len(chunk))
+            rows = conn.execute(
+                f"SELECT post_id, COUNT(*) FROM comments WHERE post_id IN ({marks}) GROUP BY post_id", chunk
+            )
+            counts.update(rows.fetchall())
+        return counts
+
+    def add_comment(self, comment: dict) -> None:
+        with self._write() as conn:
+            self._bump(conn)
+            conn.execute(
+                "INSERT INTO comments (post_id, created_at, data) VALUES (?, ?, ?)",
+                (comment.get("post_id"), _int(comment.get("created_at")), _dumps(comment)),
+            )
+
+    # ---- Chat ----
+
+    def recent_chat(self, limit: int = 50) -> list[dict]:
+        rows = self._conn().execute("SELECT data FROM chat ORDER BY created_at DESC, seq LIMIT ?", (limit,))
+        return list(reversed([json.loads(r[0]) for r in rows]))
+
+    def add_chat(self, msg: dict) -> None:
+        with self._write() as conn:
+            self._bump(conn)
+            conn.execute("INSERT INTO chat (created_at, data) VALUES (?, ?)", (_int(msg.get("created_at")), _dumps(msg)))
+
+    # ---- Listen (Fundgrube) ----
+
+    def get_lists(self) -> dict:
+        conn = self._conn()
+        row = conn.execute("SELECT value FROM meta WHERE key = 'lists'").fetchone()
+        lists: dict[str, list] = {name: [] for name in (json.loads(row[0]) if row else ["fundgrube"])}
+        for name, data in conn.execute("SELECT list, data FROM list_items ORDER BY seq"):
+            lists.setdefault(name, []).append(json.loads(data))
+        return lists
+
+    def add_list_item(self, name: str, item: dict) -> dict:
+        with self._write() as conn:
+            self._bump(conn)
+            if "id" not in item:
+                n = conn.execute("SELECT COUNT(*) FROM list_items WHERE list = ?", (name,)).fetchone()[0]
+                item["id"] = f"user_{n + 1}"
+            conn.execute("INSERT INTO list_items (list, data) VALUES (?, ?)", (name, _dumps(item)))
+            row = conn.execute("SELECT value FROM meta WHERE key = 'lists'").fetchone()
+            names = json.loads(row[0]) if row else ["fundgrube"]
+            if name not in names:
+                names.append(name)
+                conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('lists', ?)", (_dumps(names),))
+        return item
+
+    # ---- Statistik ----
+
+    def stats(self) -> dict:
+        conn = self._conn()
+        return {
+            "posts_count": self.count_posts(),
+            "fundgrube_count": conn.execute(
+                "SELECT COUNT(*) FROM list_items WHERE list = 'fundgrube'"
+            ).fetchone()[0],
+        }
+
+
+BACKENDS = {
+    "json": JsonStorage,
+    "sqlite": SqliteStorage,
+}
+
+_storage: Storage | None = None
+_storage_lock = threading.Lock()
+
+
+def get_storage() -> Storage:
+    """Das im Prozess geteilte Storage-Objekt für STORAGE_BACKEND."""
+    global _storage
+    with _storage_lock:
+        if _storage is None:
+            try:
+                backend = BACKENDS[STORAGE_BACKEND]
+            except KeyError:
+                raise ValueError(f"Unbekanntes Storage-Backend: {STORAGE_BACKEND!r}") from None
+            _storage = backend()
+        return _storage
+
+
+def migrate_json_to_sqlite(json_path: str = NEWSDB_PATH, sqlite_path: str = SQLITE_PATH) -> dict:
+    """Einmalige Übernahme von newsdb.json nach SQLite; bestehende SQLite-Daten werden ersetzt."""
+    db = JsonStorage(json_path).load()
+    SqliteStorage(sqlite_path).save(db)
+    return {
+        "posts": len(db["posts"]),
+        "comments": len(db["comments"]),
+        "chat": len(db["chat"]),
+        "list_items": sum(len(v) for v in db["lists"].values()),
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Storage-Werkzeuge für die News-DB")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    mig = sub.add_parser("migrate", help="newsdb.json nach SQLite übernehmen")
+    mig.add_argument("--json", default=NEWSDB_PATH)
+    mig.add_argument("--sqlite", default=SQLITE_PATH)
+    comp = sub.add_parser("compact", help="Chat-/Kommentar-Segmente von newsdb.json zusammenfassen")
+    comp.add_argument("--json", default=NEWSDB_PATH)
+    comp.add_argument("--all", action="store_true", help="auch das aktive Segment einbeziehen")
+    args = ap.parse_args()
+
+    if args.cmd == "migrate":
+        counts = migrate_json_to_sqlite(args.json, args.sqlite)
+        print(f"Migriert nach {args.sqlite}: " + ", ".join(f"{v} {k}" for k, v in counts.items()))
+        print("Backend aktivieren mit AGGREPAGE_STORAGE=sqlite")
+    elif args.cmd == "compact":
+        for name, st in JsonStorage(args.json).compact_logs(args.all).items():
+            print(f"{name}: {st['merged']} Segmente zusammengefasst, {st['segments']} Segmente übrig")
@@ -0,0 +1,47 @@
+# test_feed_cache.py Two FeedCache instances (reload and ingest daemon) sharing one file must not drop each other's entries.
+#
+#   python -m unittest discover -s tests
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from feed_cache import FeedCache  # noqa: E402
+
+
+class FeedCacheMergeTest(unittest.TestCase):
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), "feed_cache.json")
+
+    def test_prune_keeps_entries_written_by_other_instance(self):
+        reload_cache = FeedCache.load(self.path)
+        daemon_cache = FeedCache.load(self.path)
+        reload_cache.store("https://a", {"ETag": "a1"}, 10, [])
+        daemon_cache.store("https://b", {"ETag": "b1"}, 20, [])
+        daemon_cache.save(prune=False)
+        reload_cache.save(prune=True)
+        self.assertEqual(set(FeedCache.load(self.path).entries), {"https://a", "https://b"})
+
+    def test_newer_entry_wins(self):
+        reload_cache = FeedCache.load(self.path)
+        daemon_cache = FeedCache.load(self.path)
+        reload_cache.store("https://a", {"ETag": "alt"}, 10, [])
+        daemon_cache.store("https://a", {"ETag": "neu"}, 10, [])
+        daemon_cache.save(prune=False)
+        reload_cache.save(prune=True)
+        self.assertEqual(FeedCache.load(self.path).entries["https://a"]["etag"], "neu")
+
+    def test_prune_drops_stale_unseen_entries(self):
+        first = FeedCache.load(self.path)
+        first.store("https://alt", {"ETag": "x"}, 1, [])
+        first.save()
+        second = FeedCache.load(self.path)
+        second.store("https://a", {"ETag": "a1"}, 10, [])
+        second.save(prune=True)
+        self.assertEqual(set(FeedCache.load(self.path).entries), {"https://a"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+# test_ingest.py Regression tests for the ingest daemon loop: no busy-waiting while a reload runs or a round fails.
+#
+#   python -m unittest discover -s tests
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ingest  # noqa: E402
+from feed_cache import FeedCache  # noqa: E402
+
+
+class RecordingEvent:
+    """Ersetzt IngestDaemon._stop: merkt sich die Wartezeiten und beendet die Schleife nach einer Runde."""
+
+    def __init__(self):
+        self.waits = []
+
+    def is_set(self) -> bool:
+        return bool(self.waits)
+
+    def wait(self, timeout=None) -> bool:
+        self.waits.append(timeout)
+        return True
+
+
+class IngestLoopTest(unittest.TestCase):
+    def make_daemon(self, busy) -> ingest.IngestDaemon:
+        tmp = tempfile.mkdtemp()
+        daemon = ingest.IngestDaemon(
+            store=object(), schedules=[ingest.FeedSchedule("feed", "Feed", "austria", None)],
+            cache=FeedCache(os.path.join(tmp, "feed_cache.json")), state_path=None,
+            categorize_interval=0, busy=busy, seed=1, runs_log=None,
+        )
+        daemon._stop = RecordingEvent()
+        return daemon
+
+    def test_busy_round_is_skipped_and_waits(self):
+        daemon = self.make_daemon(busy=lambda: True)
+        self.assertEqual(daemon.poll_once(), {"skipped": "busy"})
+        daemon.run_forever()
+        self.assertEqual(daemon._stop.waits, [ingest.BUSY_WAIT])
+
+    def test_failed_round_waits(self):
+        def busy():
+            raise RuntimeError("kaputt")
+
+        daemon = self.make_daemon(busy=busy)
+        with open(os.devnull, "w") as devnull:
+            stderr, sys.stderr = sys.stderr, devnull
+            try:
+                daemon.run_forever()
+            finally:
+                sys.stderr = stderr
+        self.assertEqual(daemon._stop.waits, [ingest.BUSY_WAIT])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,34 @@
+# test_likes.py The keyword-score cache of LikeBuffer stays bounded.
+#
+#   python -m unittest discover -s tests
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from likes import LikeBuffer  # noqa: E402
+
+
+def post(i: int) -> dict:
+    return {"id": f"p{i}", "title": f"Titel {i}", "description": "", "auto_category": "austria"}
+
+
+class KeywordCacheTest(unittest.TestCase):
+    def test_cache_is_bounded_and_keeps_recent_posts(self):
+        buf = LikeBuffer(store=object(), flush_seconds=0, kw_cache_size=2)
+        buf.keyword_score(post(1))
+        buf.keyword_score(post(2))
+        buf.keyword_score(post(1))  # p1 wieder frisch, p2 ist jetzt der älteste
+        buf.keyword_score(post(3))
+        self.assertEqual(list(buf._kw_cache), ["p1", "p3"])
+
+    def test_cached_score_matches_fresh_score(self):
+        buf = LikeBuffer(store=object(), flush_seconds=0, kw_cache_size=1)
+        first = buf.keyword_score(post(1))
+        buf.keyword_score(post(2))
+        self.assertEqual(buf.keyword_score(post(1)), first)
+
+
+if __name__ == "__main__":
+    unittest.main()
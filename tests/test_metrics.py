@@ -0,0 +1,51 @@
+# test_metrics.py Overlapping worker runs must only collect the feeds and storage accesses of their own context.
+#
+#   python -m unittest discover -s tests
+import os
+import sys
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import metrics  # noqa: E402
+import scrape_worker  # noqa: E402
+
+
+class WorkerRunAttributionTest(unittest.TestCase):
+    def test_overlapping_runs_keep_their_own_stats(self):
+        entered = threading.Barrier(2)
+        runs = {}
+
+        def worker(name):
+            with metrics.worker_run(name, log_path=None) as run:
+                runs[name] = run
+                entered.wait()
+                metrics.record_storage("json", name, 0.01, 1)
+                entered.wait()
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in ("scrape", "ingest")]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(set(runs["scrape"].storage), {"scrape"})
+        self.assertEqual(set(runs["ingest"].storage), {"ingest"})
+
+    def test_fetch_pool_tasks_report_to_calling_run(self):
+        def job(i):
+            metrics.record_feed(f"feed{i}", "austria", 0.01, 200, 1, 1)
+
+        with scrape_worker.FetchPool(max_workers=2) as pool, metrics.worker_run("scrape", log_path=None) as run:
+            pool.run([lambda i=i: job(i) for i in range(3)])
+        self.assertEqual(sorted(f["source"] for f in run.feeds), ["feed0", "feed1", "feed2"])
+
+    def test_no_run_outside_context(self):
+        with metrics.worker_run("scrape", log_path=None) as run:
+            pass
+        metrics.record_storage("json", "read", 0.01, 1)
+        self.assertEqual(run.storage, {})
+
+
+if __name__ == "__main__":
+    unittest.main()